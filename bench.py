@@ -0,0 +1,239 @@
+"""
+Benchmarks for the draft hot paths.
+
+Times the rules / roll / odds / embed code on synthetic drafts, from a
+2-coach first round up to 200 coaches late in the draft with heavy burn
+lists and pools of 100k entries. Every case reports median and p99
+latency plus the peak memory allocated per call (tracemalloc), and the
+whole run can be saved as JSON and compared against an earlier one.
+
+    python bench.py --quick
+    python bench.py --json before.json
+    python bench.py --json after.json --compare before.json
+"""
+import argparse
+import itertools
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import config
+import logic
+import pool
+import views
+
+SCALES = {
+    # coaches, rounds already played, names burned this turn, pool size (None = real pool)
+    "quick": {"coaches": (2, 16), "rounds": (0, 8), "burned": (0, 10), "pools": (None, 10_000)},
+    "full": {"coaches": (2, 16, 64, 200), "rounds": (0, 8), "burned": (0, 10, 1000),
+             "pools": (None, 10_000, 100_000)},
+}
+SAMPLE_SECONDS = 20e-6  # Calls are batched until one timing sample takes at least this long
+ALLOC_CALLS = 200       # Calls traced by tracemalloc per case
+
+
+# --- SYNTHETIC DRAFTS ---
+
+class Coach:
+    """Stand-in for a discord.Member (what the rules and embeds read)"""
+
+    def __init__(self, i):
+        self.id = 1000 + i
+        self.display_name = f"Coach {i}"
+        self.mention = f"<@{self.id}>"
+
+
+def synthetic_pool(size, seed=0):
+    """`size` unique names with the real pool's tier mix"""
+    real = logic.pool_index
+    tiers = list(real.tiers) if len(real) else list(config.TIER_PROBS)
+    rng = random.Random(seed)
+    return pool.PoolIndex([f"Synth-{i}" for i in range(size)], [rng.choice(tiers) for _ in range(size)],
+                          checksum=f"synthetic-{size}")
+
+
+def build_session(n_coaches, rounds_played, burned, seed=0):
+    """A draft of `n_coaches` after `rounds_played` full rounds, with `burned` names burned this turn"""
+    coaches = [Coach(i) for i in range(n_coaches)]
+    session = logic.DraftSession(("bench", n_coaches), coaches, seed=seed)
+
+    for rnd in range(rounds_played):
+        for coach in coaches:
+            valid = logic.get_valid_tiers(session, coach.id, rnd + 1)
+            name, tier = logic.roll_pokemon(session, valid)
+            if name:
+                session.commit_pick(coach.id, name, tier)
+        session.round += 1
+
+    available = list(session.availability.pos)
+    for pid in session.rng.sample(available, min(burned, len(available))):
+        session.burn(session.pool.names[pid])
+    return session, coaches
+
+
+# --- TIMING ---
+
+def measure(fn, samples):
+    """Median / p99 / mean microseconds per call, plus peak bytes allocated per call"""
+    # Calibrate: batch fast calls so the timer's own overhead doesn't dominate
+    inner = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        if time.perf_counter() - started >= SAMPLE_SECONDS or inner >= 1 << 16:
+            break
+        inner *= 2
+
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter_ns()
+        for _ in range(inner):
+            fn()
+        timings.append((time.perf_counter_ns() - started) / inner / 1000)
+    timings.sort()
+
+    tracemalloc.start()
+    peaks = []
+    for _ in range(ALLOC_CALLS):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    return {
+        "calls": samples * inner,
+        "median_us": round(statistics.median(timings), 4),
+        "p99_us": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 4),
+        "mean_us": round(statistics.fmean(timings), 4),
+        "alloc_peak_bytes": int(statistics.median(peaks)),
+    }
+
+
+# --- CASES ---
+
+def cases(session, coaches):
+    """(name, fn) for every hot path on one session. Calls cycle through the coaches."""
+    pick = session.round
+    cycle = itertools.cycle(coaches)
+    valid = logic.get_valid_tiers(session, coaches[0].id, pick)
+    odds_data = logic.calculate_tier_percentages(session, coaches[0].id, pick)
+
+    def roll():
+        # Burned / picked names are already out of availability: nothing to restore
+        logic.roll_pokemon(session, valid)
+
+    return [
+        ("get_valid_tiers", lambda: logic.get_valid_tiers(session, next(cycle).id, pick)),
+        ("roll_pokemon", roll),
+        ("calculate_tier_percentages", lambda: logic.calculate_tier_percentages(session, next(cycle).id, pick)),
+        ("format_odds_grid", lambda: views.format_odds_grid(odds_data)),
+        ("create_summary_embeds", lambda: views.create_summary_embeds(session)),
+    ]
+
+
+def run(scale, samples, only=None):
+    if not len(logic.pool_index):
+        logic.load_data()
+    real_pool = logic.pool_index
+
+    results = []
+    for pool_size in SCALES[scale]["pools"]:
+        logic.pool_index = real_pool if pool_size is None else synthetic_pool(pool_size)
+        for n_coaches, rounds, burned in itertools.product(
+                SCALES[scale]["coaches"], SCALES[scale]["rounds"], SCALES[scale]["burned"]):
+            session, coaches = build_session(n_coaches, rounds, burned)
+            params = {"pool": len(session.pool), "coaches": n_coaches, "round": session.round, "burned": burned}
+
+            for name, fn in cases(session, coaches):
+                if only and only not in name:
+                    continue
+                # Summaries don't depend on the pool or the burn list
+                if name == "create_summary_embeds" and (burned or pool_size is not None):
+                    continue
+                result = {"name": name, "params": params, **measure(fn, samples)}
+                results.append(result)
+                print(f"{name:<28} {format_params(params):<44} "
+                      f"median {result['median_us']:>10.3f}µs  p99 {result['p99_us']:>10.3f}µs  "
+                      f"alloc {result['alloc_peak_bytes']:>8}B")
+
+    logic.pool_index = real_pool
+    return results
+
+
+def format_params(params):
+    return " ".join(f"{k}={v}" for k, v in params.items())
+
+
+# --- REPORT / COMPARE ---
+
+def metadata(scale, samples):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "scale": scale,
+        "samples": samples,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Prints median ratios against an earlier run. Returns the cases slower than `threshold`."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    before = {(r["name"], format_params(r["params"])): r for r in baseline["results"]}
+
+    print(f"\n=== vs {baseline_path} ({baseline['meta'].get('commit')}) ===")
+    regressions = []
+    for r in results:
+        old = before.get((r["name"], format_params(r["params"])))
+        if old is None or not old["median_us"]:
+            continue
+        ratio = r["median_us"] / old["median_us"]
+        mark = "🔺" if ratio > threshold else ("🔻" if ratio < 1 / threshold else "  ")
+        print(f"{mark} {r['name']:<28} {format_params(r['params']):<44} x{ratio:.2f} "
+              f"({old['median_us']:.3f} -> {r['median_us']:.3f}µs)")
+        if ratio > threshold:
+            regressions.append(r)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the Kokoloko draft hot paths")
+    parser.add_argument("--quick", action="store_true", help="Small matrix (real pool + 10k, up to 16 coaches)")
+    parser.add_argument("--samples", type=int, default=200, help="Timing samples per case")
+    parser.add_argument("--only", help="Only cases whose name contains this")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--compare", help="Earlier --json file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.10, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    scale = "quick" if args.quick else "full"
+    results = run(scale, args.samples, args.only)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"meta": metadata(scale, args.samples), "results": results}, f, indent=2)
+        print(f"\nSaved to {args.json}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} cases slower than x{args.threshold:.2f}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,17 @@ load_dotenv()
 # --- SECRETS ---
 TOKEN = os.getenv('DISCORD_TOKEN')
 CSV_FILE = 'pokemon_data.csv'
+POOL_FILE = 'pokemon_data.pool'  # Compiled from CSV_FILE by pool.py
+POOL_WATCH_INTERVAL = 30  # Seconds between CSV change checks (0 = only !reload_pool)
+JOURNAL_FILE = 'drafts.db'  # SQLite journal for crash recovery / undo
+WORKER_ID = os.getenv('WORKER_ID')  # Name of this process in draft leases (default: hostname)
+LEASE_TTL = 15  # Seconds a worker keeps a draft without renewing (takeover delay after a crash)
+SPRITE_CACHE_DIR = 'sprite_cache'  # Written by fetch_sprites.py
+SPRITE_FILE = 'sprites.pack'  # Packed from SPRITE_CACHE_DIR by sprites.py (optional)
+SPRITE_MMAP = False  # mmap the pack instead of reading it into memory
+HISTORY_FILE = 'history.db'  # Every roll / pick / final roster across drafts (!history)
+HISTORY_BATCH = 500          # Events per write transaction
+HISTORY_FLUSH_SECONDS = 2.0  # Longest an event waits in the queue
 
 # --- PERMISSIONS ---
 STAFF_ROLE_NAME = "NPO-Draft Staff"
@@ -17,6 +28,45 @@ MIN_TIER_COST = 20
 TOTAL_POKEMON = 10
 ROLL_TIMEOUT = 60     # Tiempo para el botón "Click to Roll"
 DECISION_TIMEOUT = 60 # NUEVO: Tiempo para decidir "Keep/Reroll"
+SNAPSHOT_EVERY = 50   # Journal events between compact snapshots
+# Empty tiers are never rolled (the rest keep their relative odds). If every
+# valid tier ran out (or the rules leave none): "cheapest" = cheapest tier
+# still in the pool that fits MAX_POINTS and the high-tier rules (only the
+# cash reserved for later picks is given up); "any" = as "cheapest", and if
+# nothing fits, the cheapest tier left at all (a full roster over the cap
+# rather than a lost turn); "skip" = the coach gets no pick.
+EMPTY_TIER_FALLBACK = "cheapest"
+# Roll weights: "remaining" = TIER_PROBS scaled by the share of each tier
+# still in the pool (a tier with 1 of 60 names left is 60x less likely than
+# when full); "fixed" = TIER_PROBS as designed, only empty tiers drop out.
+TIER_WEIGHTS = "remaining"
+
+# --- PACING ---
+# Pauses (seconds) after a pick, at the end of a round and after a re-roll,
+# so the channel can be followed. Each draft keeps its own copy; staff
+# switch a draft to FAST_PACING with !fast_mode.
+PACING = {"turn": 1.0, "round": 2.0, "reroll": 1.0}
+FAST_PACING = {"turn": 0.0, "round": 0.5, "reroll": 0.0}
+
+# --- DISCORD I/O ---
+SUMMARY_COALESCE_SECONDS = 30  # Repeated !summary within this window gets no new reply
+
+# --- METRICS ---
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108  # Prometheus text on /metrics (0 = off)
+LOOP_LAG_INTERVAL = 1.0  # Seconds between event loop lag probes
+
+# --- PROFILING (!profile) ---
+PROFILE_DIR = 'profiles'
+PROFILE_INTERVAL = 0.005     # Seconds between stack samples
+PROFILE_MAX_SECONDS = 300    # A session stops by itself after this
+PROFILE_TRACEBACK_DEPTH = 10  # Frames kept per allocation (tracemalloc)
+PROFILE_TOP_ALLOCATIONS = 25
+
+# --- CACHES ---
+RULE_CACHE_SIZE = 1024  # (high-tier state, cap) -> valid tiers
+GRID_CACHE_SIZE = 256   # valid tiers -> odds % / rendered grid
+SAMPLER_CACHE_SIZE = 256  # valid tiers -> alias table
 
 # --- PROBABILITIES (Updated) ---
 TIER_PROBS = {
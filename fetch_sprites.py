@@ -1,84 +1,159 @@
-import pandas as pd
-import requests
+"""
+Builds Pokemon_Sprites_Clean.xlsx (sprite + name + tier per row) from pokemon_data.csv.
+
+Lookups run on a thread pool over one pooled HTTP session, with retries and
+backoff. API answers and PNGs are cached on disk (images by content hash),
+so a rerun only fetches what is missing and --offline needs no network.
+
+    python fetch_sprites.py
+    python fetch_sprites.py --workers 16 --base-url http://localhost:8000/api/v2
+    python fetch_sprites.py --offline
+"""
+import argparse
+import csv
+import hashlib
 import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
 import xlsxwriter
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+from sprites import get_api_name
 
 # --- Configuration ---
 INPUT_FILE = 'pokemon_data.csv'  # Your new file
 OUTPUT_FILE = 'Pokemon_Sprites_Clean.xlsx'  # The result file
+BASE_URL = 'https://pokeapi.co/api/v2'
+CACHE_DIR = config.SPRITE_CACHE_DIR  # Packed for the bot by sprites.py
+WORKERS = 8
+TIMEOUT = 10  # Seconds, per request
+RETRIES = 4   # Per request, on connection errors / 429 / 5xx
+BACKOFF = 0.5  # Seconds, doubled on every retry
 
 
 # ---------------------
 
-def get_api_name(display_name):
+# --- DISK CACHE ---
+# cache/index/<api_name>.json  -> {"status": 200|404, "sprite": url, "sha256": hash}
+# cache/blobs/ab/abcdef....png -> sprite bytes, named by their sha256
+
+class SpriteCache:
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "index"), exist_ok=True)
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+
+    def _index_path(self, api_name):
+        return os.path.join(self.root, "index", f"{api_name}.json")
+
+    def _blob_path(self, digest):
+        return os.path.join(self.root, "blobs", digest[:2], f"{digest}.png")
+
+    def get_entry(self, api_name):
+        try:
+            with open(self._index_path(api_name), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put_entry(self, api_name, entry):
+        _write_atomic(self._index_path(api_name), json.dumps(entry).encode("utf-8"))
+
+    def get_blob(self, digest):
+        try:
+            with open(self._blob_path(digest), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # A torn / corrupted file counts as a miss
+        return data if hashlib.sha256(data).hexdigest() == digest else None
+
+    def put_blob(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_atomic(path, data)
+        return digest
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+# --- HTTP ---
+
+def make_session(workers):
+    """One connection pool shared by all workers, retrying 429 / 5xx with backoff"""
+    retry = Retry(total=RETRIES, backoff_factor=BACKOFF, status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=("GET",), respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=workers, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = "kokoloko-bot/fetch_sprites"
+    return session
+
+
+def fetch_sprite(session, cache, base_url, api_name, offline=False, refresh_missing=False):
     """
-    Converts display names to PokeAPI format.
-    Examples:
-      "Mega Mewtwo Y" -> "mewtwo-mega-y"
-      "Galarian Darmanitan" -> "darmanitan-galar"
-      "Shaymin-Sky" -> "shaymin-sky"
+    Returns (status, png_bytes, from_cache). status: "ok", "no_sprite",
+    "not_found", "not_cached" (offline miss) or "error: ...".
     """
-    name = str(display_name).lower().strip()
-
-    # 1. Replace special chars and spaces
-    name = name.replace('.', '').replace("'", '').replace(':', '').replace(' ', '-')
-
-    # 2. Handle Regional Prefixes (move to end)
-    prefixes = {
-        'alolan-': '-alola',
-        'galarian-': '-galar',
-        'hisuian-': '-hisui',
-        'paldean-': '-paldea'
-    }
-    for prefix, suffix in prefixes.items():
-        if name.startswith(prefix):
-            name = name.replace(prefix, '') + suffix
-            return name  # Usually regional forms don't have other suffixes
-
-    # 3. Handle Mega Evolutions (move 'mega' to the correct spot)
-    if name.startswith('mega-'):
-        parts = name.split('-')
-        # Case: Mega-Mewtwo-Y -> mewtwo-mega-y
-        if len(parts) == 3:
-            return f"{parts[1]}-mega-{parts[2]}"
-        # Case: Mega-Venusaur -> venusaur-mega
-        elif len(parts) == 2:
-            return f"{parts[1]}-mega"
-
-    # 4. Handle Gigantamax
-    if name.endswith('-gigantamax') or name.endswith('-gmax'):
-        return name.replace('-gigantamax', '-gmax')
-
-    # 5. Manual Overrides for tricky ones
-    overrides = {
-        'nidoran-f': 'nidoran-f',
-        'nidoran-m': 'nidoran-m',
-        'mime-jr': 'mime-jr',
-        'mr-mime': 'mr-mime',
-        'type:-null': 'type-null',
-        'farfetchd': 'farfetchd',
-        'flabebe': 'flabebe',
-        'zygarde-10%': 'zygarde-10',  # PokeAPI uses 'zygarde-10' or 'zygarde-10-power-construct'
-        'zygarde-complete': 'zygarde-complete',
-    }
-
-    return overrides.get(name, name)
+    entry = cache.get_entry(api_name)
+    if entry is not None and entry["status"] == 404 and refresh_missing and not offline:
+        entry = None
+
+    if entry is not None:
+        if entry["status"] == 404:
+            return "not_found", None, True
+        if not entry.get("sprite"):
+            return "no_sprite", None, True
+        data = cache.get_blob(entry["sha256"]) if entry.get("sha256") else None
+        if data is not None:
+            return "ok", data, True
+    if offline:
+        return "not_cached", None, True
 
-
-def main():
-    print(f"Reading {INPUT_FILE}...")
     try:
-        df = pd.read_csv(INPUT_FILE)
-    except FileNotFoundError:
-        print("Error: Input file not found!")
-        return
+        if entry is None:
+            response = session.get(f"{base_url.rstrip('/')}/pokemon/{api_name}", timeout=TIMEOUT)
+            if response.status_code == 404:
+                # If 404, it might be a custom/fan-made Pokemon
+                cache.put_entry(api_name, {"status": 404})
+                return "not_found", None, False
+            response.raise_for_status()
+            entry = {"status": 200, "sprite": response.json()["sprites"]["front_default"]}
+            if not entry["sprite"]:
+                cache.put_entry(api_name, entry)
+                return "no_sprite", None, False
+
+        image = session.get(entry["sprite"], timeout=TIMEOUT)
+        image.raise_for_status()
+        entry["sha256"] = cache.put_blob(image.content)
+        cache.put_entry(api_name, entry)
+        return "ok", image.content, False
+    except (requests.RequestException, ValueError, KeyError) as e:
+        return f"error: {e}", None, False
+
 
-    # Add the Cleaned_Name column locally first
-    df['Cleaned_Name'] = df['Name'].apply(get_api_name)
+# --- WORKBOOK ---
 
-    # Initialize Excel Writer
-    writer = pd.ExcelWriter(OUTPUT_FILE, engine='xlsxwriter')
-    workbook = writer.book
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row for row in csv.DictReader(f) if row.get("Name", "").strip()]
+
+
+def write_workbook(path, rows, results):
+    workbook = xlsxwriter.Workbook(path)
     worksheet = workbook.add_worksheet('Sheet1')
 
     # Define Formats
@@ -95,50 +170,74 @@ def main():
     worksheet.set_column('B:C', 25)  # Name columns
     worksheet.set_column('D:D', 10)  # Tier column
 
-    print(f"Fetching sprites for {len(df)} Pokémon...")
-
-    for index, row in df.iterrows():
-        row_num = index + 1
+    labels = {"no_sprite": "No Sprite", "not_found": "Not Found", "not_cached": "Not Cached"}
+    for i, (row, (api_name, status, data)) in enumerate(zip(rows, results)):
+        row_num = i + 1
         worksheet.set_row(row_num, 60)  # Set height for image
 
         # Write Text Data
-        worksheet.write(row_num, 1, row['Name'], center_fmt)
-        worksheet.write(row_num, 2, row['Cleaned_Name'], center_fmt)
-        worksheet.write(row_num, 3, row['Tier'], center_fmt)
+        tier = row['Tier'].strip()
+        worksheet.write(row_num, 1, row['Name'].strip(), center_fmt)
+        worksheet.write(row_num, 2, api_name, center_fmt)
+        worksheet.write(row_num, 3, int(tier) if tier.isdigit() else tier, center_fmt)
 
-        # Fetch Image
-        api_name = row['Cleaned_Name']
-        try:
-            url = f"https://pokeapi.co/api/v2/pokemon/{api_name}"
-            response = requests.get(url, timeout=5)
-
-            if response.status_code == 200:
-                data = response.json()
-                img_url = data['sprites']['front_default']
-
-                if img_url:
-                    img_data = requests.get(img_url).content
-                    image_stream = io.BytesIO(img_data)
-
-                    worksheet.insert_image(row_num, 0, api_name, {
-                        'image_data': image_stream,
-                        'x_scale': 0.7, 'y_scale': 0.7,
-                        'object_position': 1
-                    })
-                    print(f"[{index + 1}] Success: {row['Name']}")
-                else:
-                    worksheet.write(row_num, 0, "No Sprite", center_fmt)
-            else:
-                # If 404, it might be a custom/fan-made Pokemon
-                worksheet.write(row_num, 0, "Not Found", center_fmt)
-                print(f"[{index + 1}] 404 Not Found: {api_name}")
+        if data is not None:
+            worksheet.insert_image(row_num, 0, f"{api_name}.png", {
+                'image_data': io.BytesIO(data),
+                'x_scale': 0.7, 'y_scale': 0.7,
+                'object_position': 1
+            })
+        else:
+            worksheet.write(row_num, 0, labels.get(status, "Error"), center_fmt)
+
+    workbook.close()
 
-        except Exception as e:
-            print(f"Error fetching {row['Name']}: {e}")
 
-    writer.close()
-    print(f"\nDone! Saved to {OUTPUT_FILE}")
+def main():
+    parser = argparse.ArgumentParser(description="Build the sprite sheet for the Pokémon pool")
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    parser.add_argument("--base-url", default=BASE_URL, help="PokeAPI root (point it at a local stand-in to test)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--offline", action="store_true", help="Only use the cache, no network")
+    parser.add_argument("--refresh-missing", action="store_true", help="Ask again for names cached as 404")
+    args = parser.parse_args()
+
+    print(f"Reading {args.input}...")
+    try:
+        rows = read_rows(args.input)
+    except FileNotFoundError:
+        print("Error: Input file not found!")
+        return
+
+    api_names = [get_api_name(row['Name']) for row in rows]
+    cache = SpriteCache(args.cache_dir)
+    results = [None] * len(rows)
+    counts = {}
+    hits = 0
+
+    print(f"Fetching sprites for {len(rows)} Pokémon ({args.workers} workers)...")
+    with make_session(args.workers) as session, ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(fetch_sprite, session, cache, args.base_url, api_name,
+                            args.offline, args.refresh_missing): i
+            for i, api_name in enumerate(api_names)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            status, data, from_cache = future.result()
+            results[i] = (api_names[i], status, data)
+            hits += from_cache
+            kind = status.split(":")[0]
+            counts[kind] = counts.get(kind, 0) + 1
+            if status != "ok" or not from_cache:
+                print(f"[{done}/{len(rows)}] {status}: {rows[i]['Name']} ({api_names[i]})")
+
+    write_workbook(args.output, rows, results)
+    summary = ", ".join(f"{k}: {v}" for k, v in sorted(counts.items()))
+    print(f"\nDone! Saved to {args.output} ({summary}; {hits} from cache)")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,273 @@
+import atexit
+import queue
+import sqlite3
+import threading
+import time
+
+import config
+
+# --- DRAFT HISTORY ---
+# Every roll / re-roll / pick and every final roster, kept across drafts in
+# HISTORY_FILE (SQLite). Draft events are queued as plain tuples from the
+# event loop and written in batches by one background thread, which also
+# keeps the aggregate tables up to date in the same transaction, so the
+# !history commands only read a handful of indexed rows.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS drafts (
+    draft       TEXT PRIMARY KEY,
+    league      INTEGER NOT NULL,
+    channel     INTEGER NOT NULL,
+    started_at  REAL NOT NULL,
+    finished_at REAL
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    id      INTEGER PRIMARY KEY,
+    draft   TEXT NOT NULL,
+    league  INTEGER NOT NULL,
+    coach   INTEGER NOT NULL,
+    kind    TEXT NOT NULL,
+    round   INTEGER NOT NULL,
+    pick    INTEGER NOT NULL,
+    pokemon TEXT,
+    tier    INTEGER,
+    ts      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_coach ON events (league, coach);
+CREATE INDEX IF NOT EXISTS events_by_pokemon ON events (league, pokemon);
+CREATE INDEX IF NOT EXISTS events_by_tier ON events (league, tier);
+
+CREATE TABLE IF NOT EXISTS rosters (
+    draft   TEXT NOT NULL,
+    league  INTEGER NOT NULL,
+    coach   INTEGER NOT NULL,
+    pick    INTEGER NOT NULL,
+    pokemon TEXT NOT NULL,
+    tier    INTEGER NOT NULL,
+    PRIMARY KEY (draft, coach, pick)
+);
+CREATE INDEX IF NOT EXISTS rosters_by_coach ON rosters (league, coach, draft);
+CREATE INDEX IF NOT EXISTS rosters_by_pokemon ON rosters (league, pokemon);
+
+-- Aggregates (kept current by the writer)
+CREATE TABLE IF NOT EXISTS pokemon_stats (
+    league  INTEGER NOT NULL,
+    pokemon TEXT NOT NULL,
+    tier    INTEGER NOT NULL,
+    rolls   INTEGER NOT NULL DEFAULT 0,
+    rerolls INTEGER NOT NULL DEFAULT 0,
+    picks   INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (league, pokemon)
+);
+CREATE INDEX IF NOT EXISTS pokemon_by_rerolls ON pokemon_stats (league, rerolls DESC);
+
+CREATE TABLE IF NOT EXISTS pick_stats (
+    league INTEGER NOT NULL,
+    pick   INTEGER NOT NULL,
+    picks  INTEGER NOT NULL DEFAULT 0,
+    points INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (league, pick)
+);
+
+CREATE TABLE IF NOT EXISTS coach_stats (
+    league  INTEGER NOT NULL,
+    coach   INTEGER NOT NULL,
+    name    TEXT NOT NULL,
+    drafts  INTEGER NOT NULL DEFAULT 0,
+    picks   INTEGER NOT NULL DEFAULT 0,
+    points  INTEGER NOT NULL DEFAULT 0,
+    rerolls INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (league, coach)
+);
+"""
+
+RECORDED = {"roll", "reroll", "keep", "timeout", "auto", "undo", "skip", "done"}
+PICK_KINDS = ("keep", "timeout", "auto")
+
+
+def connect(path):
+    db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+# --- WRITER THREAD ---
+
+class HistoryWriter:
+    """
+    put() only appends to a queue; a daemon thread drains it and writes up
+    to HISTORY_BATCH items per transaction, at most HISTORY_FLUSH_SECONDS
+    after the first one came in.
+    """
+    STOP = object()
+
+    def __init__(self, path, batch=config.HISTORY_BATCH, interval=config.HISTORY_FLUSH_SECONDS):
+        self.path = path
+        self.batch = batch
+        self.interval = interval
+        self.queue = queue.SimpleQueue()
+        self.thread = None
+        self.written = 0
+        self.batches = 0
+
+    def start(self):
+        connect(self.path).close()  # Schema in place before anyone reads
+        self.thread = threading.Thread(target=self._run, name="kokoloko-history", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def put(self, item):
+        self.queue.put(item)
+
+    def pending(self):
+        return self.queue.qsize()
+
+    def close(self):
+        """Writes whatever is still queued and stops the thread"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(self.STOP)
+            self.thread.join()
+
+    def _run(self):
+        db = connect(self.path)
+        stopping = False
+        while not stopping:
+            items = [self.queue.get()]
+            deadline = time.monotonic() + self.interval
+            while len(items) < self.batch and items[-1] is not self.STOP:
+                try:
+                    items.append(self.queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if items[-1] is self.STOP:
+                stopping = True
+                items.pop()
+
+            try:
+                with db:
+                    for item in items:
+                        write_item(db, item)
+            except sqlite3.Error as e:
+                print(f"❌ History: {len(items)} events not written: {e}")
+            else:
+                self.written += len(items)
+                self.batches += 1
+        db.close()
+
+
+def write_item(db, item):
+    """One queued event (see record) -> raw row + aggregate updates"""
+    kind, draft, league, channel, coach, rnd, pick, pokemon, tier, ts, extra = item
+    db.execute("INSERT OR IGNORE INTO drafts (draft, league, channel, started_at) VALUES (?, ?, ?, ?)",
+               (draft, league, channel, ts))
+    db.execute("INSERT INTO events (draft, league, coach, kind, round, pick, pokemon, tier, ts) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", (draft, league, coach, kind, rnd, pick, pokemon, tier, ts))
+
+    if kind in ("roll", "reroll", "undo") or kind in PICK_KINDS:
+        rolls = int(kind in ("roll", "auto"))
+        rerolls = int(kind == "reroll")
+        picks = 1 if kind in PICK_KINDS else (-1 if kind == "undo" else 0)
+        db.execute("INSERT INTO pokemon_stats (league, pokemon, tier, rolls, rerolls, picks) VALUES (?, ?, ?, ?, ?, ?) "
+                   "ON CONFLICT (league, pokemon) DO UPDATE SET rolls = rolls + excluded.rolls, "
+                   "rerolls = rerolls + excluded.rerolls, picks = picks + excluded.picks",
+                   (league, pokemon, tier, rolls, rerolls, picks))
+        if picks:
+            db.execute("INSERT INTO pick_stats (league, pick, picks, points) VALUES (?, ?, ?, ?) "
+                       "ON CONFLICT (league, pick) DO UPDATE SET picks = picks + excluded.picks, "
+                       "points = points + excluded.points", (league, pick, picks, picks * tier))
+        if rerolls:
+            db.execute("INSERT INTO coach_stats (league, coach, name, rerolls) VALUES (?, ?, ?, 1) "
+                       "ON CONFLICT (league, coach) DO UPDATE SET rerolls = rerolls + 1", (league, coach, extra))
+
+    elif kind == "done":
+        db.execute("UPDATE drafts SET finished_at = ? WHERE draft = ?", (ts, draft))
+        for user_id, name, roster in extra:
+            db.executemany("INSERT OR REPLACE INTO rosters (draft, league, coach, pick, pokemon, tier) "
+                           "VALUES (?, ?, ?, ?, ?, ?)",
+                           [(draft, league, user_id, i, p, t) for i, (p, t) in enumerate(roster, start=1)])
+            db.execute("INSERT INTO coach_stats (league, coach, name, drafts, picks, points) VALUES (?, ?, ?, 1, ?, ?) "
+                       "ON CONFLICT (league, coach) DO UPDATE SET name = excluded.name, drafts = drafts + 1, "
+                       "picks = picks + excluded.picks, points = points + excluded.points",
+                       (league, user_id, name, len(roster), sum(t for _, t in roster)))
+
+
+# --- RECORDING (event loop side) ---
+# Set up by kokoloko; while it is None nothing is recorded (bench, loadtest, demos)
+writer = None
+
+
+def record(session, kind, data):
+    """DraftSession._log hook: turns one draft event into a queued row (no I/O here)"""
+    if writer is None or kind not in RECORDED:
+        return
+    guild_id, channel_id = session.key
+    league = guild_id or 0
+    draft = f"{guild_id}:{channel_id}:{session.draft_id}"
+    now = time.time()
+
+    if kind == "done":
+        rosters = [(c.id, c.display_name, session.roster(c.id)) for c in session.coaches.values()]
+        writer.put((kind, draft, league, channel_id, 0, session.round, 0, None, None, now, rosters))
+        return
+
+    coach = session.coaches[data["user"]]
+    name = data.get("name")
+    tier = data.get("tier")
+    if tier is None and name is not None:
+        pid = session.pool.ids.get(name)
+        tier = session.pool.tiers[pid] if pid is not None else 0
+    # Pick being played (keep / timeout / auto are already on the roster)
+    pick = coach.picks if kind in PICK_KINDS else coach.picks + 1
+    writer.put((kind, draft, league, channel_id, coach.id, session.round, pick, name, tier, now,
+                coach.display_name))
+
+
+# --- QUERIES ---
+# Called from a worker thread (run_in_executor); one read connection per thread.
+_readers = threading.local()
+
+
+def _reader():
+    path = writer.path if writer is not None else config.HISTORY_FILE
+    db = getattr(_readers, "db", None)
+    if db is None or _readers.path != path:
+        db = _readers.db = connect(path)
+        _readers.path = path
+    return db
+
+
+def coach_summary(league, coach, recent=3):
+    """(stats dict or None, [(draft, finished_at, [(pokemon, tier)])] for the last `recent` drafts)"""
+    db = _reader()
+    row = db.execute("SELECT name, drafts, picks, points, rerolls FROM coach_stats WHERE league = ? AND coach = ?",
+                     (league, coach)).fetchone()
+    if row is None:
+        return None, []
+    stats = dict(zip(("name", "drafts", "picks", "points", "rerolls"), row))
+
+    drafts = db.execute("SELECT r.draft, d.finished_at FROM rosters r JOIN drafts d ON d.draft = r.draft "
+                        "WHERE r.league = ? AND r.coach = ? GROUP BY r.draft "
+                        "ORDER BY d.finished_at DESC LIMIT ?", (league, coach, recent)).fetchall()
+    recent_rosters = []
+    for draft, finished_at in drafts:
+        roster = db.execute("SELECT pokemon, tier FROM rosters WHERE draft = ? AND coach = ? ORDER BY pick",
+                            (draft, coach)).fetchall()
+        recent_rosters.append((draft, finished_at, roster))
+    return stats, recent_rosters
+
+
+def most_rerolled(league, limit=10):
+    """[(pokemon, tier, rerolls, rolls, picks)] by re-rolls (index walk, no event scan)"""
+    return _reader().execute("SELECT pokemon, tier, rerolls, rolls, picks FROM pokemon_stats "
+                             "WHERE league = ? AND rerolls > 0 ORDER BY rerolls DESC LIMIT ?",
+                             (league, limit)).fetchall()
+
+
+def avg_points_by_pick(league):
+    """[(pick, picks, average tier)]"""
+    rows = _reader().execute("SELECT pick, picks, points FROM pick_stats WHERE league = ? AND picks > 0 "
+                             "ORDER BY pick", (league,)).fetchall()
+    return [(pick, picks, points / picks) for pick, picks, points in rows]
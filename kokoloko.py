@@ -4,7 +4,17 @@ import time
 from discord.ext import commands
 
 import config
+import history
+import journal
+import leases
 import logic
+import metrics
+import odds
+import outbox
+import pool
+import profiler
+import scoreboard
+import sprites
 import views
 
 # --- BOT SETUP ---
@@ -14,17 +24,332 @@ intents.members = True
 
 bot = commands.Bot(command_prefix="!", intents=intents)
 
+# Both open JOURNAL_FILE in setup_hook, not at import (loadtest and the tests import this module)
+# Every draft change is journaled here so a restart can !resume_draft
+draft_journal = None
+
+# Several workers (processes / shards) can share JOURNAL_FILE: each draft is
+# played by the one holding its lease, and taken over if that one dies
+draft_leases = None
+WORKER = leases.worker_id()
+
+
+@bot.event
+async def setup_hook():
+    # Runs once before connecting (on_ready fires again on every reconnect)
+    global draft_journal, draft_leases, commands_lease, odds_build
+    draft_journal = journal.Journal(config.JOURNAL_FILE)
+    draft_leases = leases.LeaseStore(config.JOURNAL_FILE)
+
+    loop = asyncio.get_running_loop()
+    try:
+        logic.swap_pool(await loop.run_in_executor(None, logic.build_pool))
+    except (OSError, ValueError) as e:
+        # Same as the old loader: log it and keep running (!reload_pool once the CSV is fixed)
+        print(f"❌ Logic Error: pool not loaded: {e}")
+    else:
+        print(f"✅ Logic: Pool v{logic.pool_index.version} Loaded ({len(logic.pool_index)} rows).")
+
+    # Odds table: pure CPU work, built in the background so the login doesn't wait on it
+    odds_build = asyncio.create_task(build_odds_table())
+
+    # Sprites come from a local pack, so a roll never waits on HTTP
+    try:
+        sprites.store = await loop.run_in_executor(None, sprites.load_store)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Sprites: {e} (text-only embeds)")
+    else:
+        stats = sprites.store.stats()
+        print(f"✅ Sprites: {stats['assets']} assets ({stats['memory_bytes'] / 1024:.0f} KiB in memory).")
+
+    # Cross-draft history: queued from the draft, written in batches by its own thread
+    history.writer = history.HistoryWriter(config.HISTORY_FILE)
+    history.writer.start()
+
+    if config.POOL_WATCH_INTERVAL:
+        asyncio.create_task(watch_pool_file())
+
+    if config.METRICS_PORT:
+        try:
+            await metrics.serve()
+        except OSError as e:
+            print(f"⚠️ Metrics: can't listen on {config.METRICS_HOST}:{config.METRICS_PORT} ({e})")
+    asyncio.create_task(metrics.watch_loop_lag())
+
+    commands_lease = take_lease(COMMANDS_LEASE)
+    lease_holders.update(draft_leases.holders())
+    asyncio.create_task(keep_leases())
+
 
 @bot.event
 async def on_ready():
-    logic.load_data()
-    print(f'🤖 KOKOLOKO: {bot.user} is ready!')
+    print(f'🤖 KOKOLOKO: {bot.user} is ready! (worker {WORKER})')
+
+
+# --- DRAFT OWNERSHIP (leases.py) ---
+
+# Live leases as of the last renewal pass + our own changes since ({name: owner}),
+# so the command check never queries SQLite on the event loop
+lease_holders = {}
+
+# Commands outside a leased draft (!stats, !history, !start_draft...) are
+# answered by whichever worker holds this one, so they get a single reply
+COMMANDS_LEASE = "worker:commands"
+commands_lease = None
+
+
+@bot.check
+async def draft_owner_check(ctx):
+    """One worker answers: the one playing this channel's draft, else the commands lease holder"""
+    holder = lease_holders.get(leases.lease_name(logic.session_key(ctx.channel)))
+    if holder is None:
+        holder = lease_holders.get(COMMANDS_LEASE)
+    return holder is None or holder == WORKER
+
+
+def take_lease(name):
+    lease = draft_leases.acquire(name, WORKER)
+    if lease is not None:
+        lease_holders[name] = WORKER
+    return lease
+
+
+def drop_lease(lease):
+    draft_leases.release(lease)
+    if lease_holders.get(lease.name) == WORKER:
+        del lease_holders[lease.name]
+
+
+async def keep_leases():
+    """Renews the leases of our drafts and takes over drafts whose worker stopped renewing"""
+    while True:
+        await asyncio.sleep(config.LEASE_TTL / 3)
+        try:
+            await renew_leases()
+        except Exception as e:
+            # A failed pass must not end the task: our drafts would all be taken over after LEASE_TTL
+            print(f"❌ Leases: renewal pass failed: {type(e).__name__}: {e}")
+
+
+async def renew_leases():
+    global commands_lease, lease_holders
+    if commands_lease is None or not draft_leases.renew(commands_lease):
+        commands_lease = take_lease(COMMANDS_LEASE)
+
+    for key, session in list(logic.sessions.items()):
+        if session.lease is None or not session.active:
+            continue
+        if not draft_leases.renew(session.lease):
+            # We stalled past the TTL and someone else owns it now
+            print(f"⚠️ Leases: lost {key}; stopping our copy.")
+            session.active = False
+            session.skip_requested = True
+            if session.view is not None:
+                session.view.stop()
+
+    for name in draft_leases.orphaned():
+        try:
+            await take_over(name)
+        except Exception as e:
+            print(f"❌ Leases: can't take over {name}: {type(e).__name__}: {e}")
+
+    lease_holders = draft_leases.holders()
+
+
+async def take_over(name):
+    key = leases.parse_lease_name(name)
+    channel = bot.get_channel(key[1])
+    if channel is None:
+        return  # Not visible from this worker (another shard's guild)
+    lease = take_lease(name)
+    if lease is None:
+        return  # Another worker got there first
+
+    try:
+        restored = await rebuild_session(channel, lease)
+    except Exception:
+        drop_lease(lease)
+        raise
+    if restored is None or not restored[0].active:
+        drop_lease(lease)
+        return
+
+    session = restored[0]
+    print(f"♻️ Leases: took over {key} (fence {lease.fence}).")
+    # Queued, not awaited: a failed announcement can't leave the lease held with no draft running
+    out = outbox.for_channel(channel)
+    out.send(f"♻️ **Draft recovered** by another worker. Continuing Round {session.round}...")
+    session.scoreboard = scoreboard.Scoreboard(session, out)
+    session.scoreboard.publish()
+    asyncio.create_task(next_turn(session, channel))
+
+
+# --- POOL RELOAD ---
+
+# One rebuild at a time (the watcher and !reload_pool share the compiled file)
+pool_reload_lock = asyncio.Lock()
+
+
+async def reload_pool():
+    """Builds the next pool version off the event loop and swaps it in. Returns (new_index, error)."""
+    async with pool_reload_lock:
+        try:
+            new_index = await asyncio.get_running_loop().run_in_executor(None, logic.build_pool)
+        except (OSError, ValueError) as e:
+            return None, str(e)
+
+        if new_index.checksum == logic.pool_index.checksum:
+            return None, None
+        return logic.swap_pool(new_index), None
+
+
+async def watch_pool_file():
+    """Reloads the pool when the CSV changes on disk"""
+    while True:
+        await asyncio.sleep(config.POOL_WATCH_INTERVAL)
+        try:
+            stale = await asyncio.get_running_loop().run_in_executor(
+                None, pool.is_stale, config.CSV_FILE, config.POOL_FILE)
+        except OSError as e:
+            # Keep watching: the next check may find the files readable again
+            print(f"⚠️ Pool watcher: {e}")
+            continue
+        if not stale:
+            continue
+
+        new_index, error = await reload_pool()
+        if error:
+            print(f"❌ Pool watcher: {error}")
+        elif new_index:
+            print(f"🔄 Pool watcher: v{new_index.version} loaded ({len(new_index)} rows).")
+
+
+@bot.command(name="reload_pool")
+@commands.has_role(config.STAFF_ROLE_NAME)
+async def reload_pool_command(ctx):
+    new_index, error = await reload_pool()
+    if error:
+        await ctx.send(f"❌ Pool not reloaded:\n```{error[:1800]}```")
+    elif new_index is None:
+        await ctx.send(f"✅ Pool unchanged (v{logic.pool_index.version}).")
+    else:
+        running = sum(1 for s in logic.sessions.values() if s.active)
+        await ctx.send(f"🔄 **Pool v{new_index.version}** loaded ({len(new_index)} rows). "
+                       f"{running} running draft(s) stay on their current version.")
+
+
+@bot.event
+async def on_command_error(ctx, error):
+    if isinstance(error, commands.MissingRole):
+        await ctx.send("🚫 Solo Staff.")
+    elif isinstance(error, commands.CheckFailure):
+        pass  # draft_owner_check: the owning worker answers instead
+    else:
+        raise error
 
 
 @bot.command()
 async def summary(ctx):
-    embed = views.create_summary_embed(logic.draft_state)
-    await ctx.send(embed=embed)
+    session = logic.get_session(ctx.channel)
+    board = session.scoreboard if session else None
+
+    if board is not None:
+        if not board.should_point():
+            # Pointed at it moments ago: just show the command was seen
+            try:
+                await ctx.message.add_reaction("📊")
+            except discord.HTTPException:
+                pass
+            return
+        # The live summary is always up to date: point at it instead of re-posting
+        url = await board.jump_url()
+        if url is not None:
+            await ctx.send(f"📊 Resumen en vivo (se actualiza solo): {url}")
+            return
+
+    # No live summary (or its first page never went out): post it
+    for embeds in views.create_summary_embeds(session):
+        await ctx.send(embeds=embeds)
+
+
+# --- ODDS (odds.py) ---
+
+# Background build started by setup_hook; !odds waits on it instead of solving twice
+odds_build = None
+
+
+async def build_odds_table():
+    try:
+        table = await asyncio.get_running_loop().run_in_executor(None, odds.ensure_table)
+    except Exception as e:
+        # !odds retries the build on demand
+        print(f"⚠️ Odds: table not built ({e})")
+        return None
+    print(f"✅ Odds: {len(table)} states solved.")
+    return table
+
+
+@bot.command(name="odds")
+async def odds_command(ctx, member: discord.Member = None, pick: int = None):
+    """!odds [@coach] [pick] -> estimated odds for that coach's future picks"""
+    session = logic.get_session(ctx.channel)
+    member = member or ctx.author
+    if not session or member.id not in session.coaches:
+        await ctx.send("❌ That coach isn't in this channel's draft.")
+        return
+
+    table = odds.get_table()
+    if table is None and odds_build is not None:
+        table = await asyncio.shield(odds_build)
+    if table is None:
+        table = await asyncio.get_running_loop().run_in_executor(None, odds.ensure_table)
+
+    if session.coaches[member.id].picks >= config.TOTAL_POKEMON:
+        await ctx.send(f"✅ {member.display_name} already has a full roster.")
+        return
+    state = odds.lookup_for(session, member.id, table)
+    if state is None:
+        # Only an empty-tier fallback (cash reserve spent) gets a roster off the solved states
+        await ctx.send(f"⚠️ No odds for {member.display_name}: their roster is outside "
+                       f"the states the odds table covers (empty-tier fallback).")
+        return
+
+    current_pick = state.key[0]
+    pick = pick or current_pick
+    if not current_pick <= pick <= config.TOTAL_POKEMON:
+        await ctx.send(f"❌ Pick must be between {current_pick} and {config.TOTAL_POKEMON}.")
+        return
+
+    await ctx.send(embed=views.create_odds_embed(member, state, pick))
+
+
+# --- HISTORY (history.py) ---
+# Answered from the aggregate tables, on a worker thread
+
+def league_of(ctx):
+    return ctx.guild.id if ctx.guild else 0
+
+
+@bot.command(name="history")
+async def history_command(ctx, member: discord.Member = None):
+    """!history [@coach] -> drafts, average points, re-rolls and latest rosters"""
+    member = member or ctx.author
+    stats, recent = await asyncio.get_running_loop().run_in_executor(
+        None, history.coach_summary, league_of(ctx), member.id)
+    await ctx.send(embed=views.create_history_embed(member, stats, recent))
+
+
+@bot.command()
+async def most_rerolled(ctx, limit: int = 10):
+    rows = await asyncio.get_running_loop().run_in_executor(
+        None, history.most_rerolled, league_of(ctx), max(1, min(limit, 25)))
+    await ctx.send(embed=views.create_most_rerolled_embed(rows))
+
+
+@bot.command()
+async def avg_points(ctx):
+    rows = await asyncio.get_running_loop().run_in_executor(None, history.avg_points_by_pick, league_of(ctx))
+    await ctx.send(embed=views.create_avg_points_embed(rows))
 
 
 @bot.command()
@@ -34,160 +359,561 @@ async def start_draft(ctx, *members: discord.Member):
         return
 
     players = list(members)
-    logic.initialize_draft(players)
+    lease = take_lease(leases.lease_name(logic.session_key(ctx.channel)))
+    if lease is None:
+        return  # Another worker took this channel first
+    session = logic.initialize_draft(ctx.channel, players, journal=draft_journal, lease=lease)
+    if session is None:
+        await ctx.send("❌ There is already a draft running in this channel.")
+        return
 
     names = ", ".join([p.display_name for p in players])
     await ctx.send(f"🏆 **Draft Started!** (Cap: {config.MAX_POINTS} pts)\n**Round 1**\nOrder: {names}")
 
-    await next_turn(ctx.channel)
+    session.scoreboard = scoreboard.Scoreboard(session, outbox.for_channel(ctx.channel))
+    session.scoreboard.publish()
+
+    await next_turn(session, ctx.channel)
+
+
+# --- STAFF CONTROLS ---
+
+@bot.command()
+@commands.has_role(config.STAFF_ROLE_NAME)
+async def pause_draft(ctx):
+    session = logic.get_session(ctx.channel)
+    if not session or not session.active:
+        await ctx.send("❌ No draft running in this channel.")
+        return
+    session.unpaused.clear()
+    await ctx.send("⏸️ **Draft paused** after the current turn. Use `!unpause_draft` to continue.")
+
+
+@bot.command()
+@commands.has_role(config.STAFF_ROLE_NAME)
+async def unpause_draft(ctx):
+    session = logic.get_session(ctx.channel)
+    if not session or not session.active:
+        await ctx.send("❌ No draft running in this channel.")
+        return
+    session.unpaused.set()
+    await ctx.send("▶️ **Draft resumed!**")
+
 
+@bot.command()
+@commands.has_role(config.STAFF_ROLE_NAME)
+async def fast_mode(ctx, state: str = None):
+    """!fast_mode [on|off]: no pauses between turns (toggles without argument)"""
+    session = logic.get_session(ctx.channel)
+    if not session or not session.active:
+        await ctx.send("❌ No draft running in this channel.")
+        return
+    on = not session.fast_mode if state is None else state.lower() in ("on", "true", "yes", "1")
+    session.set_fast_mode(on)
+    pacing = ", ".join(f"{step} {delay:g}s" for step, delay in session.pacing.items())
+    await ctx.send(f"{'⚡ **Fast mode ON**' if on else '🐢 **Fast mode OFF**'} (pauses: {pacing})")
 
-async def next_turn(channel):
-    state = logic.draft_state
 
-    # 1. Round Logic
-    if state["current_index"] >= len(state["order"]):
-        if state["round"] >= config.TOTAL_POKEMON:
-            await channel.send("🏁 **Draft Complete!**")
-            await channel.send(embed=views.create_summary_embed(state))
-            state["active"] = False
+@bot.command()
+@commands.has_role(config.STAFF_ROLE_NAME)
+async def skip_turn(ctx):
+    session = logic.get_session(ctx.channel)
+    if not session or not session.active or session.view is None:
+        await ctx.send("❌ No turn is waiting on a coach right now.")
+        return
+    session.skip_requested = True
+    session.view.stop()
+
+
+@bot.command()
+@commands.has_role(config.STAFF_ROLE_NAME)
+async def undo_pick(ctx):
+    session = logic.get_session(ctx.channel)
+    if not session:
+        await ctx.send("❌ No draft in this channel.")
+        return
+    if session.running and session.phase != logic.PAUSED:
+        await ctx.send("⏸️ Pause the draft first (`!pause_draft`).")
+        return
+
+    undone = session.undo_last_pick()
+    if undone is None:
+        await ctx.send("❌ Nothing to undo.")
+        return
+
+    user_id, name, tier = undone
+    if session.scoreboard:
+        session.scoreboard.update(user_id)
+    await ctx.send(f"↩️ **Undo:** <@{user_id}> loses **{name}** ({tier}) and gets the turn back.")
+    if not session.running:
+        await ctx.send("Use `!resume_draft` to continue.")
+
+
+@bot.command()
+@commands.has_role(config.STAFF_ROLE_NAME)
+async def resume_draft(ctx):
+    """Continues this channel's draft; rebuilds it from the journal after a restart"""
+    session = logic.get_session(ctx.channel)
+    lease = take_lease(leases.lease_name(logic.session_key(ctx.channel)))
+    if lease is None:
+        return  # Another worker is playing this draft
+    if session is not None and (session.lease is None or session.lease.fence != lease.fence):
+        session = None  # Another worker wrote to the journal since: our copy is stale
+
+    if session is None:
+        restored = await rebuild_session(ctx.channel, lease)
+        if restored is None:
+            drop_lease(lease)
+            await ctx.send("❌ No journaled draft for this channel.")
             return
+        session, replayed, elapsed_ms, pool_changed = restored
+        await ctx.send(f"♻️ Draft rebuilt from journal ({replayed} events replayed in {elapsed_ms:.1f} ms).")
+        if pool_changed:
+            await ctx.send("⚠️ The Pokémon pool changed since this draft started; resuming on the current pool.")
+
+    if not session.active:
+        drop_lease(lease)
+        await ctx.send("🏁 That draft is already complete.")
+        return
+    if session.running:
+        await ctx.send("❌ The draft is already running (use `!unpause_draft` if it is paused).")
+        return
 
-        state["round"] += 1
-        state["order"].reverse()
-        state["current_index"] = 0
-        await channel.send(f"🔁 **End of Round!** Snake order for Round {state['round']}...")
-        await asyncio.sleep(2)
+    session.unpaused.set()
+    await ctx.send(f"▶️ **Resuming** Round {session.round}...")
+    if session.scoreboard is None:
+        session.scoreboard = scoreboard.Scoreboard(session, outbox.for_channel(ctx.channel))
+        session.scoreboard.publish()
+    await next_turn(session, ctx.channel)
+
+
+async def rebuild_session(channel, lease):
+    """
+    Latest journaled draft of a channel -> live session (owned through `lease`).
+    Returns (session, events replayed, ms, pool changed) or None if there is nothing to rebuild.
+    """
+    key = logic.session_key(channel)
+    draft_id = draft_journal.latest_draft(key)
+    snapshot, events = draft_journal.load(draft_id) if draft_id else (None, [])
+    if snapshot is None:
+        return None
+
+    # Coaches are ids + display names; only look members up for older snapshots without names
+    names = snapshot.get("names", {})
+    players = []
+    for user_id in snapshot["order"]:
+        name = names.get(str(user_id))
+        if name is None:
+            member = channel.guild.get_member(user_id) or await channel.guild.fetch_member(user_id)
+            name = member.display_name
+        players.append(logic.CoachRecord(user_id, name))
+
+    started = time.perf_counter()
+    session = logic.restore_draft(key, players, snapshot, events, journal=draft_journal,
+                                  draft_id=draft_id, lease=lease)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return session, len(events), elapsed_ms, snapshot.get("pool") != session.pool.checksum
 
-    player = state["order"][state["current_index"]]
-    pick_num = len(state["rosters"][player.id]) + 1
 
-    if pick_num > config.TOTAL_POKEMON:
-        state["current_index"] += 1
-        await next_turn(channel)
+@bot.command()
+@commands.has_role(config.STAFF_ROLE_NAME)
+async def cache_stats(ctx):
+    lines = []
+    for name, info in {**logic.cache_stats(), **views.cache_stats()}.items():
+        total = info.hits + info.misses
+        rate = (info.hits / total * 100) if total else 0.0
+        lines.append(f"**{name}:** {info.hits} hits / {info.misses} misses ({rate:.1f}%) • {info.currsize}/{info.maxsize}")
+
+    spec = logic.speculation_stats
+    lines.append(f"**speculative rolls:** {spec['hit']} hits / {spec['redraw']} name re-draws / "
+                 f"{spec['stale']} stale")
+
+    stats = sprites.store.stats()
+    lines.append(f"**sprites:** {stats['hits']} hits / {stats['misses']} misses ({stats['hit_rate'] * 100:.1f}%) • "
+                 f"{stats['assets']} assets, {stats['memory_bytes'] / 1024:.0f} KiB"
+                 f"{' (mmap)' if stats['mapped'] else ''}")
+    await ctx.send("\n".join(lines))
+
+
+@bot.command()
+@commands.has_role(config.STAFF_ROLE_NAME)
+async def io_stats(ctx):
+    session = logic.get_session(ctx.channel)
+    box = outbox.outboxes.get(ctx.channel.id)
+    if box is None and session is not None and session.scoreboard is not None:
+        box = session.scoreboard.out  # Finished draft: its outbox was dropped from the registry
+    if box is None:
+        await ctx.send("❌ No draft traffic in this channel yet.")
         return
 
-    state["burned"] = []
+    picks = len(session.history) if session else 0
+    per_pick = f"{box.api_calls / picks:.2f}" if picks else "-"
+    await ctx.send(
+        f"📨 **API calls:** {box.api_calls} ({per_pick} per pick) • "
+        f"**Button responses:** {box.interaction_calls} • **Merged edits:** {box.coalesced}\n"
+        f"🚦 **429s:** {box.rate_limited} • **Queued:** {len(box.ops)}"
+    )
+
+
+@bot.command()
+@commands.has_role(config.STAFF_ROLE_NAME)
+async def stats(ctx):
+    await ctx.send("\n".join(metrics.summary_lines()))
+
+
+@bot.command()
+@commands.has_role(config.STAFF_ROLE_NAME)
+async def profile(ctx, action: str = "status", seconds: int = config.PROFILE_MAX_SECONDS, mode: str = "full"):
+    """!profile start [seconds] [cpu] | stop | status"""
+    prof = profiler.profiler
+
+    if action == "start":
+        if prof.running:
+            await ctx.send("⚠️ Profiler already running. Use `!profile stop`.")
+            return
+        seconds = max(1, min(seconds, config.PROFILE_MAX_SECONDS))
+        prof.start(seconds, trace_allocations=(mode != "cpu"))
+        await ctx.send(f"🔬 **Profiling** for up to {seconds}s"
+                       f"{' (CPU only)' if mode == 'cpu' else ' (CPU + allocations)'}...")
+        asyncio.create_task(stop_profile_later(ctx, prof.started_at, seconds))
+    elif action == "stop":
+        if prof.thread is None:
+            await ctx.send("❌ Profiler is not running.")
+            return
+        await finish_profile(ctx)
+    else:
+        state = f"running ({prof.samples} samples)" if prof.running else "off"
+        await ctx.send(f"🔬 Profiler: {state}")
+
+
+async def finish_profile(ctx):
+    prof = profiler.profiler
+    # Joining the sampler and snapshotting the heap can take a moment: keep it off the loop
+    paths = await asyncio.get_running_loop().run_in_executor(None, prof.stop)
+    top = "\n".join(f"`{pct:5.1f}%` {name}" for name, pct in prof.top_functions())
+    await ctx.send(f"🔬 **Profile saved** ({prof.samples} samples): " + ", ".join(f"`{p}`" for p in paths)
+                   + (f"\n**Top (self time):**\n{top}" if top else ""))
 
-    rerolls_used = state["rerolls"].get(player.id, 0)
+
+async def stop_profile_later(ctx, started_at, seconds):
+    await asyncio.sleep(seconds)
+    prof = profiler.profiler
+    # Still the same session (not stopped / restarted by hand meanwhile)
+    if prof.thread is not None and prof.started_at == started_at:
+        await finish_profile(ctx)
+
+
+# --- TURN SCHEDULER ---
+
+async def next_turn(session, channel):
+    """
+    Turn scheduler. Drives the draft through its states in a flat loop
+    (ROUND_END -> PRE_ROLL -> DECIDING -> COMMITTED -> ...) until it ends,
+    so a long draft never builds up a chain of nested awaits.
+    """
+    if session.running:
+        return
+    session.running = True
+    out = outbox.for_channel(channel)
+
+    try:
+        while session.active:
+            # Staff pause takes effect between turns
+            if not session.unpaused.is_set():
+                session.phase = logic.PAUSED
+                await session.unpaused.wait()
+                continue
+
+            # 1. Round Logic
+            if session.current_index >= len(session.order):
+                session.phase = logic.ROUND_END
+                if session.round >= config.TOTAL_POKEMON:
+                    session.finish()
+                    if session.lease is not None:
+                        drop_lease(session.lease)
+                    url = await session.scoreboard.jump_url() if session.scoreboard else None
+                    if url is not None:
+                        out.send(f"🏁 **Draft Complete!** Resultados finales: {url}")
+                    else:
+                        out.send("🏁 **Draft Complete!**")
+                        for embeds in views.create_summary_embeds(session):
+                            out.send(embeds=embeds)
+                    session.phase = logic.DONE
+                    break
+
+                session.next_round()
+                out.send(f"🔁 **End of Round!** Snake order for Round {session.round}...")
+                await pause(session, "round")
+                continue
+
+            player = session.coach_at(session.current_index)
+            pick_num = player.picks + 1
+
+            if pick_num > config.TOTAL_POKEMON:
+                session.advance()
+                continue
+
+            # Coaches with no re-rolls left can't decide anything: play the whole run at once
+            run = forced_run(session)
+            if run >= 2:
+                session.phase = logic.PRE_ROLL
+                play_forced_run(session, channel, run)
+                session.phase = logic.COMMITTED
+                await pause(session, "turn")
+                continue
+
+            session.phase = logic.PRE_ROLL
+            session.skip_requested = False
+            picks_before = len(session.history)
+            await play_turn(session, channel, player, pick_num)
+            if len(session.history) > picks_before:
+                metrics.REROLLS_PER_PICK.observe(session.history[-1][5])
+            if session.scoreboard:
+                session.scoreboard.update(player.id)
+
+            session.phase = logic.COMMITTED
+            if session.fast_mode:
+                # No decision wait to hide it in (auto-picks): get the next roll ready while the pick goes out
+                prepare_next_turn(session)
+            session.advance()
+            await pause(session, "turn")
+        # Draft over (or stopped): last messages out, then the channel's outbox goes
+        await outbox.discard(out)
+    finally:
+        session.running = False
+        session.view = None
+
+
+async def pause(session, step):
+    """The draft's pacing pause after a "turn", "round" or "reroll" (none at 0)"""
+    delay = session.pacing.get(step, 0)
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+
+def roll_for(session, user_id, pick_num):
+    """Valid tiers + roll for one coach, timed for the metrics"""
+    started = time.perf_counter()
+    result = logic.take_roll(session, user_id, pick_num)
+    metrics.ROLL_SECONDS.observe(time.perf_counter() - started)
+    return result
+
+
+def prepare_next_turn(session):
+    """Idle time: draw the next coach's first roll and render their odds grid ahead of time"""
+    upcoming = logic.peek_next_player(session)
+    if upcoming is None or upcoming.id in session.speculative:
+        return
+    pick_num = upcoming.picks + 1
+    if pick_num > config.TOTAL_POKEMON:
+        return
+    logic.speculate_roll(session, upcoming.id, pick_num)
+    views.render_odds_grid(*logic.roll_odds(session, logic.get_valid_tiers(session, upcoming.id, pick_num)))
+
+
+def forced_run(session):
+    """How many picks in a row, from the current turn to the end of the round, are forced (no re-rolls left)"""
+    picks = 0
+    for user_id in session.order[session.current_index:]:
+        player = session.coaches[user_id]
+        if player.picks >= config.TOTAL_POKEMON:
+            continue  # Roster full: the turn is skipped anyway
+        if player.rerolls < config.MAX_REROLLS:
+            break
+        picks += 1
+    return picks
+
+
+def play_forced_run(session, channel, picks):
+    """
+    Plays `picks` forced turns in one pass: the same odds, snake order and
+    journal events as one turn at a time, but the tiers are drawn in one
+    batch (logic.draw_forced_run) and the run gets a single digest message.
+    """
+    out = outbox.for_channel(channel)
+    players = []
+    for user_id in session.order[session.current_index:]:
+        if len(players) == picks:
+            break
+        coach = session.coaches[user_id]
+        if coach.picks < config.TOTAL_POKEMON:
+            players.append((user_id, coach.picks + 1))
+    draws = logic.draw_forced_run(session, players)
+
+    results = []
+    while len(results) < picks and session.active:
+        player = session.coach_at(session.current_index)
+        pick_num = player.picks + 1
+        if pick_num <= config.TOTAL_POKEMON:
+            session.clear_burned()
+            started = time.perf_counter()
+            name, tier = logic.take_forced(session, player.id, pick_num, draws.get(player.id))
+            metrics.ROLL_SECONDS.observe(time.perf_counter() - started)
+            if name:
+                session.commit_pick(player.id, name, tier, how="auto")
+                metrics.PICKS.labels("auto").inc()
+                metrics.REROLLS_PER_PICK.observe(0)
+                if session.scoreboard:
+                    session.scoreboard.update(player.id)
+            results.append((player, pick_num, name, tier))
+        session.advance()
+
+    for embed in views.create_auto_digest_embeds(session.round, results, session):
+        out.send(embed=embed)
+
+
+async def wait_for_coach(session, view, kind):
+    """Waits on the turn's View (staff can stop it with !skip_turn) and records how long it took"""
+    session.view = view
+    started = time.perf_counter()
+    timed_out = await view.wait()
+    metrics.COACH_WAIT_SECONDS.labels(kind).observe(time.perf_counter() - started)
+    if timed_out:
+        metrics.COACH_TIMEOUTS.labels(kind).inc()
+    session.view = None
+
+
+async def play_turn(session, channel, player, pick_num):
+    """
+    One coach's pick: roll, decide, commit (or skipped by staff).
+    The whole turn lives in one message that is edited as it goes.
+    """
+    session.clear_burned()
+    out = outbox.for_channel(channel)
+
+    rerolls_used = player.rerolls
     rerolls_left = config.MAX_REROLLS - rerolls_used
     can_reroll = rerolls_left > 0
 
     # --- CAMINO A: SIN REROLLS ---
     if not can_reroll:
-        valid_tiers = logic.get_valid_tiers(player.id, pick_num)
-        name, tier = logic.roll_pokemon(valid_tiers)
+        name, tier = roll_for(session, player.id, pick_num)
 
         if not name:
-            await channel.send(f"⚠️ **CRITICAL:** No valid pokemon (Auto-Mode).")
+            out.send(f"⚠️ **CRITICAL:** No valid pokemon (Auto-Mode).")
         else:
-            state["rosters"][player.id].append({'name': name, 'tier': tier})
-            state["points"][player.id] += tier
-
-            embed = discord.Embed(title=f"Pick #{pick_num} • {player.display_name}", color=0x95a5a6)
-            embed.add_field(name="🔒 Auto-Aceptado (0 Rerolls)", value=f"**{name}** (Tier {tier})")
-            embed.set_footer(text=f"Budget Left: {config.MAX_POINTS - state['points'][player.id]}")
-            await channel.send(f"{player.mention}", embed=embed)
+            session.commit_pick(player.id, name, tier, how="auto")
+            metrics.PICKS.labels("auto").inc()
+            embed = views.create_result_embed(player, pick_num, name, tier, "🔒 Auto-Aceptado (0 Rerolls)",
+                                              config.MAX_POINTS - player.points)
+            sprite = views.sprite_for(embed, name)
+            out.send(f"{player.mention}", embed=embed, files=[sprite] if sprite else [])
+        return
 
     # --- CAMINO B: CON REROLLS ---
-    else:
-        # STEP 1: PRE-ROLL
-        expiry_roll = int(time.time()) + config.ROLL_TIMEOUT
-        odds_data = logic.calculate_tier_percentages(player.id, pick_num)
+    # STEP 1: PRE-ROLL
+    expiry_roll = int(time.time()) + config.ROLL_TIMEOUT
+    valid_tiers = logic.get_valid_tiers(session, player.id, pick_num)
+
+    # Texto de la Grid (cacheado por tupla de tiers): sin las tiers que ya se agotaron
+    odds_grid_str = views.render_odds_grid(*logic.roll_odds(session, valid_tiers))
+
+    # Pasamos el string a la función de creación del embed
+    embed_start = views.create_roll_embed(player, pick_num, expiry_roll, odds_grid_str)
+
+    roll_view = views.RollView(player)
+    turn_msg = out.send(f"{player.mention}", embed=embed_start, view=roll_view)
+    # The roll is drawn while the message goes out; the click only has to look it up
+    logic.speculate_roll(session, player.id, pick_num)
+    await turn_msg.sent  # The button has to be live before we wait on it
+
+    await wait_for_coach(session, roll_view, "roll")
+    if session.skip_requested:
+        session.log_skip(player.id)
+        embed_start.description = "⏭️ **Turno saltado por Staff.**"
+        out.edit(turn_msg, embed=embed_start, view=None)
+        return
 
-        # Generamos el texto de la Grid y lo guardamos en una variable
-        odds_grid_str = views.format_odds_grid(odds_data)
+    # The click (if any) is answered with the first roll itself
+    interaction = roll_view.interaction
+    status = "" if roll_view.clicked else "⏰ **Tiempo Agotado** - Rolling automático..."
 
-        # Pasamos el string a la función de creación del embed
-        embed_start = views.create_roll_embed(player, pick_num, expiry_roll, odds_grid_str)
+    # STEP 2: DECISION LOOP
+    while True:
+        current_rerolls = player.rerolls
+        current_left = config.MAX_REROLLS - current_rerolls
+        pts_left = config.MAX_POINTS - player.points
 
-        roll_view = views.RollView(player)
-        start_msg = await channel.send(f"{player.mention}", embed=embed_start, view=roll_view)
+        name, tier = roll_for(session, player.id, pick_num)
 
-        await roll_view.wait()
+        if not name:
+            embed_start.description = f"{status}\n⚠️ **CRITICAL:** No valid pokemon."
+            out.edit(turn_msg, interaction=interaction, embed=embed_start, view=None, attachments=[])
+            break
+
+        if current_left <= 0:
+            # Rolled and picked in one: the "auto" event already counts this roll
+            session.commit_pick(player.id, name, tier, how="auto")
+            metrics.PICKS.labels("auto").inc()
+            embed = views.create_result_embed(player, pick_num, name, tier, "Auto-Accepted",
+                                              config.MAX_POINTS - player.points, status)
+            sprite = views.sprite_for(embed, name)
+            out.edit(turn_msg, interaction=interaction, embed=embed, view=None,
+                     attachments=[sprite] if sprite else [])
+            break
+
+        session.log_roll(player.id, name, tier)
+
+        # --- ACTUALIZACIÓN: Timer en el Embed de Decisión ---
+        expiry_decision = int(time.time()) + config.DECISION_TIMEOUT
+        embed = views.create_decision_embed(player, pick_num, session.round, name, tier,
+                                            pts_left, current_left, expiry_decision, status)
+        # Replaces the previous roll's sprite (or clears it if this one has none)
+        sprite = views.sprite_for(embed, name)
+
+        view = views.DraftView(player)
+        shown = out.edit(turn_msg, interaction=interaction, embed=embed, view=view,
+                         attachments=[sprite] if sprite else [])
+
+        session.phase = logic.DECIDING
+        # While the edit goes out and the coach thinks: next coach's turn, then this coach's possible re-roll
+        prepare_next_turn(session)
+        logic.speculate_roll(session, player.id, pick_num)
+        await shown
+        await wait_for_coach(session, view, "decision")
+        interaction = view.interaction
+
+        if session.skip_requested:
+            session.log_skip(player.id)
+            embed.description = f"⏭️ **Turno saltado por Staff.** ({name} vuelve al pool)"
+            out.edit(turn_msg, embed=embed, view=None)
+            return
 
-        if not roll_view.clicked:
-            embed_start.description = "⏰ **Tiempo Agotado** - Rolling automático..."
-            embed_start.color = 0xe74c3c
-            await start_msg.edit(embed=embed_start, view=None)
-            await asyncio.sleep(1)
-        else:
-            # ACTUALIZACIÓN: Mantenemos la Grid visible mientras gira
-            embed_start.description = f"**Rolling...** 🎰\n\n**Probabilidades:**\n{odds_grid_str}"
-            embed_start.color = 0xf1c40f
-            await start_msg.edit(embed=embed_start, view=None)
-
-        # STEP 2: DECISION LOOP
-        while True:
-            current_rerolls = state["rerolls"].get(player.id, 0)
-            current_left = config.MAX_REROLLS - current_rerolls
-            pts_left = config.MAX_POINTS - state["points"].get(player.id, 0)
-
-            valid_tiers = logic.get_valid_tiers(player.id, pick_num)
-            name, tier = logic.roll_pokemon(valid_tiers)
-
-            if not name:
-                await channel.send(f"⚠️ **CRITICAL:** No valid pokemon.")
-                break
-
-            if current_left <= 0:
-                state["rosters"][player.id].append({'name': name, 'tier': tier})
-                state["points"][player.id] += tier
-
-                embed = discord.Embed(title=f"Pick #{pick_num} • {player.display_name}", color=0x95a5a6)
-                embed.add_field(name="Auto-Accepted", value=f"**{name}** (Tier {tier})")
-                embed.set_footer(text="0 Re-rolls left.")
-                await channel.send(f"{player.mention}", embed=embed)
-                break
-
-            # --- ACTUALIZACIÓN: Timer en el Embed de Decisión ---
-            expiry_decision = int(time.time()) + config.DECISION_TIMEOUT
-
-            embed = discord.Embed(
-                title=f"Pick #{pick_num} • {player.display_name}",
-                description=f"⏳ **Decide en** <t:{expiry_decision}:R>\n(Ronda {state['round']})",
-                # <--- AQUI ESTÁ EL TIMER
-                color=0xF1C40F
-            )
-            embed.add_field(name="Rolled", value=f"**{name}**", inline=True)
-            embed.add_field(name="Tier", value=f"{tier}", inline=True)
-            embed.add_field(name="Budget", value=f"{pts_left} pts left", inline=False)
-            embed.set_footer(text=f"Re-rolls left: {current_left}/{config.MAX_REROLLS}")
-
-            view = views.DraftView(player)
-            await channel.send(f"{player.mention}", embed=embed, view=view)
-
-            await view.wait()
-
-            # LÓGICA DE DECISIÓN CORREGIDA
-            if view.value == "REROLL":
-                state["rerolls"][player.id] += 1
-                new_left = config.MAX_REROLLS - state["rerolls"][player.id]
-                clicker = view.clicked_by.display_name if view.clicked_by else "Staff"
+        # LÓGICA DE DECISIÓN CORREGIDA
+        if view.value == "REROLL":
+            session.reroll(player.id, name)
+            new_left = config.MAX_REROLLS - player.rerolls
+            clicker = view.clicked_by.display_name if view.clicked_by else "Staff"
 
-                await channel.send(f"🔄 **{clicker}** re-rolled! ({new_left} left). Rolling again...")
-                state["burned"].append(name)
-                await asyncio.sleep(1)
-                continue
+            # Answer the click right away; the next roll replaces it
+            status = f"🔄 **{clicker}** re-rolled **{name}**! ({new_left} left)"
+            embed.description = f"{status} Rolling again..."
+            out.edit(turn_msg, interaction=interaction, embed=embed, view=None)
+            interaction = None
 
-                # Si es KEEP, TIMEOUT o None (por si acaso), lo aceptamos
+            session.phase = logic.PRE_ROLL
+            # With no pause this edit is merged into the next roll's (one response per click)
+            await pause(session, "reroll")
+            continue
+
+            # Si es KEEP, TIMEOUT o None (por si acaso), lo aceptamos
+        else:
+            how = "keep" if view.value == "KEEP" else "timeout"
+            session.commit_pick(player.id, name, tier, how=how)
+            metrics.PICKS.labels(how).inc()
+
+            # Determinar mensaje
+            if view.value == "KEEP":
+                clicker = view.clicked_by.display_name if view.clicked_by else "Staff"
+                msg_txt = f"✅ {clicker} accepted"
             else:
-                state["rosters"][player.id].append({'name': name, 'tier': tier})
-                state["points"][player.id] += tier
-
-                # Determinar mensaje
-                if view.value == "KEEP":
-                    clicker = view.clicked_by.display_name if view.clicked_by else "Staff"
-                    msg_txt = f"✅ **{clicker}** accepted"
-                else:
-                    msg_txt = "⏰ **Timeout:** Auto-accepted"
-
-                await channel.send(f"{msg_txt} **{name}**.")
-                break
-
-    state["current_index"] += 1
-    await asyncio.sleep(1)
-    await next_turn(channel)
+                msg_txt = "⏰ Timeout: Auto-accepted"
+
+            embed = views.create_result_embed(player, pick_num, name, tier, msg_txt,
+                                              config.MAX_POINTS - player.points, status)
+            views.sprite_for(embed, name, attach=False)  # Already attached with the roll
+            out.edit(turn_msg, interaction=interaction, embed=embed, view=None)
+            break
 
 
 if __name__ == "__main__":
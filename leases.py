@@ -0,0 +1,272 @@
+"""
+Draft ownership across worker processes.
+
+Every draft is owned by exactly one worker through a lease row in the
+journal's SQLite file. The owner renews it every LEASE_TTL / 3 seconds; if
+it dies, the lease expires and another worker takes the draft over by
+rebuilding it from the journal. Each lease carries a fence number that
+goes up on every change of owner, and journal writes are only accepted
+with the current (owner, fence), so a stalled ex-owner can't corrupt the
+draft after losing it.
+
+    python leases.py --workers 3 --drafts 6   # multi-process demo with a fake gateway
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sqlite3
+import tempfile
+import time
+
+import config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+    name    TEXT PRIMARY KEY,
+    owner   TEXT NOT NULL,
+    fence   INTEGER NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+class LeaseLost(Exception):
+    """The lease was taken over by another worker: stop touching the draft"""
+
+
+class Lease:
+    __slots__ = ("name", "owner", "fence")
+
+    def __init__(self, name, owner, fence):
+        self.name = name
+        self.owner = owner
+        self.fence = fence
+
+    def __repr__(self):
+        return f"Lease({self.name!r}, {self.owner!r}, fence={self.fence})"
+
+
+def worker_id():
+    """Unique per process: config.WORKER_ID (if set) + host + pid"""
+    base = config.WORKER_ID or socket.gethostname()
+    return f"{base}:{os.getpid()}"
+
+
+def lease_name(key):
+    guild_id, channel_id = key
+    return f"draft:{guild_id}:{channel_id}"
+
+
+def parse_lease_name(name):
+    _, guild_id, channel_id = name.split(":")
+    return (None if guild_id == "None" else int(guild_id), int(channel_id))
+
+
+class LeaseStore:
+    def __init__(self, path):
+        self.path = path
+        # Autocommit: every method runs its own BEGIN IMMEDIATE transaction
+        self.db = sqlite3.connect(path, timeout=10, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def acquire(self, name, owner, ttl=config.LEASE_TTL):
+        """Takes the lease if it is free, expired or already ours. Returns a Lease or None."""
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            row = self.db.execute("SELECT owner, fence, expires FROM leases WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                fence = 1
+                self.db.execute("INSERT INTO leases (name, owner, fence, expires) VALUES (?, ?, ?, ?)",
+                                (name, owner, fence, now + ttl))
+            else:
+                held_by, fence, expires = row
+                if held_by != owner and expires > now:
+                    self.db.execute("ROLLBACK")
+                    return None
+                if held_by != owner:
+                    fence += 1
+                self.db.execute("UPDATE leases SET owner = ?, fence = ?, expires = ? WHERE name = ?",
+                                (owner, fence, now + ttl, name))
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return Lease(name, owner, fence)
+
+    def renew(self, lease, ttl=config.LEASE_TTL):
+        """False if someone else took it over meanwhile"""
+        cur = self.db.execute("UPDATE leases SET expires = ? WHERE name = ? AND owner = ? AND fence = ?",
+                              (time.time() + ttl, lease.name, lease.owner, lease.fence))
+        return cur.rowcount == 1
+
+    def release(self, lease):
+        """Frees the lease (kept as a row so the fence keeps counting up)"""
+        self.db.execute("UPDATE leases SET expires = 0 WHERE name = ? AND owner = ? AND fence = ?",
+                        (lease.name, lease.owner, lease.fence))
+
+    def holder(self, name):
+        """Owner of a live lease, or None if it is free / expired"""
+        row = self.db.execute("SELECT owner FROM leases WHERE name = ? AND expires > ?",
+                              (name, time.time())).fetchone()
+        return row[0] if row else None
+
+    def holders(self):
+        """{name: owner} of every live lease (one query, for a cached view)"""
+        rows = self.db.execute("SELECT name, owner FROM leases WHERE expires > ?", (time.time(),))
+        return dict(rows.fetchall())
+
+    def orphaned(self, prefix="draft:"):
+        """Leases whose owner stopped renewing without releasing them (crashed / hung worker)"""
+        rows = self.db.execute("SELECT name FROM leases WHERE expires > 0 AND expires <= ? AND name LIKE ?",
+                               (time.time(), prefix + "%"))
+        return [name for (name,) in rows]
+
+    def close(self):
+        self.db.close()
+
+
+# --- MULTI-PROCESS DEMO ---
+# A fake gateway hands every worker the same "start draft" events (like
+# several processes on one token); the leases decide who plays each draft.
+# One worker is SIGKILLed midway and the others have to finish its drafts.
+
+class FakeMember:
+    def __init__(self, user_id):
+        self.id = user_id
+        self.display_name = f"Coach {user_id}"
+
+
+def _demo_worker(db_path, keys, n_coaches, ttl, turn_delay):
+    import journal
+    import logic
+
+    logic.load_data()
+    me = worker_id()
+    store = LeaseStore(db_path)
+    draft_journal = journal.Journal(db_path)
+    owned = {}  # key -> session
+    done = set()
+    last_renew = 0.0
+
+    def rebuild(key, lease):
+        draft_id = draft_journal.latest_draft(key)
+        snapshot, events = draft_journal.load(draft_id) if draft_id else (None, [])
+        if snapshot is None:
+            players = [FakeMember(key[1] * 100 + i) for i in range(n_coaches)]
+            return logic.DraftSession(key, players, journal=draft_journal, lease=lease)
+        players = [FakeMember(uid) for uid in snapshot["order"]]
+        return logic.restore_draft(key, players, snapshot, events, journal=draft_journal,
+                                   draft_id=draft_id, lease=lease)
+
+    while len(done) < len(keys):
+        for key in keys:
+            if key in done or key in owned:
+                continue
+            lease = store.acquire(lease_name(key), me, ttl)
+            if lease is None:
+                continue
+            session = rebuild(key, lease)
+            if not session.active:
+                store.release(lease)
+                done.add(key)
+                continue
+            owned[key] = session
+            print(f"👷 {me}: owns {key} (fence {lease.fence}, round {session.round})", flush=True)
+
+        if time.time() - last_renew > ttl / 3:
+            last_renew = time.time()
+            for key, session in list(owned.items()):
+                if not store.renew(session.lease):
+                    print(f"⚠️ {me}: lost {key}", flush=True)
+                    del owned[key]
+
+        for key, session in list(owned.items()):
+            _demo_step(logic, session)
+            if not session.active:
+                del owned[key]
+                # Finished by us (still our lease), or stopped because the lease was lost
+                if store.renew(session.lease):
+                    store.release(session.lease)
+                    done.add(key)
+        time.sleep(turn_delay)
+
+
+def _demo_step(logic, session):
+    """One scheduler step: the same state machine as kokoloko.next_turn, always keeping"""
+    if session.current_index >= len(session.order):
+        if session.round >= config.TOTAL_POKEMON:
+            session.finish()
+        else:
+            session.next_round()
+        return
+    player = session.coach_at(session.current_index)
+    pick_num = player.picks + 1
+    if pick_num <= config.TOTAL_POKEMON:
+        name, tier = logic.roll_pokemon(session, logic.get_valid_tiers(session, player.id, pick_num))
+        if name:
+            session.commit_pick(player.id, name, tier)
+    session.advance()
+
+
+def _verify(db_path, keys, n_coaches):
+    import journal
+    import logic
+
+    draft_journal = journal.Journal(db_path)
+    ok = True
+    for key in keys:
+        draft_id = draft_journal.latest_draft(key)
+        snapshot, events = draft_journal.load(draft_id)
+        players = [FakeMember(uid) for uid in snapshot["order"]]
+        session = logic.restore_draft(key, players, snapshot, events)
+        names = [name for user_id in session.coaches for name, _ in session.roster(user_id)]
+        picks = len(names)
+        complete = not session.active and picks == n_coaches * config.TOTAL_POKEMON
+        unique = len(names) == len(set(names))
+        ok &= complete and unique
+        print(f"{'✅' if complete and unique else '❌'} {key}: {picks} picks, "
+              f"{'no' if unique else 'DUPLICATE'} duplicates, {'done' if not session.active else 'unfinished'}")
+    return ok
+
+
+def demo(n_workers, n_drafts, n_coaches, ttl, kill_after, turn_delay):
+    import logic
+
+    logic.load_data()
+    db_path = os.path.join(tempfile.mkdtemp(prefix="kokoloko-leases-"), "drafts.db")
+    LeaseStore(db_path).close()
+    keys = [(1, 100 + i) for i in range(n_drafts)]
+
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_demo_worker, args=(db_path, keys, n_coaches, ttl, turn_delay))
+               for _ in range(n_workers)]
+    for w in workers:
+        w.start()
+
+    time.sleep(kill_after)
+    victim = workers[0]
+    os.kill(victim.pid, signal.SIGKILL)
+    print(f"💀 Killed worker pid {victim.pid}", flush=True)
+
+    for w in workers[1:]:
+        w.join()
+    print(f"\nJournal: {db_path}")
+    return _verify(db_path, keys, n_coaches)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lease takeover demo with several worker processes")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--drafts", type=int, default=6)
+    parser.add_argument("--coaches", type=int, default=8)
+    parser.add_argument("--ttl", type=float, default=2.0)
+    parser.add_argument("--kill-after", type=float, default=1.0, help="Seconds before worker 0 is killed")
+    parser.add_argument("--turn-delay", type=float, default=0.01)
+    args = parser.parse_args()
+    ok = demo(args.workers, args.drafts, args.coaches, args.ttl, args.kill_after, args.turn_delay)
+    raise SystemExit(0 if ok else 1)
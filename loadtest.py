@@ -0,0 +1,337 @@
+"""
+Headless load test: complete drafts through the real kokoloko.next_turn.
+
+Discord is replaced in-process by fake channels, members and button clicks
+(scripted by a policy), and every asyncio.sleep is virtual, so whole drafts
+run back to back in milliseconds. Reports per-turn latency, message / API
+call counts and peak memory.
+
+    python loadtest.py --drafts 200 --coaches 16
+    python loadtest.py --drafts 1000 --concurrency 50 --policy mixed --json load.json
+    python loadtest.py --drafts 20 --coaches 200 --policy reroll --trace-memory
+    python loadtest.py --drafts 100 --policy mixed --fast   # staff !fast_mode pacing
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import statistics
+import time
+import tracemalloc
+
+import config
+import logic
+import outbox
+import scoreboard
+import views
+
+import kokoloko
+
+POLICIES = ("keep", "reroll", "timeout", "mixed")
+MIXED_WEIGHTS = {"KEEP": 0.6, "REROLL": 0.3, "TIMEOUT": 0.1}
+
+
+# --- VIRTUAL TIME ---
+# Turn delays, round pauses and re-roll pauses only advance a counter.
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+        self.real_sleep = asyncio.sleep
+
+    async def sleep(self, delay, result=None):
+        self.now += delay
+        await self.real_sleep(0)  # Still yield, so other drafts get to run
+        return result
+
+    def install(self):
+        asyncio.sleep = self.sleep
+
+    def uninstall(self):
+        asyncio.sleep = self.real_sleep
+
+
+# --- FAKE DISCORD ---
+
+class Stats:
+    def __init__(self):
+        self.sends = 0
+        self.edits = 0
+        self.scoreboard_edits = 0  # Part of `edits`: the live summary's pages
+        self.responses = 0
+        self.turn_ms = []
+
+
+class FakeMember:
+    def __init__(self, i):
+        self.id = 10_000 + i
+        self.display_name = f"Coach {i}"
+        self.mention = f"<@{self.id}>"
+        self.roles = []
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+
+
+class FakeMessage:
+    def __init__(self, channel, message_id):
+        self.channel = channel
+        self.id = message_id
+        self.jump_url = f"https://discord.com/channels/{channel.guild.id}/{channel.id}/{message_id}"
+
+    async def edit(self, **kwargs):
+        self.channel.stats.edits += 1
+        self.channel.edits[self.id] = self.channel.edits.get(self.id, 0) + 1
+        await self.channel.api_latency()
+        return self
+
+    async def pin(self, **kwargs):
+        pass
+
+
+class FakeChannel:
+    def __init__(self, channel_id, stats, latency=0.0, clock=None):
+        self.id = channel_id
+        self.guild = FakeGuild(1)
+        self.stats = stats
+        self.latency = latency
+        self.clock = clock
+        self.next_message_id = 1
+        self.edits = {}  # {message_id: edits}
+
+    async def api_latency(self):
+        if self.latency:
+            await self.clock.real_sleep(self.latency)
+
+    async def send(self, content=None, **kwargs):
+        self.stats.sends += 1
+        await self.api_latency()
+        self.next_message_id += 1
+        return FakeMessage(self, self.next_message_id)
+
+
+class FakeResponse:
+    def __init__(self, stats):
+        self.stats = stats
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    async def edit_message(self, **kwargs):
+        self.done = True
+        self.stats.responses += 1
+
+    async def send_message(self, *args, **kwargs):
+        self.done = True
+        self.stats.responses += 1
+
+
+class FakeInteraction:
+    def __init__(self, user, stats):
+        self.user = user
+        self.response = FakeResponse(stats)
+
+
+# --- SCRIPTED VIEWS ---
+# Stand-ins for views.RollView / views.DraftView that "click" right away.
+
+class Script:
+    def __init__(self, policy, stats, seed=None):
+        self.policy = policy
+        self.stats = stats
+        self.rng = random.Random(seed)
+
+    def decision(self):
+        if self.policy == "keep":
+            return "KEEP"
+        if self.policy == "reroll":
+            return "REROLL"
+        if self.policy == "timeout":
+            return "TIMEOUT"
+        return self.rng.choices(list(MIXED_WEIGHTS), weights=list(MIXED_WEIGHTS.values()))[0]
+
+
+def scripted_views(script):
+    class ScriptedRollView:
+        def __init__(self, coach_user):
+            self.coach = coach_user
+            self.clicked = script.policy != "timeout"
+            self.interaction = FakeInteraction(coach_user, script.stats) if self.clicked else None
+
+        async def wait(self):
+            await asyncio.sleep(0 if self.clicked else config.ROLL_TIMEOUT)
+            return not self.clicked
+
+        def stop(self):
+            pass
+
+    class ScriptedDraftView:
+        def __init__(self, coach_user):
+            self.coach = coach_user
+            self.value = script.decision()
+            clicked = self.value != "TIMEOUT"
+            self.clicked_by = coach_user if clicked else None
+            self.interaction = FakeInteraction(coach_user, script.stats) if clicked else None
+
+        async def wait(self):
+            await asyncio.sleep(0 if self.clicked_by else config.DECISION_TIMEOUT)
+            return self.clicked_by is None
+
+        def stop(self):
+            pass
+
+    return ScriptedRollView, ScriptedDraftView
+
+
+def timed_play_turn(stats, play_turn):
+    async def wrapper(session, channel, player, pick_num):
+        started = time.perf_counter()
+        try:
+            await play_turn(session, channel, player, pick_num)
+        finally:
+            stats.turn_ms.append((time.perf_counter() - started) * 1000)
+    return wrapper
+
+
+# --- DRIVER ---
+
+async def run_draft(channel_id, n_coaches, stats, latency, clock, fast=False, seed=None):
+    channel = FakeChannel(channel_id, stats, latency, clock)
+    members = [FakeMember(i) for i in range(n_coaches)]
+    random.Random(seed).shuffle(members)
+
+    session = logic.initialize_draft(channel, members, seed=seed)
+    session.set_fast_mode(fast)
+    out = outbox.for_channel(channel)
+    session.scoreboard = scoreboard.Scoreboard(session, out)
+    session.scoreboard.publish()
+    try:
+        await kokoloko.next_turn(session, channel)
+    finally:
+        # Drop everything the draft left behind, so memory reflects steady state
+        # (next_turn already dropped the outbox if the draft ran to its end)
+        logic.sessions.pop(logic.session_key(channel), None)
+        await outbox.discard(out)
+    stats.scoreboard_edits += sum(channel.edits.get(handle.message.id, 0)
+                                  for handle in session.scoreboard.messages if handle.message)
+    return session, out
+
+
+async def run(n_drafts, n_coaches, concurrency, policy, latency=0.0, seed=None, trace_memory=False, fast=False):
+    if not len(logic.pool_index):
+        logic.load_data()
+    random.seed(seed)
+
+    stats = Stats()
+    clock = VirtualClock()
+    script = Script(policy, stats, seed)
+    saved = (views.RollView, views.DraftView, kokoloko.play_turn)
+    views.RollView, views.DraftView = scripted_views(script)
+    kokoloko.play_turn = timed_play_turn(stats, kokoloko.play_turn)
+    clock.install()
+    if trace_memory:
+        tracemalloc.start()
+
+    picks = api_calls = interaction_calls = coalesced = 0
+    next_id = iter(range(1, n_drafts + 1))
+    started = time.perf_counter()
+
+    async def worker():
+        nonlocal picks, api_calls, interaction_calls, coalesced
+        for channel_id in next_id:
+            # Each draft gets its own seed from --seed: same order and rolls on every run
+            draft_seed = None if seed is None else f"{seed}:{channel_id}"
+            session, box = await run_draft(channel_id, n_coaches, stats, latency, clock, fast, draft_seed)
+            picks += len(session.history)
+            api_calls += box.api_calls
+            interaction_calls += box.interaction_calls
+            coalesced += box.coalesced
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(min(concurrency, n_drafts))))
+    finally:
+        elapsed = time.perf_counter() - started
+        clock.uninstall()
+        views.RollView, views.DraftView, kokoloko.play_turn = saved
+        traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+
+    turns = sorted(stats.turn_ms)
+    return {
+        "drafts": n_drafts,
+        "coaches": n_coaches,
+        "concurrency": concurrency,
+        "policy": policy,
+        "fast_mode": fast,
+        "api_latency_ms": latency * 1000,
+        "seconds": round(elapsed, 3),
+        "drafts_per_second": round(n_drafts / elapsed, 2),
+        "turns_per_second": round(len(turns) / elapsed, 1),
+        "picks": picks,
+        "turn_ms": {
+            "median": round(statistics.median(turns), 4) if turns else None,
+            "p99": round(turns[min(len(turns) - 1, int(len(turns) * 0.99))], 4) if turns else None,
+            "max": round(turns[-1], 4) if turns else None,
+        },
+        "messages": {"sends": stats.sends, "edits": stats.edits, "scoreboard_edits": stats.scoreboard_edits,
+                     "button_responses": stats.responses},
+        "outbox": {
+            "api_calls": api_calls,
+            "api_calls_per_pick": round(api_calls / picks, 3) if picks else None,
+            "interaction_calls": interaction_calls,
+            "coalesced": coalesced,
+        },
+        "virtual_seconds_per_draft": round(clock.now / n_drafts, 1),
+        "memory": {
+            "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "traced_peak_bytes": traced_peak,
+        },
+    }
+
+
+def print_report(result):
+    t, m, o = result["turn_ms"], result["messages"], result["outbox"]
+    print(f"\n=== {result['drafts']} drafts • {result['coaches']} coaches • "
+          f"{result['concurrency']} concurrent • policy {result['policy']}"
+          f"{' • fast mode' if result['fast_mode'] else ''} ===")
+    print(f"⏱️ {result['seconds']}s • {result['drafts_per_second']} drafts/s • {result['turns_per_second']} turns/s "
+          f"({result['virtual_seconds_per_draft']}s of Discord time per draft)")
+    print(f"🎲 Turn latency: median {t['median']}ms | p99 {t['p99']}ms | max {t['max']}ms • {result['picks']} picks")
+    print(f"📨 Sends {m['sends']} • Edits {m['edits'] - m['scoreboard_edits']} turn + {m['scoreboard_edits']} scoreboard • "
+          f"Button responses {m['button_responses']} • "
+          f"API calls/pick {o['api_calls_per_pick']} • Merged edits {o['coalesced']}")
+    mem = result["memory"]
+    traced = f" • traced peak {mem['traced_peak_bytes'] / 1024:.0f} KiB" if mem["traced_peak_bytes"] else ""
+    print(f"🧠 Peak RSS {mem['peak_rss_kib'] / 1024:.1f} MiB{traced}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Kokoloko draft load test")
+    parser.add_argument("--drafts", type=int, default=100)
+    parser.add_argument("--coaches", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=1, help="Drafts running at the same time")
+    parser.add_argument("--policy", choices=POLICIES, default="mixed", help="What the scripted coaches click")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="Real milliseconds per fake API call")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--trace-memory", action="store_true", help="Also track the Python heap peak (slower)")
+    parser.add_argument("--fast", action="store_true", help="Run the drafts with fast mode pacing")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.drafts, args.coaches, args.concurrency, args.policy,
+                             args.api_latency / 1000, args.seed, args.trace_memory, args.fast))
+    print_report(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\nSaved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,78 +1,378 @@
-import pandas as pd
-import random
-import config
+import asyncio
+import collections
+import functools
 import os
+import random
+from array import array
 
-# --- STATE MANAGEMENT ---
-# This dictionary holds the entire game state
-draft_state = {
-    "active": False,
-    "round": 1,
-    "order": [],
-    "current_index": 0,
-    "rosters": {},  # {user_id: [{'name': 'Mew', 'tier': 300}, ...]}
-    "rerolls": {},  # {user_id: 5}
-    "points": {},  # {user_id: 300}
-    "burned": []
-}
+import config
+import history
+import pool
+import sampler
+from leases import LeaseLost
 
-pokemon_db = pd.DataFrame()
+# Built once in load_data(): tier -> candidate ids
+pool_index = pool.PoolIndex([], [])
 
 
 def load_data():
-    global pokemon_db
-    if os.path.exists(config.CSV_FILE):
-        pokemon_db = pd.read_csv(config.CSV_FILE)
-        pokemon_db.columns = pokemon_db.columns.str.strip().str.lower()
-        print(f"✅ Logic: CSV Loaded ({len(pokemon_db)} rows).")
+    if os.path.exists(config.CSV_FILE) or os.path.exists(config.POOL_FILE):
+        swap_pool(build_pool())
+        print(f"✅ Logic: Pool v{pool_index.version} Loaded ({len(pool_index)} rows).")
     else:
         print(f"❌ Logic Error: File {config.CSV_FILE} not found.")
 
 
-def initialize_draft(players):
-    """Resets the state for a new game"""
-    draft_state["order"] = players
-    draft_state["rosters"] = {p.id: [] for p in players}
-    draft_state["rerolls"] = {p.id: 0 for p in players}
-    draft_state["points"] = {p.id: 0 for p in players}
-    draft_state["round"] = 1
-    draft_state["current_index"] = 0
-    draft_state["active"] = True
-    draft_state["burned"] = []
+def build_pool():
+    """Builds a new immutable pool version (blocking file I/O: run it off the event loop)"""
+    # Compiled binary pool (rebuilt automatically when the CSV changes)
+    return pool.load_pool(config.CSV_FILE, config.POOL_FILE)
 
 
-def get_valid_tiers(user_id, pick_number):
-    """Core Logic for High Tier Restrictions + Salary Cap"""
-    user_roster = draft_state["rosters"].get(user_id, [])
-    points_spent = draft_state["points"].get(user_id, 0)
+def swap_pool(new_index):
+    """
+    Publishes a new pool version. A single assignment, so it is atomic for
+    the event loop; running drafts keep the version they started with.
+    """
+    global pool_index
+    new_index.version = pool_index.version + 1
+    pool_index = new_index
+    return new_index
 
-    allowed = list(config.TIER_PROBS.keys())
 
-    # --- RULE A: HIGH TIER LOGIC ---
-    count_300 = sum(1 for p in user_roster if p['tier'] == 300)
-    count_260 = sum(1 for p in user_roster if p['tier'] == 260)
-    count_240 = sum(1 for p in user_roster if p['tier'] == 240)
+# --- STATE MANAGEMENT ---
+# Turn scheduler states (see kokoloko.next_turn)
+PRE_ROLL = "PRE_ROLL"
+DECIDING = "DECIDING"
+COMMITTED = "COMMITTED"
+ROUND_END = "ROUND_END"
+PAUSED = "PAUSED"
+DONE = "DONE"
 
-    # 1. If you have a 300 -> Block all High Tiers
-    if count_300 > 0:
-        for t in [300, 260, 240]:
-            if t in allowed: allowed.remove(t)
 
-    # 2. If you have 2+ combination of 260/240 -> Block all High Tiers
-    elif (count_260 + count_240) >= 2:
-        for t in [300, 260, 240]:
-            if t in allowed: allowed.remove(t)
+# Packed high-tier counter: one byte per tier (count_300 | count_260 << 8 | count_240 << 16)
+HIGH_SHIFTS = {300: 0, 260: 8, 240: 16}
 
-    # 3. Intermediate restrictions
-    else:
-        if count_260 > 0:
-            # Can only get one more 240. Block 300 and 260.
-            if 300 in allowed: allowed.remove(300)
-            if 260 in allowed: allowed.remove(260)
 
-        elif count_240 > 0:
-            # Can get 260 OR 240. Block 300.
-            if 300 in allowed: allowed.remove(300)
+class CoachRecord:
+    """
+    One coach's side of a draft, updated on every pick so the rules read it
+    in O(1). Holds no discord.Member: just the id and a cached display name.
+    """
+    __slots__ = ("id", "display_name", "pids", "tiers", "points", "rerolls", "high")
+
+    def __init__(self, user_id, display_name):
+        self.id = user_id
+        self.display_name = display_name
+        self.pids = array("i")   # Pool ids in pick order (negative: name not in the pool, see DraftSession.foreign)
+        self.tiers = array("H")  # Tier each pick was committed at
+        self.points = 0
+        self.rerolls = 0
+        self.high = 0
+
+    @property
+    def mention(self):
+        return f"<@{self.id}>"
+
+    @property
+    def picks(self):
+        return len(self.pids)
+
+    def high_counts(self):
+        """(count_300, count_260, count_240)"""
+        h = self.high
+        return h & 0xFF, (h >> 8) & 0xFF, h >> 16
+
+
+class DraftSession:
+    """Holds the entire game state of one draft (one per guild + channel)"""
+
+    def __init__(self, key, players, seed=None, journal=None, lease=None):
+        self.key = key
+        self.active = True
+        self.round = 1
+        # Anything with .id / .display_name (discord.Member, CoachRecord, ...): only those two are kept
+        self.coaches = {p.id: CoachRecord(p.id, p.display_name) for p in players}  # {user_id: CoachRecord}
+        self.order = [p.id for p in players]  # user ids, reversed every round (snake)
+        self.current_index = 0
+        self.foreign = []  # Picked names missing from self.pool (journal replayed on a newer pool)
+        self.burned = []
+        self.turn_rerolls = 0  # Re-rolls spent in the current turn (refunded on undo)
+        self.history = []  # [(user_id, name, tier, round, index, turn_rerolls), ...] for undo
+        self.rng = random.Random(seed)
+        # Separate stream for rolls drawn ahead of time, so speculating never shifts self.rng
+        self.spec_rng = random.Random(None if seed is None else f"{seed}:speculative")
+        self.speculative = {}  # {user_id: Speculation}
+        self.pool = pool_index
+        # What is still pickable in this draft (updated on every pick / burn)
+        self.availability = pool.Availability(self.pool)
+
+        # Scheduler bookkeeping
+        self.phase = PRE_ROLL
+        self.running = False
+        self.unpaused = asyncio.Event()
+        self.unpaused.set()
+        self.skip_requested = False
+        self.view = None  # View the current turn is waiting on (if any)
+        self.scoreboard = None  # Live summary message (set by kokoloko)
+        self.pacing = dict(config.PACING)
+        self.fast_mode = False
+
+        # Journal (crash recovery) + ownership when several workers share it
+        self.journal = journal
+        self.lease = lease  # leases.Lease: journal writes are fenced on it
+        self.draft_id = None
+        self.replaying = False
+        self.events_since_snapshot = 0
+        if journal is not None:
+            self.draft_id = journal.new_draft(key)
+            journal.save_snapshot(self.draft_id, 0, self.to_snapshot(), lease=lease)
+
+    def set_fast_mode(self, on):
+        self.fast_mode = on
+        self.pacing = dict(config.FAST_PACING if on else config.PACING)
+
+    # --- JOURNAL ---
+    def _log(self, kind, **data):
+        if self.replaying:
+            return
+        if self.journal is not None:
+            try:
+                seq = self.journal.append(self.draft_id, kind, data, lease=self.lease)
+                self.events_since_snapshot += 1
+                if self.events_since_snapshot >= config.SNAPSHOT_EVERY:
+                    self.journal.save_snapshot(self.draft_id, seq, self.to_snapshot(), lease=self.lease)
+                    self.events_since_snapshot = 0
+            except LeaseLost:
+                # Another worker owns the draft now (and replays the journal, not us)
+                print(f"⚠️ Logic: lost the lease on {self.key}; stopping this copy of the draft.")
+                self.active = False
+                return
+        # Cross-draft history (queued; written by history.py's thread)
+        history.record(self, kind, data)
+
+    def to_snapshot(self):
+        """Compact JSON-able copy of everything needed to rebuild the draft"""
+        return {
+            "pool": self.pool.checksum,
+            "active": self.active,
+            "round": self.round,
+            "current_index": self.current_index,
+            "order": list(self.order),
+            "names": {str(u): c.display_name for u, c in self.coaches.items()},
+            "rosters": {str(u): [list(p) for p in self.roster(u)] for u in self.coaches},
+            "rerolls": {str(u): c.rerolls for u, c in self.coaches.items()},
+            "burned": list(self.burned),
+            "turn_rerolls": self.turn_rerolls,
+            "history": [list(h) for h in self.history],
+        }
+
+    @classmethod
+    def from_snapshot(cls, key, players, snap):
+        """`players` are the members for snap["order"], in that order"""
+        session = cls(key, players)
+        session.active = snap["active"]
+        session.round = snap["round"]
+        session.current_index = snap["current_index"]
+        for user_id, roster in snap["rosters"].items():
+            for name, tier in roster:
+                session.commit_pick(int(user_id), name, tier, record=False)
+        for user_id, n in snap["rerolls"].items():
+            session.coaches[int(user_id)].rerolls = n
+        for name in snap["burned"]:
+            session.burn(name)
+        session.turn_rerolls = snap["turn_rerolls"]
+        session.history = [tuple(h) for h in snap["history"]]
+        return session
+
+    def replay(self, kind, data):
+        """Applies one journaled event (same code path as the live draft)"""
+        self.replaying = True
+        try:
+            if kind in ("keep", "timeout", "auto"):
+                self.commit_pick(data["user"], data["name"], data["tier"], how=kind)
+            elif kind == "reroll":
+                self.reroll(data["user"], data["name"])
+            elif kind == "turn":
+                self.advance()
+            elif kind == "round":
+                self.next_round()
+            elif kind == "done":
+                self.finish()
+            elif kind == "undo":
+                self.undo_last_pick()
+            # "roll" and "skip" are informational only
+        finally:
+            self.replaying = False
+
+    # --- MUTATIONS (everything that changes the draft goes through here) ---
+    def commit_pick(self, user_id, name, tier, how="keep", record=True):
+        """Adds a pick to the roster and removes it from the pool"""
+        coach = self.coaches[user_id]
+        pid = self.pool.ids.get(name)
+        if pid is not None:
+            self.availability.take(pid)
+            coach.pids.append(pid)
+        else:
+            self.foreign.append(name)
+            coach.pids.append(-len(self.foreign))
+        coach.tiers.append(tier)
+        coach.points += tier
+        if tier in HIGH_SHIFTS:
+            coach.high += 1 << HIGH_SHIFTS[tier]
+        if record:
+            self.history.append((user_id, name, tier, self.round, self.current_index, self.turn_rerolls))
+            self._log(how, user=user_id, name=name, tier=tier)
+
+    def reroll(self, user_id, name):
+        """Coach threw `name` back: spend a re-roll and burn it for this turn"""
+        self.coaches[user_id].rerolls += 1
+        self.turn_rerolls += 1
+        self.burn(name)
+        self._log("reroll", user=user_id, name=name)
+
+    def log_roll(self, user_id, name, tier):
+        self._log("roll", user=user_id, name=name, tier=tier)
+
+    def log_skip(self, user_id):
+        self._log("skip", user=user_id)
+
+    def advance(self):
+        """Turn over: burned names go back and the next coach is up"""
+        self.clear_burned()
+        self.current_index += 1
+        self._log("turn")
+
+    def next_round(self):
+        """Snake order: reverse and start again from the top"""
+        self.round += 1
+        self.order.reverse()
+        self.current_index = 0
+        self._log("round", round=self.round)
+
+    def finish(self):
+        self.active = False
+        self._log("done")
+
+    def undo_last_pick(self):
+        """
+        Reverts the most recent pick in O(1): the coach gets the turn back
+        (with the re-rolls spent on it). Returns (user_id, name, tier) or None.
+        """
+        if not self.history:
+            return None
+
+        self.clear_burned()
+        user_id, name, tier, rnd, index, spent = self.history.pop()
+        coach = self.coaches[user_id]
+        pid = coach.pids.pop()
+        coach.tiers.pop()
+        coach.points -= tier
+        if tier in HIGH_SHIFTS:
+            coach.high -= 1 << HIGH_SHIFTS[tier]
+        coach.rerolls -= spent
+        if pid >= 0:
+            self.availability.restore(pid)
+
+        while self.round > rnd:
+            self.order.reverse()
+            self.round -= 1
+        self.current_index = index
+        self.active = True
+        self._log("undo", user=user_id, name=name, tier=tier)
+        return user_id, name, tier
+
+    # --- READ HELPERS ---
+    def coach_at(self, index):
+        return self.coaches[self.order[index]]
+
+    def roster(self, user_id):
+        """[(name, tier), ...] in pick order"""
+        coach = self.coaches[user_id]
+        names = self.pool.names
+        return [(names[pid] if pid >= 0 else self.foreign[-pid - 1], tier)
+                for pid, tier in zip(coach.pids, coach.tiers)]
+
+    # --- POOL HELPERS ---
+    def burn(self, name):
+        """Re-rolled names are out for the rest of the current turn"""
+        self.burned.append(name)
+        pid = self.pool.ids.get(name)
+        if pid is not None:
+            self.availability.take(pid)
+
+    def clear_burned(self):
+        """New turn: burned names go back into the pool"""
+        for name in self.burned:
+            pid = self.pool.ids.get(name)
+            if pid is not None:
+                self.availability.restore(pid)
+        self.burned = []
+        self.turn_rerolls = 0
+
+
+# --- SESSION REGISTRY ---
+# {(guild_id, channel_id): DraftSession}
+sessions = {}
+
+
+def session_key(channel):
+    guild = getattr(channel, "guild", None)
+    return (guild.id if guild else None, channel.id)
+
+
+def get_session(channel):
+    return sessions.get(session_key(channel))
+
+
+def initialize_draft(channel, players, journal=None, lease=None, seed=None):
+    """Creates a fresh session for this channel. Returns None if one is still running."""
+    key = session_key(channel)
+    current = sessions.get(key)
+    if current and current.active:
+        return None
+
+    session = DraftSession(key, players, seed=seed, journal=journal, lease=lease)
+    sessions[key] = session
+    return session
+
+
+def restore_draft(key, players, snapshot, events, journal=None, draft_id=None, lease=None):
+    """Rebuilds a session from its latest snapshot + the events after it"""
+    session = DraftSession.from_snapshot(key, players, snapshot)
+    for kind, data in events:
+        session.replay(kind, data)
+    session.journal = journal
+    session.draft_id = draft_id
+    session.lease = lease
+    sessions[key] = session
+    return session
+
+
+def get_valid_tiers(session, user_id, pick_number):
+    """Core Logic for High Tier Restrictions + Salary Cap (+ config.EMPTY_TIER_FALLBACK)"""
+    coach = session.coaches[user_id]
+    valid = allowed_tiers(*coach.high_counts(), coach.points, pick_number)
+    if config.EMPTY_TIER_FALLBACK == "skip" or session.availability.nonempty(valid):
+        return valid
+    # Everything the rules allow ran out: the cheapest tier left that still fits the cap
+    left = session.availability.nonempty(fallback_tiers(*coach.high_counts(), coach.points))
+    if not left and config.EMPTY_TIER_FALLBACK == "any":
+        # ...or, rather than losing the turn, the cheapest tier left at all
+        left = session.availability.nonempty(ALL_TIERS)
+    return (min(left),) if left else ()
+
+
+# Tiers blocked by each high-tier state (see allowed_tiers)
+HIGH_TIER_BLOCKS = ((), (300,), (300, 260), (300, 260, 240))
+
+
+def allowed_tiers(count_300, count_260, count_240, points_spent, pick_number):
+    """
+    The rules themselves, on plain numbers (shared with simulate.py).
+    Returns the tuple of tiers this roster may roll for this pick.
+    """
+    high_state = _high_state(count_300, count_260, count_240)
 
     # --- RULE B: SALARY CAP ---
     points_remaining = config.MAX_POINTS - points_spent
@@ -82,46 +382,219 @@ def get_valid_tiers(user_id, pick_number):
     reserve_cash = future_picks_needed * config.MIN_TIER_COST
     max_affordable_now = points_remaining - reserve_cash
 
-    allowed = [t for t in allowed if t <= max_affordable_now]
+    # Anything above the top tier behaves the same: keeps the cache key space tiny
+    return _allowed_for(high_state, min(max_affordable_now, MAX_TIER))
 
-    return allowed
 
+def fallback_tiers(count_300, count_260, count_240, points_spent):
+    """
+    EMPTY_TIER_FALLBACK "cheapest" (shared with simulate.py): the tiers a
+    coach may still land on once every allowed tier ran out. Same high-tier
+    rules and MAX_POINTS, only the cash reserved for later picks is dropped.
+    """
+    points_remaining = config.MAX_POINTS - points_spent
+    return _allowed_for(_high_state(count_300, count_260, count_240), min(points_remaining, MAX_TIER))
 
-def roll_pokemon(valid_tiers):
-    if not valid_tiers: return None, "NO_VALID_TIERS"
 
-    current_sum = sum(config.TIER_PROBS[t] for t in valid_tiers)
-    if current_sum == 0: return None, "ZERO_SUM"
+def _high_state(count_300, count_260, count_240):
+    """--- RULE A: HIGH TIER LOGIC --- (index into HIGH_TIER_BLOCKS)"""
+    # 1. If you have a 300 -> Block all High Tiers
+    # 2. If you have 2+ combination of 260/240 -> Block all High Tiers
+    if count_300 > 0 or (count_260 + count_240) >= 2:
+        return 3
+    # 3. Intermediate restrictions
+    if count_260 > 0:
+        # Can only get one more 240. Block 300 and 260.
+        return 2
+    if count_240 > 0:
+        # Can get 260 OR 240. Block 300.
+        return 1
+    return 0
+
+
+MAX_TIER = max(config.TIER_PROBS)
+ALL_TIERS = tuple(t for t, weight in config.TIER_PROBS.items() if weight > 0)
+
+
+@functools.lru_cache(maxsize=config.RULE_CACHE_SIZE)
+def _allowed_for(high_state, max_affordable_now):
+    blocked = HIGH_TIER_BLOCKS[high_state]
+    return tuple(t for t in config.TIER_PROBS if t not in blocked and t <= max_affordable_now)
+
+
+def rollable_tiers(session, valid_tiers):
+    """
+    What a roll can land on: the valid tiers this draft still has candidates
+    for (O(1) while no tier is empty). get_valid_tiers already applied
+    config.EMPTY_TIER_FALLBACK, so an empty result means the pick is lost.
+    """
+    return session.availability.nonempty(tuple(valid_tiers))
+
 
-    weights = [config.TIER_PROBS[t] / current_sum for t in valid_tiers]
-    selected_tier = random.choices(valid_tiers, weights=weights, k=1)[0]
+def roll_odds(session, valid_tiers):
+    """(tiers, weights) of a roll: rollable_tiers and their weights (config.TIER_WEIGHTS)"""
+    tiers = rollable_tiers(session, valid_tiers)
+    if config.TIER_WEIGHTS == "fixed":
+        return tiers, fixed_weights(tiers)
+    # "remaining": TIER_PROBS scaled by the share of the tier still in the pool
+    count, full = session.availability.count, session.pool.by_tier
+    return tiers, tuple(config.TIER_PROBS[t] * count(t) / len(full[t]) for t in tiers)
 
-    pool = pokemon_db[pokemon_db['tier'] == selected_tier]
-    candidates = pool[~pool['name'].isin(draft_state['burned'])]
 
-    # Exclude global picks
-    all_picked = []
-    for roster in draft_state["rosters"].values():
-        for p in roster:
-            all_picked.append(p['name'])
-    candidates = candidates[~candidates['name'].isin(all_picked)]
+@functools.lru_cache(maxsize=config.SAMPLER_CACHE_SIZE)
+def fixed_weights(tiers):
+    return tuple(config.TIER_PROBS[t] for t in tiers)
 
-    if candidates.empty:
+
+def roll_pokemon(session, valid_tiers):
+    tiers, weights = roll_odds(session, valid_tiers)
+    if not tiers: return None, "EMPTY_TIER_POOL" if valid_tiers or session.availability.empty else "NO_VALID_TIERS"
+
+    # Alias table is built once per (tiers, weights), then each draw is O(1)
+    tier_table = sampler.tier_sampler(tiers, weights)
+    if tier_table is None: return None, "ZERO_SUM"
+
+    selected_tier = tier_table.draw(session.rng)
+
+    # Picks and burns are already out of the session's availability
+    pid = session.availability.sample(selected_tier, session.rng)
+    if pid is None:
         return None, "EMPTY_TIER_POOL"
 
-    picked = candidates.sample(n=1).iloc[0]
-    return picked['name'], int(picked['tier'])
+    return session.pool.names[pid], session.pool.tiers[pid]
 
 
-def calculate_tier_percentages(user_id, pick_number):
+def draw_holds(session, drawn, tiers, weights):
+    """
+    Whether a tier drawn earlier with `drawn` = (tiers, weights, tier) can
+    stand for a roll over (tiers, weights) now. If names were only taken
+    since, the draw is kept with probability weight_now / weight_then
+    (thinning) and rolled again otherwise: the result has exactly the odds
+    of rolling now.
+    """
+    then_tiers, then_weights, tier = drawn
+    if then_tiers != tiers:
+        return False
+    if then_weights == weights:
+        return True
+    if any(now > then for now, then in zip(weights, then_weights)):
+        return False  # Something came back: only a fresh roll is exact
+    i = tiers.index(tier)
+    return session.rng.random() * then_weights[i] < weights[i]
+
+
+# --- SPECULATIVE ROLLS ---
+# While the bot waits on a click it draws the coach's next roll ahead of
+# time. The tier draw stands if it still holds at click time (draw_holds);
+# the name is re-drawn (same tier) if it was picked / burned since, or if
+# anything went back into the pool, so the odds are exactly those of
+# rolling at click time.
+
+class Speculation:
+    __slots__ = ("tiers", "weights", "tier", "pid", "restores")
+
+    def __init__(self, tiers, weights, tier, pid, restores):
+        self.tiers = tiers
+        self.weights = weights
+        self.tier = tier
+        self.pid = pid
+        self.restores = restores
+
+
+# hit: used as drawn • redraw: tier kept, name re-drawn • stale: odds changed, rolled again
+speculation_stats = collections.Counter()
+
+
+def speculate_roll(session, user_id, pick_number):
+    """Draws `user_id`'s next roll ahead of time (used by take_roll). Cheap: call it before any wait."""
+    tiers, weights = roll_odds(session, get_valid_tiers(session, user_id, pick_number))
+    table = sampler.tier_sampler(tiers, weights) if tiers else None
+    if table is None:
+        session.speculative.pop(user_id, None)
+        return
+    tier = table.draw(session.spec_rng)
+    pid = session.availability.sample(tier, session.spec_rng)
+    session.speculative[user_id] = Speculation(tiers, weights, tier, pid, session.availability.restores)
+
+
+def take_roll(session, user_id, pick_number):
+    """Same result as roll_pokemon(get_valid_tiers(...)), from the speculative draw when it still holds"""
+    valid = get_valid_tiers(session, user_id, pick_number)
+    spec = session.speculative.pop(user_id, None)
+    if spec is None or not draw_holds(session, (spec.tiers, spec.weights, spec.tier), *roll_odds(session, valid)):
+        if spec is not None:
+            speculation_stats["stale"] += 1
+        return roll_pokemon(session, valid)
+
+    availability = session.availability
+    pid = spec.pid
+    if pid is None or spec.restores != availability.restores or not availability.is_available(pid):
+        speculation_stats["redraw"] += 1
+        pid = availability.sample(spec.tier, session.rng)
+        if pid is None:
+            return None, "EMPTY_TIER_POOL"
+    else:
+        speculation_stats["hit"] += 1
+    return session.pool.names[pid], session.pool.tiers[pid]
+
+
+# --- FORCED RUNS ---
+# A run of coaches with no re-rolls left is played in one pass
+# (kokoloko.play_forced_run). Their tiers are drawn up front, one draw_many
+# per (tiers, weights); each pick then only samples a name in its tier,
+# unless the draw no longer holds (draw_holds): then it rolls.
+
+def draw_forced_run(session, players):
+    """[(user_id, pick_number)] -> {user_id: (tiers, weights, tier)} drawn in batches"""
+    groups = {}
+    for user_id, pick_number in players:
+        session.speculative.pop(user_id, None)  # The batch replaces any draw made ahead of time
+        odds = roll_odds(session, get_valid_tiers(session, user_id, pick_number))
+        groups.setdefault(odds, []).append(user_id)
+
+    draws = {}
+    for (tiers, weights), user_ids in groups.items():
+        table = sampler.tier_sampler(tiers, weights) if tiers else None
+        if table is None:
+            continue
+        for user_id, tier in zip(user_ids, table.draw_many(len(user_ids), session.rng)):
+            draws[user_id] = (tiers, weights, tier)
+    return draws
+
+
+def take_forced(session, user_id, pick_number, draw):
+    """Same result as roll_pokemon(get_valid_tiers(...)), from a draw_forced_run tier when it still holds"""
+    valid = get_valid_tiers(session, user_id, pick_number)
+    if draw is None or not draw_holds(session, draw, *roll_odds(session, valid)):
+        return roll_pokemon(session, valid)
+    pid = session.availability.sample(draw[2], session.rng)
+    return session.pool.names[pid], session.pool.tiers[pid]
+
+
+def peek_next_player(session):
+    """Who plays after the current coach (snake order), or None at the end of the draft"""
+    i = session.current_index + 1
+    if i < len(session.order):
+        return session.coach_at(i)
+    # Round end: the order reverses, so the last coach goes again
+    return session.coach_at(-1) if session.round < config.TOTAL_POKEMON and session.order else None
+
+
+def calculate_tier_percentages(session, user_id, pick_number):
     """
     Returns a dictionary {tier: percentage} of the actual odds
     for the specific player's current turn.
     """
-    valid_tiers = get_valid_tiers(user_id, pick_number)
+    return tier_percentages(*roll_odds(session, get_valid_tiers(session, user_id, pick_number)))
+
 
+@functools.lru_cache(maxsize=config.GRID_CACHE_SIZE)
+def tier_percentages(valid_tiers, weights=None):
+    """{tier: percentage} for a tuple of tiers and their weights (TIER_PROBS by default; cached: don't mutate the result)"""
+    if weights is None:
+        weights = fixed_weights(tuple(valid_tiers))
     # Calculate total weight of currently valid tiers
-    current_sum = sum(config.TIER_PROBS[t] for t in valid_tiers)
+    current_sum = sum(weights)
 
     if current_sum == 0:
         return {}
@@ -129,8 +602,16 @@ def calculate_tier_percentages(user_id, pick_number):
     # Calculate percentage for each tier (Weight / Total * 100)
     stats = {}
     # Sort high to low for display
-    for t in sorted(valid_tiers, reverse=True):
-        raw_prob = (config.TIER_PROBS[t] / current_sum) * 100
-        stats[t] = raw_prob
+    for t, w in sorted(zip(valid_tiers, weights), reverse=True):
+        stats[t] = (w / current_sum) * 100
+
+    return stats
+
 
-    return stats
\ No newline at end of file
+def cache_stats():
+    """{cache_name: CacheInfo(hits, misses, maxsize, currsize)}"""
+    return {
+        "rules": _allowed_for.cache_info(),
+        "percentages": tier_percentages.cache_info(),
+        **sampler.cache_stats(),
+    }
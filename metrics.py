@@ -0,0 +1,283 @@
+import asyncio
+import bisect
+import time
+
+import config
+import history
+import logic
+
+# --- RUNTIME METRICS ---
+# Plain in-process counters / histograms (an observe is a bisect and two
+# additions), exposed in Prometheus text format on a local HTTP port and
+# summarized by !stats.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FAST_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2)
+WAIT_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120)
+REROLL_BUCKETS = tuple(range(config.MAX_REROLLS + 1))
+
+registry = []
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.children = {}  # {label values: child}
+        registry.append(self)
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self._new_child()
+        return child
+
+    def _label_str(self, values, extra=()):
+        pairs = list(zip(self.label_names, values)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+
+class Counter(Metric):
+    """Incremented directly, or read at scrape time from `fn` ({label values: count})"""
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=(), fn=None):
+        super().__init__(name, help_text, labels)
+        self.fn = fn
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def samples(self):
+        values = self.fn() if self.fn else {v: child.value for v, child in self.children.items()}
+        for labels, value in values.items():
+            yield f"{self.name}{self._label_str(labels)} {value:g}"
+
+
+class Gauge(Metric):
+    """Set directly, or computed at scrape time by `fn`"""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, labels=(), fn=None):
+        super().__init__(name, help_text, labels)
+        self.fn = fn
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def value(self):
+        return self.fn() if self.fn else self.labels().value
+
+    def samples(self):
+        if self.fn:
+            yield f"{self.name} {self.fn():g}"
+            return
+        for values, child in self.children.items():
+            yield f"{self.name}{self._label_str(values)} {child.value:g}"
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimated from the buckets (linear inside the bucket), like histogram_quantile()"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        acc = 0
+        for i, n in enumerate(self.counts):
+            if acc + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                low = self.buckets[i - 1] if i else 0.0
+                return low + (self.buckets[i] - low) * (rank - acc) / n
+            acc += n
+        return self.buckets[-1]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help_text, labels)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def samples(self):
+        for values, child in self.children.items():
+            acc = 0
+            for bound, n in zip(self.buckets + (float("inf"),), child.counts):
+                acc += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                yield f"{self.name}_bucket{self._label_str(values, [('le', le)])} {acc}"
+            yield f"{self.name}_sum{self._label_str(values)} {child.sum:g}"
+            yield f"{self.name}_count{self._label_str(values)} {child.count}"
+
+
+class timer:
+    """with metrics.timer(HISTOGRAM.labels("send")): ..."""
+    __slots__ = ("target", "started")
+
+    def __init__(self, target):
+        self.target = target
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.target.observe(time.perf_counter() - self.started)
+
+
+def render():
+    """Prometheus text exposition format (0.0.4)"""
+    lines = []
+    for metric in registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# --- THE METRICS ---
+
+ROLL_SECONDS = Histogram("kokoloko_roll_seconds", "Time to compute valid tiers and roll one Pokemon",
+                         buckets=FAST_BUCKETS)
+DISCORD_SECONDS = Histogram("kokoloko_discord_request_seconds", "Discord API request latency",
+                            labels=("op",))
+DISCORD_ERRORS = Counter("kokoloko_discord_errors_total", "Discord API errors by HTTP status",
+                         labels=("op", "status"))
+RATE_LIMITED = Counter("kokoloko_discord_rate_limited_total", "429 responses discord.py waited out")
+COACH_WAIT_SECONDS = Histogram("kokoloko_coach_wait_seconds", "Time spent waiting on a coach's click",
+                               labels=("view",), buckets=WAIT_BUCKETS)
+COACH_TIMEOUTS = Counter("kokoloko_coach_timeouts_total", "Waits that ended without a click",
+                         labels=("view",))
+REROLLS_PER_PICK = Histogram("kokoloko_rerolls_per_pick", "Re-rolls spent before each pick",
+                             buckets=REROLL_BUCKETS)
+PICKS = Counter("kokoloko_picks_total", "Picks committed", labels=("how",))
+SPECULATIVE_ROLLS = Counter("kokoloko_speculative_rolls_total", "Rolls served from a draw made ahead of time",
+                            labels=("result",),
+                            fn=lambda: {(k,): v for k, v in logic.speculation_stats.items()})
+LOOP_LAG_SECONDS = Histogram("kokoloko_event_loop_lag_seconds", "How late the event loop ran a timed callback")
+
+
+def active_drafts():
+    return sum(1 for s in logic.sessions.values() if s.active)
+
+
+ACTIVE_DRAFTS = Gauge("kokoloko_active_drafts", "Drafts currently in progress", fn=active_drafts)
+HISTORY_QUEUE = Gauge("kokoloko_history_queue", "Draft events waiting to be written to the history store",
+                      fn=lambda: history.writer.pending() if history.writer else 0)
+
+
+# --- BACKGROUND TASKS ---
+
+async def watch_loop_lag(interval=config.LOOP_LAG_INTERVAL):
+    """Sleeps `interval` over and over; anything past it is time the loop was busy"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - started - interval))
+
+
+async def _handle(reader, writer):
+    try:
+        request = await asyncio.wait_for(reader.readline(), timeout=5)
+        # Drain the headers; nothing in them matters here
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+
+        parts = request.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/metrics", "/"):
+            body, status = render().encode(), "200 OK"
+        else:
+            body, status = b"not found\n", "404 Not Found"
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+    except (asyncio.TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host=config.METRICS_HOST, port=config.METRICS_PORT):
+    """GET /metrics on a local port (scraped by Prometheus / curl)"""
+    server = await asyncio.start_server(_handle, host, port)
+    print(f"📈 Metrics: http://{host}:{port}/metrics")
+    return server
+
+
+# --- !stats ---
+
+def summary_lines():
+    def ms(x):
+        return f"{x * 1000:.1f}ms" if x is not None else "-"
+
+    def us(x):
+        return f"{x * 1e6:.1f}µs" if x is not None else "-"
+
+    lines = [f"🏟️ **Active drafts:** {active_drafts()} • **Picks:** "
+             + (", ".join(f"{v[0]} {c.value:g}" for v, c in PICKS.children.items()) or "0")]
+
+    roll = ROLL_SECONDS.labels()
+    lines.append(f"🎲 **Roll:** p50 {us(roll.quantile(0.5))} • p99 {us(roll.quantile(0.99))} ({roll.count} rolls)")
+
+    for (op,), child in sorted(DISCORD_SECONDS.children.items()):
+        lines.append(f"📨 **{op}:** p50 {ms(child.quantile(0.5))} • p99 {ms(child.quantile(0.99))} ({child.count})")
+    errors = sum(c.value for c in DISCORD_ERRORS.children.values())
+    lines.append(f"🚦 **429s:** {RATE_LIMITED.labels().value:g} • **API errors:** {errors:g}")
+
+    for (view,), child in sorted(COACH_WAIT_SECONDS.children.items()):
+        timeouts = COACH_TIMEOUTS.labels(view).value
+        lines.append(f"⏳ **Wait ({view}):** p50 {child.quantile(0.5) or 0:.1f}s • "
+                     f"p99 {child.quantile(0.99) or 0:.1f}s • {timeouts:g} timeouts")
+
+    rerolls = REROLLS_PER_PICK.labels()
+    avg = rerolls.sum / rerolls.count if rerolls.count else 0.0
+    lines.append(f"🔄 **Re-rolls per pick:** avg {avg:.2f} • p99 {rerolls.quantile(0.99) or 0:.0f}")
+
+    lag = LOOP_LAG_SECONDS.labels()
+    lines.append(f"🐢 **Event loop lag:** p50 {ms(lag.quantile(0.5))} • p99 {ms(lag.quantile(0.99))}")
+    return lines
@@ -0,0 +1,143 @@
+import config
+import logic
+
+# --- ODDS ENGINE ---
+# Dynamic programming over a coach's roster state:
+#   (pick_number, points_spent, count_300, count_260, count_240)
+# For every reachable state we store the distribution of what is still
+# to come (tiers per future pick, final points). Built once per config
+# off the event loop; a lookup during the draft is a dict get.
+#
+# The DP is exact for a simplified draft, not the live one: it assumes
+# the coach keeps every first roll, tiers weigh their fixed TIER_PROBS
+# and the pool never runs dry. Rerolls, TIER_WEIGHTS = "remaining" and
+# empty-tier fallbacks all move the real odds, so the embed says so.
+
+TIERS = sorted(config.TIER_PROBS, reverse=True)
+N_TIERS = len(TIERS)
+N_POINTS = config.MAX_POINTS // config.MIN_TIER_COST + 1
+ROLL_AT = N_POINTS                                   # [pick][tier] chance of rolling tier
+ALLOWED_AT = ROLL_AT + config.TOTAL_POKEMON * N_TIERS  # [pick][tier] chance tier is allowed
+VECTOR_LEN = ALLOWED_AT + config.TOTAL_POKEMON * N_TIERS
+
+
+class StateOdds:
+    """Read-only view over one state's vector"""
+
+    def __init__(self, key, vec):
+        self.key = key
+        self.vec = vec
+
+    def final_points(self):
+        """{total_points: probability}"""
+        return {i * config.MIN_TIER_COST: p for i, p in enumerate(self.vec[:N_POINTS]) if p > 0}
+
+    def tier_odds(self, pick_number):
+        """{tier: probability of rolling it at that pick}"""
+        base = ROLL_AT + (pick_number - 1) * N_TIERS
+        return {t: self.vec[base + i] for i, t in enumerate(TIERS)}
+
+    def allowed_odds(self, pick_number):
+        """{tier: probability it is still allowed (rules + cap) at that pick}"""
+        base = ALLOWED_AT + (pick_number - 1) * N_TIERS
+        return {t: self.vec[base + i] for i, t in enumerate(TIERS)}
+
+    def expected_points(self):
+        return sum(pts * p for pts, p in self.final_points().items())
+
+    def points_percentile(self, q):
+        acc = 0.0
+        for pts, p in sorted(self.final_points().items()):
+            acc += p
+            if acc >= q:
+                return pts
+        return config.MAX_POINTS
+
+
+class OddsTable:
+    def __init__(self, states):
+        self.states = states  # {key: vector}
+
+    def __len__(self):
+        return len(self.states)
+
+    def lookup(self, pick_number, points_spent, count_300, count_260, count_240):
+        key = state_key(pick_number, points_spent, count_300, count_260, count_240)
+        vec = self.states.get(key)
+        return StateOdds(key, vec) if vec is not None else None
+
+
+def state_key(pick_number, points_spent, count_300, count_260, count_240):
+    # The rules only look at "any" / "2 or more", so clip the counts
+    return (pick_number, points_spent, min(count_300, 2), min(count_260, 2), min(count_240, 2))
+
+
+def config_signature():
+    return (tuple(sorted(config.TIER_PROBS.items())), config.MAX_POINTS,
+            config.MIN_TIER_COST, config.TOTAL_POKEMON)
+
+
+def build_table():
+    """Solves every state reachable from an empty roster. CPU-bound: run it in an executor."""
+    states = {}
+    tier_pos = {t: i for i, t in enumerate(TIERS)}
+
+    def solve(key):
+        vec = states.get(key)
+        if vec is not None:
+            return vec
+
+        pick, points, c300, c260, c240 = key
+        vec = [0.0] * VECTOR_LEN
+        valid = logic.allowed_tiers(c300, c260, c240, points, pick) if pick <= config.TOTAL_POKEMON else []
+        total = sum(config.TIER_PROBS[t] for t in valid)
+
+        if total == 0:
+            # Roster complete (or nothing rollable): points are final
+            vec[points // config.MIN_TIER_COST] = 1.0
+            states[key] = vec
+            return vec
+
+        for t in valid:
+            vec[ALLOWED_AT + (pick - 1) * N_TIERS + tier_pos[t]] = 1.0
+
+        for t in valid:
+            w = config.TIER_PROBS[t] / total
+            vec[ROLL_AT + (pick - 1) * N_TIERS + tier_pos[t]] += w
+            child = solve(state_key(pick + 1, points + t,
+                                    c300 + (t == 300), c260 + (t == 260), c240 + (t == 240)))
+            for i, x in enumerate(child):
+                if x:
+                    vec[i] += w * x
+
+        states[key] = vec
+        return vec
+
+    solve(state_key(1, 0, 0, 0, 0))
+    return OddsTable(states)
+
+
+# --- CACHE (one table per config) ---
+_tables = {}
+
+
+def get_table():
+    """Returns the table for the current config, or None if it hasn't been built yet"""
+    return _tables.get(config_signature())
+
+
+def ensure_table():
+    table = get_table()
+    if table is None:
+        table = build_table()
+        _tables[config_signature()] = table
+    return table
+
+
+def lookup_for(session, user_id, table):
+    """Odds for a coach's current roster in `session` (None once the roster is full, or off the solved states)"""
+    coach = session.coaches[user_id]
+    pick_number = coach.picks + 1
+    if pick_number > config.TOTAL_POKEMON:
+        return None
+    return table.lookup(pick_number, coach.points, *coach.high_counts())
@@ -0,0 +1,205 @@
+import asyncio
+import collections
+import logging
+import re
+import time
+
+import discord
+
+import metrics
+
+# --- OUTBOUND MESSAGE PIPELINE ---
+# One queue + worker per channel. Sends go out in order, edits to a message
+# that haven't gone out yet are merged into one (latest values win). The
+# worker only lives while there is something queued, and a draft drops its
+# channel's outbox when it ends (discard), so idle channels cost nothing.
+# Retries are left to discord.py: it sleeps through 429s and retries 5xx on
+# its own, so a request here is one call and 429s are counted from its log.
+
+
+class LiveMessage:
+    """Handle to a message the outbox will send; edits can be queued before it exists"""
+
+    def __init__(self):
+        self.message = None
+        self.sent = asyncio.get_running_loop().create_future()
+
+
+class _Op:
+    __slots__ = ("kind", "handle", "kwargs", "interaction", "future")
+
+    def __init__(self, kind, handle, kwargs, interaction=None):
+        self.kind = kind
+        self.handle = handle
+        self.kwargs = kwargs
+        self.interaction = interaction
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class Outbox:
+    def __init__(self, channel):
+        self.channel = channel
+        self.ops = collections.deque()
+        self.pending = {}  # LiveMessage -> its queued op (what new edits merge into)
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.worker = None
+
+        # Counters (!io_stats)
+        self.api_calls = 0          # channel send / edit requests
+        self.interaction_calls = 0  # button responses (not in the channel's rate limit bucket)
+        self.coalesced = 0
+        self.rate_limited = 0       # 429s discord.py slept through (RateLimitLog)
+
+    # --- PUBLIC API ---
+    def send(self, content=None, **kwargs):
+        """Queues a new message. Returns its LiveMessage (await `.sent` for the Message)."""
+        handle = LiveMessage()
+        kwargs["content"] = content
+        self._push(_Op("send", handle, kwargs))
+        return handle
+
+    def edit(self, handle, interaction=None, **kwargs):
+        """
+        Queues an edit. If the message (or an earlier edit of it) is still
+        queued, this one is merged into it instead of costing another call.
+        With `interaction`, the edit is sent as that button click's response.
+        Returns a future that resolves once the edit went out.
+        """
+        op = self.pending.get(handle)
+        # A click must be answered by an edit op, and each click by its own op
+        mergeable = op is not None and (
+            interaction is None or (op.kind == "edit" and op.interaction in (None, interaction)))
+        if mergeable:
+            op.kwargs.update(kwargs)
+            if op.kind == "send":
+                if op.kwargs.get("view", ...) is None:
+                    del op.kwargs["view"]
+                # A message that hasn't gone out yet takes its files directly
+                if "attachments" in op.kwargs:
+                    op.kwargs["files"] = op.kwargs.pop("attachments")
+            if interaction is not None:
+                op.interaction = interaction
+            self.coalesced += 1
+            return op.future
+
+        self._push(_Op("edit", handle, kwargs, interaction))
+        return self.ops[-1].future
+
+    async def flush(self):
+        """Waits until everything queued so far went out"""
+        await self.idle.wait()
+
+    # --- WORKER ---
+    def _push(self, op):
+        self.ops.append(op)
+        self.pending[op.handle] = op
+        self.idle.clear()
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        """Drains the queue, then exits (_push starts a new worker for the next op)"""
+        while self.ops:
+            op = self.ops.popleft()
+            if self.pending.get(op.handle) is op:
+                del self.pending[op.handle]
+
+            try:
+                result = await self._execute(op)
+            except Exception as e:
+                print(f"❌ Outbox ({self.channel.id}): {op.kind} failed: {e}")
+                if not op.handle.sent.done():
+                    op.handle.sent.set_exception(e)
+                    op.handle.sent.exception()  # Mark retrieved: nobody has to await it
+                op.future.set_exception(e)
+                op.future.exception()
+            else:
+                op.future.set_result(result)
+        self.idle.set()
+
+    async def _execute(self, op):
+        if op.kind == "send":
+            message = await self._call("send", lambda: self.channel.send(**op.kwargs), op.kwargs.get("files", ()))
+            op.handle.message = message
+            op.handle.sent.set_result(message)
+            return message
+
+        if op.interaction is not None and not op.interaction.response.is_done():
+            try:
+                with metrics.timer(metrics.DISCORD_SECONDS.labels("interaction")):
+                    await op.interaction.response.edit_message(**op.kwargs)
+                self.interaction_calls += 1
+                return op.handle.message
+            except (discord.NotFound, discord.InteractionResponded) as e:
+                metrics.DISCORD_ERRORS.labels("interaction", str(getattr(e, "status", "responded"))).inc()
+                # Token expired / already answered: fall back to a normal edit
+                # (the failed response may already have read the attachments)
+                _rewind(op.kwargs.get("attachments", ()))
+
+        message = await op.handle.sent
+        return await self._call("edit", lambda: message.edit(**op.kwargs), op.kwargs.get("attachments", ()))
+
+    async def _call(self, kind, request, files=()):
+        """One API request (discord.py already waits out 429s and retries 5xx)"""
+        self.api_calls += 1
+        # discord.py only seeks back on its own retries, not on its first try
+        _rewind(files)
+        started = time.perf_counter()
+        try:
+            return await request()
+        except discord.HTTPException as e:
+            metrics.DISCORD_ERRORS.labels(kind, str(e.status)).inc()
+            raise
+        finally:
+            metrics.DISCORD_SECONDS.labels(kind).observe(time.perf_counter() - started)
+
+
+def _rewind(files):
+    """Seeks every discord.File back to its start before it is (re)sent"""
+    for f in files:
+        if isinstance(f, discord.File):
+            f.reset()
+
+
+# --- REGISTRY ---
+# {channel_id: Outbox}
+outboxes = {}
+
+
+def for_channel(channel):
+    box = outboxes.get(channel.id)
+    if box is None:
+        box = Outbox(channel)
+        outboxes[channel.id] = box
+    return box
+
+
+async def discard(box):
+    """Draft over: waits for its last messages, then drops the channel's outbox"""
+    await box.flush()
+    if outboxes.get(box.channel.id) is box:
+        del outboxes[box.channel.id]
+
+
+# --- RATE LIMITS ---
+
+class RateLimitLog(logging.Handler):
+    """
+    discord.py handles 429s inside HTTPClient.request and only logs them
+    ("We are being rate limited. <method> <url> responded with 429...").
+    Counts those, per channel when the URL names one of our outboxes.
+    """
+    CHANNEL_URL = re.compile(r"/channels/(\d+)")
+
+    def emit(self, record):
+        if not str(record.msg).startswith("We are being rate limited"):
+            return
+        metrics.RATE_LIMITED.inc()
+        match = self.CHANNEL_URL.search(str(record.args[1])) if len(record.args) > 1 else None
+        box = outboxes.get(int(match.group(1))) if match else None
+        if box is not None:
+            box.rate_limited += 1
+
+
+logging.getLogger("discord.http").addHandler(RateLimitLog(logging.WARNING))
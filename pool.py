@@ -0,0 +1,260 @@
+import csv
+import hashlib
+import os
+import random
+import struct
+import sys
+import zlib
+from array import array
+
+import config
+
+FLAG_MEGA = 1
+
+
+# --- INDEX (built once at load time) ---
+
+class PoolIndex:
+    """Immutable view of the Pokémon pool: id -> name/tier/flags and tier -> ids"""
+
+    def __init__(self, names, tiers, flags=None, checksum=""):
+        self.names = tuple(names)
+        self.tiers = array('h', tiers)
+        self.flags = array('B', flags if flags is not None else bytes(len(self.names)))
+        self.checksum = checksum  # sha256 of the source CSV
+        self.version = 0  # Set by logic.swap_pool
+        self.ids = {name: i for i, name in enumerate(self.names)}
+
+        by_tier = {}
+        for i, tier in enumerate(self.tiers):
+            by_tier.setdefault(tier, []).append(i)
+        self.by_tier = {tier: tuple(ids) for tier, ids in by_tier.items()}
+
+    def __len__(self):
+        return len(self.names)
+
+
+# --- AVAILABILITY (one per draft) ---
+
+class Availability:
+    """
+    Candidates still available per tier.
+
+    Every tier keeps a compact list of ids plus each id's position in it,
+    so taking, restoring and sampling are all O(1) (swap-with-last removal).
+    Tiers with nothing left are tracked as they empty / refill.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.slots = {tier: list(ids) for tier, ids in index.by_tier.items()}
+        self.pos = {}
+        self.restores = 0  # Bumped whenever an id comes back (speculative draws check it)
+        for ids in self.slots.values():
+            for p, pid in enumerate(ids):
+                self.pos[pid] = p
+        self.empty = {tier for tier in config.TIER_PROBS if not self.slots.get(tier)}
+
+    def is_available(self, pid):
+        return pid in self.pos
+
+    def count(self, tier):
+        return len(self.slots.get(tier, ()))
+
+    def take(self, pid):
+        """Removes an id from its tier. Returns False if it was already gone."""
+        p = self.pos.pop(pid, None)
+        if p is None:
+            return False
+
+        tier = self.index.tiers[pid]
+        ids = self.slots[tier]
+        last = ids.pop()
+        if last != pid:
+            ids[p] = last
+            self.pos[last] = p
+        if not ids:
+            self.empty.add(tier)
+        return True
+
+    def restore(self, pid):
+        """Puts an id back into its tier (no-op if it is already there)."""
+        if pid in self.pos:
+            return
+        tier = self.index.tiers[pid]
+        ids = self.slots[tier]
+        self.pos[pid] = len(ids)
+        ids.append(pid)
+        self.empty.discard(tier)
+        self.restores += 1
+
+    def nonempty(self, tiers):
+        """`tiers` without the empty ones (the same tuple back while nothing is empty)"""
+        if not self.empty:
+            return tiers
+        return tuple(t for t in tiers if t not in self.empty)
+
+    def sample(self, tier, rng=random):
+        ids = self.slots.get(tier)
+        if not ids:
+            return None
+        return ids[rng.randrange(len(ids))]
+
+
+# --- COMPILED POOL FILE ---
+# Layout (little endian):
+#   header  MAGIC, format version, row count, CSV mtime, CSV size, CSV sha256, payload crc32
+#   payload name offsets (uint32 * (count + 1)) | tiers (int16 * count) | flags (uint8 * count) | names (utf-8)
+
+MAGIC = b"KKPL"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHIdQ32sI")
+
+
+def file_sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def read_csv_rows(csv_path):
+    """Returns [(name, tier, flags)], validating duplicates and unknown tiers"""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [h.strip().lower() for h in next(reader)]
+        try:
+            name_col, tier_col = header.index("name"), header.index("tier")
+        except ValueError:
+            raise ValueError(f"{csv_path}: needs 'Name' and 'Tier' columns, got {header}")
+        mega_col = header.index("mega") if "mega" in header else None
+
+        rows, seen, errors = [], set(), []
+        for line_no, row in enumerate(reader, start=2):
+            if not row or not row[name_col].strip():
+                continue
+            name = row[name_col].strip()
+            try:
+                tier = int(row[tier_col])
+            except ValueError:
+                errors.append(f"line {line_no}: bad tier {row[tier_col]!r} for {name}")
+                continue
+
+            if tier not in config.TIER_PROBS:
+                errors.append(f"line {line_no}: unknown tier {tier} for {name}")
+            if name in seen:
+                errors.append(f"line {line_no}: duplicate name {name}")
+            seen.add(name)
+
+            flags = FLAG_MEGA if mega_col is not None and row[mega_col].strip().upper() == "Y" else 0
+            rows.append((name, tier, flags))
+
+    if errors:
+        raise ValueError(f"{csv_path}: {len(errors)} invalid rows\n" + "\n".join(errors))
+    return rows
+
+
+def compile_pool(csv_path=config.CSV_FILE, pool_path=config.POOL_FILE):
+    """CSV -> compact binary pool. Raises ValueError on duplicates / unknown tiers."""
+    rows = read_csv_rows(csv_path)
+
+    offsets = array('I', [0])
+    blob = bytearray()
+    for name, _, _ in rows:
+        blob += name.encode("utf-8")
+        offsets.append(len(blob))
+    tiers = array('h', (tier for _, tier, _ in rows))
+    flags = array('B', (f for _, _, f in rows))
+
+    payload = offsets.tobytes() + tiers.tobytes() + flags.tobytes() + bytes(blob)
+    stat = os.stat(csv_path)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(rows), stat.st_mtime, stat.st_size,
+                         file_sha256(csv_path), zlib.crc32(payload))
+
+    tmp_path = pool_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header + payload)
+    os.replace(tmp_path, pool_path)
+    return len(rows)
+
+
+def read_header(pool_path):
+    with open(pool_path, "rb") as f:
+        data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        return None
+    fields = HEADER.unpack(data)
+    return fields if fields[0] == MAGIC and fields[1] == FORMAT_VERSION else None
+
+
+def is_stale(csv_path, pool_path):
+    """
+    True if the compiled pool is missing, from another format, or doesn't
+    match the CSV. False without a CSV (only the .pool deployed, or the CSV
+    mid-edit): there is nothing to rebuild from.
+    """
+    if not os.path.exists(csv_path):
+        return False
+    if not os.path.exists(pool_path):
+        return True
+    header = read_header(pool_path)
+    if header is None:
+        return True
+    _, _, _, mtime, size, sha, _ = header
+    try:
+        stat = os.stat(csv_path)
+        if stat.st_mtime != mtime or stat.st_size != size:
+            return True
+        return file_sha256(csv_path) != sha
+    except FileNotFoundError:
+        return False  # Removed between the checks
+
+
+def read_pool(pool_path):
+    """Binary pool -> PoolIndex (no CSV parsing)"""
+    with open(pool_path, "rb") as f:
+        data = f.read()
+
+    if len(data) < HEADER.size:
+        raise ValueError(f"{pool_path}: truncated header")
+    magic, version, count, _, _, sha, crc = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{pool_path}: not a v{FORMAT_VERSION} pool file ({magic!r} v{version})")
+    payload = memoryview(data)[HEADER.size:]
+    if zlib.crc32(payload) != crc:
+        raise ValueError(f"{pool_path}: checksum mismatch")
+
+    pos = 0
+    offsets = array('I')
+    offsets.frombytes(payload[pos:pos + 4 * (count + 1)])
+    pos += 4 * (count + 1)
+    tiers = array('h')
+    tiers.frombytes(payload[pos:pos + 2 * count])
+    pos += 2 * count
+    flags = array('B')
+    flags.frombytes(payload[pos:pos + count])
+    pos += count
+
+    blob = bytes(payload[pos:])
+    names = [sys.intern(blob[offsets[i]:offsets[i + 1]].decode("utf-8")) for i in range(count)]
+    return PoolIndex(names, tiers, flags, checksum=sha.hex())
+
+
+def load_pool(csv_path=config.CSV_FILE, pool_path=config.POOL_FILE):
+    """Loads the compiled pool, rebuilding it first if the CSV changed (or the file is unreadable)"""
+    have_csv = os.path.exists(csv_path)
+    if have_csv and is_stale(csv_path, pool_path):
+        compile_pool(csv_path, pool_path)
+    try:
+        return read_pool(pool_path)
+    except ValueError:
+        if not have_csv:
+            raise
+        # Corrupt / other format despite a matching header check: build it again
+        compile_pool(csv_path, pool_path)
+        return read_pool(pool_path)
+
+
+if __name__ == "__main__":
+    # Build step: python pool.py [csv] [out]
+    src = sys.argv[1] if len(sys.argv) > 1 else config.CSV_FILE
+    dst = sys.argv[2] if len(sys.argv) > 2 else config.POOL_FILE
+    print(f"✅ Compiled {compile_pool(src, dst)} rows: {src} -> {dst}")
@@ -0,0 +1,134 @@
+import collections
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+import config
+
+# --- ON-DEMAND PROFILER ---
+# A background thread samples the event loop thread's stack every
+# PROFILE_INTERVAL seconds (sys._current_frames, no tracing hooks), and
+# tracemalloc records allocations while a session is open. Nothing runs
+# while it is off. Reports go to PROFILE_DIR:
+#   <stamp>.collapsed  "frame;frame;frame count" (flamegraph.pl / speedscope)
+#   <stamp>.alloc.txt  top allocation sites + growth since start
+
+
+class Profiler:
+    def __init__(self):
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.target = None  # Thread id being sampled (the event loop's)
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.started_at = None
+        self.deadline = None
+        self.snapshot = None
+        self.owns_tracemalloc = False
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds=config.PROFILE_MAX_SECONDS, interval=config.PROFILE_INTERVAL, trace_allocations=True):
+        """Starts sampling the calling thread. Stops by itself after `seconds`."""
+        if self.running:
+            raise RuntimeError("Profiler already running")
+
+        self.target = threading.get_ident()
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self.started_at = time.time()
+        self.deadline = time.monotonic() + min(seconds, config.PROFILE_MAX_SECONDS)
+        self.stop_event.clear()
+
+        self.owns_tracemalloc = trace_allocations and not tracemalloc.is_tracing()
+        if self.owns_tracemalloc:
+            tracemalloc.start(config.PROFILE_TRACEBACK_DEPTH)
+        self.snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+
+        self.thread = threading.Thread(target=self._run, args=(interval,), name="kokoloko-profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stops sampling and writes the reports. Returns their paths."""
+        if self.thread is None:
+            raise RuntimeError("Profiler is not running")
+        self.stop_event.set()
+        self.thread.join()
+        self.thread = None
+        return self.write_reports()
+
+    # --- SAMPLER THREAD ---
+    def _run(self, interval):
+        while not self.stop_event.wait(interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+                self.samples += 1
+            if time.monotonic() >= self.deadline:
+                break
+
+    # --- REPORTS ---
+    def write_reports(self):
+        os.makedirs(config.PROFILE_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started_at))
+        base = os.path.join(config.PROFILE_DIR, stamp)
+        paths = []
+
+        with open(f"{base}.collapsed", "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        paths.append(f"{base}.collapsed")
+
+        if tracemalloc.is_tracing():
+            current = tracemalloc.take_snapshot()
+            with open(f"{base}.alloc.txt", "w", encoding="utf-8") as f:
+                f.write(allocation_report(current, self.snapshot))
+            paths.append(f"{base}.alloc.txt")
+            if self.owns_tracemalloc:
+                tracemalloc.stop()
+        self.snapshot = None
+        return paths
+
+    def top_functions(self, n=5):
+        """[(function, % of samples)] by self time (innermost frame)"""
+        own = collections.Counter()
+        for stack, count in self.stacks.items():
+            own[stack.rsplit(";", 1)[-1]] += count
+        return [(name, count / self.samples * 100) for name, count in own.most_common(n)] if self.samples else []
+
+
+def collapse(frame):
+    """Stack as "outer;...;inner" with module:function names"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        module = os.path.splitext(os.path.basename(code.co_filename))[0]
+        names.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def allocation_report(current, baseline=None, limit=config.PROFILE_TOP_ALLOCATIONS):
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+    current = current.filter_traces(ignore)
+    lines = ["=== Top allocation sites (live now) ==="]
+    for stat in current.statistics("traceback")[:limit]:
+        lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        lines.extend(f"    {line}" for line in stat.traceback.format())
+
+    if baseline is not None:
+        lines.append("\n=== Growth since !profile start ===")
+        for stat in current.compare_to(baseline.filter_traces(ignore), "lineno")[:limit]:
+            lines.append(str(stat))
+
+    size, peak = tracemalloc.get_traced_memory()
+    lines.append(f"\nTraced: {size / 1024:.1f} KiB now, {peak / 1024:.1f} KiB peak")
+    return "\n".join(lines) + "\n"
+
+
+# Only one profiling window at a time
+profiler = Profiler()
@@ -0,0 +1,70 @@
+import functools
+
+import config
+
+
+# --- ALIAS SAMPLER (Walker / Vose) ---
+
+class AliasTable:
+    """
+    O(1) weighted draws: one uniform index + one biased coin per draw,
+    no matter how many outcomes there are. Built once per weight set.
+    """
+
+    def __init__(self, items, weights):
+        n = len(items)
+        total = float(sum(weights))
+        if n == 0 or total <= 0:
+            raise ValueError("AliasTable needs at least one positive weight")
+
+        self.items = tuple(items)
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+
+        # Leftovers are 1.0 up to float rounding
+        for i in large + small:
+            self.prob[i] = 1.0
+
+    def __len__(self):
+        return len(self.items)
+
+    def draw(self, rng):
+        i = rng.randrange(len(self.items))
+        return self.items[i] if rng.random() < self.prob[i] else self.items[self.alias[i]]
+
+    def draw_many(self, k, rng):
+        """k independent draws in one pass (bulk auto-picks)"""
+        n = len(self.items)
+        items, prob, alias = self.items, self.prob, self.alias
+        randrange, random = rng.randrange, rng.random
+        out = []
+        for _ in range(k):
+            i = randrange(n)
+            out.append(items[i] if random() < prob[i] else items[alias[i]])
+        return out
+
+
+@functools.lru_cache(maxsize=config.SAMPLER_CACHE_SIZE)
+def tier_sampler(valid_tiers, weights=None):
+    """Cached alias table for one tuple of valid tiers and their weights (TIER_PROBS by default; None if all are 0)"""
+    if weights is None:
+        weights = [config.TIER_PROBS[t] for t in valid_tiers]
+    if not valid_tiers or sum(weights) <= 0:
+        return None
+    return AliasTable(valid_tiers, weights)
+
+
+def cache_stats():
+    return {"tier_sampler": tier_sampler.cache_info()}
@@ -0,0 +1,85 @@
+import asyncio
+import time
+
+import config
+import views
+
+# --- LIVE SUMMARY ---
+# One pinned scorecard per draft. After a pick only that coach's field is
+# re-rendered, and only the messages whose content changed are edited.
+
+
+class Scoreboard:
+    def __init__(self, session, out):
+        self.session = session
+        self.out = out
+        self.players = {p.id: p for p in views.summary_players(session)}
+        self.fields = {}     # {user_id: (name, value)}
+        self.messages = []   # [outbox.LiveMessage], one per page group
+        self.shown = []      # What each message currently shows (skips no-op edits)
+        self.last_pointer = 0.0
+
+    def publish(self):
+        """Renders every coach once and posts (and pins) the summary"""
+        for user_id, player in self.players.items():
+            self.fields[user_id] = views.summary_field(self.session, player)
+        self._sync()
+
+    def update(self, user_id):
+        """Re-renders one coach's field and edits whatever page it lands on"""
+        player = self.players.get(user_id)
+        if player is None:
+            return
+        self.fields[user_id] = views.summary_field(self.session, player)
+        self._sync()
+
+    def _sync(self):
+        chunks = views.paginate_summary([self.fields[u] for u in self.players])
+        groups = views.group_summary_pages(chunks)
+
+        for m, group in enumerate(groups):
+            content = (len(chunks), tuple(tuple(chunks[i]) for i in group))
+            if m < len(self.shown) and self.shown[m] == content:
+                continue
+
+            embeds = [views.create_summary_page(chunks[i], i + 1, len(chunks)) for i in group]
+            if m < len(self.messages):
+                self.out.edit(self.messages[m], embeds=embeds)
+                self.shown[m] = content
+            else:
+                handle = self.out.send(embeds=embeds)
+                self.messages.append(handle)
+                self.shown.append(content)
+                if m == 0:
+                    asyncio.create_task(self._pin(handle))
+
+        # The league shrank onto fewer pages (e.g. after an undo): blank the extras
+        for m in range(len(groups), len(self.shown)):
+            if self.shown[m] != ():
+                self.out.edit(self.messages[m], content="📊 *(página vacía)*", embeds=[])
+                self.shown[m] = ()
+
+    async def _pin(self, handle):
+        try:
+            message = await handle.sent
+            await message.pin()
+        except Exception as e:
+            print(f"⚠️ Scoreboard: could not pin summary ({e})")
+
+    async def jump_url(self):
+        """Link to the first page (None if it never made it out)"""
+        if not self.messages:
+            return None
+        try:
+            message = await self.messages[0].sent
+        except Exception:
+            return None
+        return message.jump_url
+
+    def should_point(self):
+        """Coalesces !summary spam: only one pointer reply per window"""
+        now = time.monotonic()
+        if now - self.last_pointer < config.SUMMARY_COALESCE_SECONDS:
+            return False
+        self.last_pointer = now
+        return True
@@ -0,0 +1,278 @@
+"""
+Monte Carlo draft simulator.
+
+Plays complete drafts with the real rules (logic.allowed_tiers), the real
+probabilities (config.TIER_PROBS) and the real pool (config.CSV_FILE).
+Thousands of drafts are rolled at once as NumPy arrays and the work is
+split across a process pool.
+
+    python simulate.py --drafts 100000 --coaches 8 16 24
+    python simulate.py --drafts 20000 --coaches 16 --reroll-below 100 --json sim.json
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import config
+import logic
+
+HIGH_TIERS = (300, 260, 240)
+
+
+# --- RULE TABLES ---
+
+def build_valid_table(tiers):
+    """
+    valid[c300, c260, c240, points, pick, tier_idx] -> bool
+
+    Filled by calling logic.allowed_tiers for every key, so the simulator
+    follows the bot's rules exactly. Counts are clipped at 2 (the rules
+    only look at "any" and "2 or more").
+    """
+    table = np.zeros((3, 3, 3, config.MAX_POINTS + 1, config.TOTAL_POKEMON + 1, len(tiers)), dtype=bool)
+    tier_pos = {t: i for i, t in enumerate(tiers)}
+    for c300 in range(3):
+        for c260 in range(3):
+            for c240 in range(3):
+                for pick in range(1, config.TOTAL_POKEMON + 1):
+                    for points in range(config.MAX_POINTS + 1):
+                        for t in logic.allowed_tiers(c300, c260, c240, points, pick):
+                            table[c300, c260, c240, points, pick, tier_pos[t]] = True
+    return table
+
+
+def build_fallback_table(tiers):
+    """fallback[c300, c260, c240, points, tier_idx] -> bool, from logic.fallback_tiers"""
+    table = np.zeros((3, 3, 3, config.MAX_POINTS + 1, len(tiers)), dtype=bool)
+    tier_pos = {t: i for i, t in enumerate(tiers)}
+    for c300 in range(3):
+        for c260 in range(3):
+            for c240 in range(3):
+                for points in range(config.MAX_POINTS + 1):
+                    for t in logic.fallback_tiers(c300, c260, c240, points):
+                        table[c300, c260, c240, points, tier_pos[t]] = True
+    return table
+
+
+# --- WORKER ---
+# Per-process copy of the (read-only) tables, set once by the pool initializer
+_shared = {}
+
+
+def init_worker(tiers, probs, pool_counts, valid, fallback_valid):
+    _shared.update(tiers=tiers, probs=probs, pool_counts=pool_counts, valid=valid, fallback_valid=fallback_valid)
+
+
+def simulate_chunk(args):
+    """Plays `n_drafts` drafts of `n_coaches` in lockstep and returns aggregate counters"""
+    n_drafts, n_coaches, reroll_below, seed = args
+    tiers, probs, pool_counts, valid, fallback_valid = (
+        _shared[k] for k in ("tiers", "probs", "pool_counts", "valid", "fallback_valid"))
+    rng = np.random.default_rng(seed)
+    n_tiers = len(tiers)
+    total = config.TOTAL_POKEMON
+    rows = np.arange(n_drafts)
+
+    idx_300, idx_260, idx_240 = (tiers.index(t) for t in HIGH_TIERS)
+    tiers_arr = np.asarray(tiers, dtype=np.int64)
+
+    remaining = np.tile(np.asarray(pool_counts, dtype=np.int64), (n_drafts, 1))
+    high = np.zeros((n_drafts, n_coaches, 3), dtype=np.int64)
+    points = np.zeros((n_drafts, n_coaches), dtype=np.int64)
+    picks = np.zeros((n_drafts, n_coaches), dtype=np.int64)
+    rerolls = np.zeros((n_drafts, n_coaches), dtype=np.int64)
+
+    tier_by_pick = np.zeros((total, n_tiers), dtype=np.int64)
+    empty_by_tier = np.zeros(n_tiers, dtype=np.int64)  # Rolls that had a valid tier ruled out as empty
+    fallback_by_tier = np.zeros(n_tiers, dtype=np.int64)
+    draft_hit_empty = np.zeros(n_drafts, dtype=bool)
+    lost_picks = 0
+    # Tiers are sorted high -> low: the cheapest one left is the last non-empty column
+    fallback = config.EMPTY_TIER_FALLBACK != "skip"
+    by_remaining = config.TIER_WEIGHTS != "fixed"
+    full = np.maximum(np.asarray(pool_counts, dtype=np.float64), 1)
+
+    order = list(range(n_coaches))
+    for rnd in range(1, total + 1):
+        for coach in order:
+            pick_num = picks[:, coach] + 1
+            live = pick_num <= total
+            burned = np.zeros((n_drafts, n_tiers), dtype=np.int64)
+            rolling = live.copy()
+            chosen = np.full(n_drafts, -1, dtype=np.int64)
+
+            while rolling.any():
+                h = np.minimum(high[:, coach], 2)
+                # Only an "any" fallback ends over the cap: the rules treat that like the cap itself
+                spent = np.minimum(points[:, coach], config.MAX_POINTS)
+                mask = valid[h[:, 0], h[:, 1], h[:, 2], spent, np.minimum(pick_num, total)]
+                # Same as logic.roll_odds: empty tiers drop out, the rest weighted by TIER_WEIGHTS
+                left = remaining - burned
+                has_left = left > 0
+                empty_by_tier += (mask & ~has_left)[rolling].sum(axis=0)
+                weights = mask * (left / full if by_remaining else has_left) * probs
+                sums = weights.sum(axis=1)
+
+                dead = rolling & (sums <= 0)
+                if dead.any():
+                    draft_hit_empty |= dead
+                    if fallback:
+                        # EMPTY_TIER_FALLBACK "cheapest": the cheapest tier left that fits the cap
+                        open_tiers = has_left & (probs > 0) & fallback_valid[h[:, 0], h[:, 1], h[:, 2], spent]
+                        if config.EMPTY_TIER_FALLBACK == "any":
+                            # Nothing fits: the cheapest tier left at all
+                            open_tiers = np.where(open_tiers.any(axis=1)[:, None], open_tiers, has_left & (probs > 0))
+                        cheapest = n_tiers - 1 - np.argmax(open_tiers[:, ::-1], axis=1)
+                        rescued = dead & open_tiers.any(axis=1)
+                        weights[rescued] = 0.0
+                        weights[rescued, cheapest[rescued]] = 1.0
+                        sums[rescued] = 1.0
+                        np.add.at(fallback_by_tier, cheapest[rescued], 1)
+                    # Nothing left at all (or "skip"): the pick is lost
+                    rolling &= sums > 0
+
+                u = rng.random(n_drafts) * sums
+                tier_idx = (weights.cumsum(axis=1) < u[:, None]).sum(axis=1)
+                tier_idx = np.minimum(tier_idx, n_tiers - 1)
+
+                reroll = rolling & (tiers_arr[tier_idx] < reroll_below) & (rerolls[:, coach] < config.MAX_REROLLS)
+                keep = rolling & ~reroll
+                chosen[keep] = tier_idx[keep]
+
+                rerolls[reroll, coach] += 1
+                np.add.at(burned, (rows[reroll], tier_idx[reroll]), 1)
+                rolling = reroll
+
+            got = chosen >= 0
+            lost_picks += int((live & ~got).sum())
+            d, t = rows[got], chosen[got]
+            remaining[d, t] -= 1
+            points[d, coach] += tiers_arr[t]
+            np.add.at(tier_by_pick, (pick_num[got] - 1, t), 1)
+            for k, idx in enumerate((idx_300, idx_260, idx_240)):
+                high[d, coach, k] += t == idx
+            picks[d, coach] += 1
+
+        order.reverse()
+
+    final_points = np.bincount(points.ravel() // config.MIN_TIER_COST,
+                               minlength=config.MAX_POINTS // config.MIN_TIER_COST + 1)
+    return {
+        "final_points": final_points,
+        "tier_by_pick": tier_by_pick,
+        "empty_by_tier": empty_by_tier,
+        "fallback_by_tier": fallback_by_tier,
+        "drafts_hit_empty": int(draft_hit_empty.sum()),
+        "lost_picks": lost_picks,
+    }
+
+
+# --- DRIVER ---
+
+def run(n_drafts, n_coaches, workers, reroll_below=0, seed=None, chunk=2000):
+    if logic.pool_index.names == ():
+        logic.load_data()
+
+    tiers = sorted(config.TIER_PROBS, reverse=True)
+    probs = np.asarray([config.TIER_PROBS[t] for t in tiers], dtype=np.float64)
+    pool_counts = [len(logic.pool_index.by_tier.get(t, ())) for t in tiers]
+    valid = build_valid_table(tiers)
+    fallback_valid = build_fallback_table(tiers)
+
+    sizes = [chunk] * (n_drafts // chunk)
+    if n_drafts % chunk:
+        sizes.append(n_drafts % chunk)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(n, n_coaches, reroll_below, s) for n, s in zip(sizes, seeds)]
+
+    total = None
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(tiers, probs, pool_counts, valid, fallback_valid)) as executor:
+        for part in executor.map(simulate_chunk, jobs):
+            if total is None:
+                total = part
+            else:
+                for k in total:
+                    total[k] = total[k] + part[k]
+
+    return summarize(total, tiers, n_drafts, n_coaches)
+
+
+def summarize(total, tiers, n_drafts, n_coaches):
+    hist = total["final_points"]
+    values = np.arange(len(hist)) * config.MIN_TIER_COST
+    cdf = np.cumsum(hist) / hist.sum()
+    percentile = lambda q: int(values[np.searchsorted(cdf, q)])
+
+    tier_by_pick = total["tier_by_pick"]
+    per_pick = tier_by_pick / np.maximum(tier_by_pick.sum(axis=1, keepdims=True), 1)
+
+    return {
+        "drafts": n_drafts,
+        "coaches": n_coaches,
+        "tiers": tiers,
+        "final_points": {
+            "mean": float((hist * values).sum() / hist.sum()),
+            "p5": percentile(0.05), "p50": percentile(0.50), "p95": percentile(0.95),
+            "histogram": {int(v): int(c) for v, c in zip(values, hist) if c},
+        },
+        "tier_pct_by_pick": [[round(float(x) * 100, 3) for x in row] for row in per_pick],
+        "exhaustion": {
+            "policy": config.EMPTY_TIER_FALLBACK,
+            "weights": config.TIER_WEIGHTS,
+            "draft_probability": total["drafts_hit_empty"] / n_drafts,
+            "events_by_tier": {int(t): int(c) for t, c in zip(tiers, total["empty_by_tier"]) if c},
+            "fallback_picks_per_draft": int(total["fallback_by_tier"].sum()) / n_drafts,
+            "fallback_tiers": {int(t): int(c) for t, c in zip(tiers, total["fallback_by_tier"]) if c},
+            "lost_picks_per_draft": total["lost_picks"] / n_drafts,
+        },
+    }
+
+
+def print_report(result):
+    fp = result["final_points"]
+    empty = result["exhaustion"]
+    print(f"\n=== {result['coaches']} coaches • {result['drafts']} drafts • {empty['weights']} weights ===")
+    print(f"Final points: mean {fp['mean']:.1f} | p5 {fp['p5']} | p50 {fp['p50']} | p95 {fp['p95']}")
+    print(f"All valid tiers empty: {empty['draft_probability'] * 100:.2f}% of drafts • "
+          f"fallback ({empty['policy']}) {empty['fallback_picks_per_draft']:.3f} picks/draft {empty['fallback_tiers']} • "
+          f"{empty['lost_picks_per_draft']:.3f} lost picks/draft")
+    print(f"Valid tiers ruled out as empty (rolls): {empty['events_by_tier']}")
+
+    print("Tier % per pick:")
+    print("pick " + "".join(f"{t:>7}" for t in result["tiers"]))
+    for i, row in enumerate(result["tier_pct_by_pick"], start=1):
+        print(f"{i:>4} " + "".join(f"{x:>7.2f}" for x in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo Kokoloko draft simulator")
+    parser.add_argument("--drafts", type=int, default=10000)
+    parser.add_argument("--coaches", type=int, nargs="+", default=[16])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--reroll-below", type=int, default=0,
+                        help="Coaches re-roll anything under this tier while they have re-rolls (0 = always keep)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for n_coaches in args.coaches:
+        started = time.perf_counter()
+        result = run(args.drafts, n_coaches, args.workers, args.reroll_below, args.seed)
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        print_report(result)
+        results.append(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import config
+
+
+# --- SLUGS (PokeAPI names, also the asset keys) ---
+
+def get_api_name(display_name):
+    """
+    Converts display names to PokeAPI format.
+    Examples:
+      "Mega Mewtwo Y" -> "mewtwo-mega-y"
+      "Galarian Darmanitan" -> "darmanitan-galar"
+      "Shaymin-Sky" -> "shaymin-sky"
+    """
+    name = str(display_name).lower().strip()
+
+    # 1. Replace special chars and spaces
+    name = name.replace('.', '').replace("'", '').replace(':', '').replace(' ', '-')
+
+    # 2. Handle Regional Prefixes (move to end)
+    prefixes = {
+        'alolan-': '-alola',
+        'galarian-': '-galar',
+        'hisuian-': '-hisui',
+        'paldean-': '-paldea'
+    }
+    for prefix, suffix in prefixes.items():
+        if name.startswith(prefix):
+            name = name.replace(prefix, '') + suffix
+            return name  # Usually regional forms don't have other suffixes
+
+    # 3. Handle Mega Evolutions (move 'mega' to the correct spot)
+    if name.startswith('mega-'):
+        parts = name.split('-')
+        # Case: Mega-Mewtwo-Y -> mewtwo-mega-y
+        if len(parts) == 3:
+            return f"{parts[1]}-mega-{parts[2]}"
+        # Case: Mega-Venusaur -> venusaur-mega
+        elif len(parts) == 2:
+            return f"{parts[1]}-mega"
+
+    # 4. Handle Gigantamax
+    if name.endswith('-gigantamax') or name.endswith('-gmax'):
+        return name.replace('-gigantamax', '-gmax')
+
+    # 5. Manual Overrides for tricky ones
+    overrides = {
+        'nidoran-f': 'nidoran-f',
+        'nidoran-m': 'nidoran-m',
+        'mime-jr': 'mime-jr',
+        'mr-mime': 'mr-mime',
+        'type:-null': 'type-null',
+        'farfetchd': 'farfetchd',
+        'flabebe': 'flabebe',
+        'zygarde-10%': 'zygarde-10',  # PokeAPI uses 'zygarde-10' or 'zygarde-10-power-construct'
+        'zygarde-complete': 'zygarde-complete',
+    }
+
+    return overrides.get(name, name)
+
+
+# --- PACKED SPRITE FILE ---
+# Built from fetch_sprites.py's cache so the bot never touches the network.
+# Layout (little endian):
+#   header  MAGIC, format version, entry count
+#   payload slug offsets (uint32 * (count + 1)) | blob offsets (uint64 * count)
+#           | blob sizes (uint32 * count) | slugs (utf-8) | PNG blobs (identical images stored once)
+
+MAGIC = b"KKSP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHI")
+
+
+def read_cache(cache_dir=config.SPRITE_CACHE_DIR):
+    """{slug: png bytes} for every sprite fetch_sprites.py has downloaded"""
+    index_dir = os.path.join(cache_dir, "index")
+    assets = {}
+    for filename in sorted(os.listdir(index_dir)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(index_dir, filename), encoding="utf-8") as f:
+            entry = json.load(f)
+        digest = entry.get("sha256")
+        if not digest:
+            continue  # 404 / no sprite
+        blob_path = os.path.join(cache_dir, "blobs", digest[:2], f"{digest}.png")
+        if os.path.exists(blob_path):
+            with open(blob_path, "rb") as f:
+                assets[filename[:-len(".json")]] = f.read()
+    return assets
+
+
+def pack_sprites(cache_dir=config.SPRITE_CACHE_DIR, pack_path=config.SPRITE_FILE):
+    assets = read_cache(cache_dir)
+    slugs = sorted(assets)
+
+    slug_offsets = array('I', [0])
+    slug_blob = bytearray()
+    for slug in slugs:
+        slug_blob += slug.encode("utf-8")
+        slug_offsets.append(len(slug_blob))
+
+    blobs, placed = bytearray(), {}
+    blob_offsets, blob_sizes = array('Q'), array('I')
+    for slug in slugs:
+        data = assets[slug]
+        if data not in placed:
+            placed[data] = len(blobs)
+            blobs += data
+        blob_offsets.append(placed[data])
+        blob_sizes.append(len(data))
+
+    payload = (slug_offsets.tobytes() + blob_offsets.tobytes() + blob_sizes.tobytes()
+               + bytes(slug_blob) + bytes(blobs))
+    tmp_path = pack_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(slugs)) + payload)
+    os.replace(tmp_path, pack_path)
+    return len(slugs), len(placed)
+
+
+# --- IN-MEMORY STORE ---
+
+class SpriteStore:
+    """slug -> PNG bytes, all in memory (or mmapped). Lookups never block on I/O."""
+
+    def __init__(self, data=b"", entries=None, mapped=False):
+        self.data = data
+        self.entries = entries or {}  # {slug: (absolute offset, size)}
+        self.mapped = mapped
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, slug):
+        entry = self.entries.get(slug)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        offset, size = entry
+        return self.data[offset:offset + size]
+
+    def get_for(self, name):
+        """Sprite for a pool display name (None -> caller falls back to text)"""
+        return self.get(get_api_name(name))
+
+    def memory_bytes(self):
+        """Approximate resident size: blob bytes (0 when mmapped, the OS pages them in) + index"""
+        index = sys.getsizeof(self.entries) + sum(sys.getsizeof(k) + 64 for k in self.entries)
+        return (0 if self.mapped else len(self.data)) + index
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "assets": len(self.entries),
+            "file_bytes": len(self.data),
+            "memory_bytes": self.memory_bytes(),
+            "mapped": self.mapped,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+def read_sprites(pack_path, use_mmap=False):
+    with open(pack_path, "rb") as f:
+        if use_mmap:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            data = f.read()
+
+    magic, version, count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{pack_path}: not a sprite pack (or another format version)")
+
+    pos = HEADER.size
+    slug_offsets = array('I')
+    slug_offsets.frombytes(data[pos:pos + 4 * (count + 1)])
+    pos += 4 * (count + 1)
+    blob_offsets = array('Q')
+    blob_offsets.frombytes(data[pos:pos + 8 * count])
+    pos += 8 * count
+    blob_sizes = array('I')
+    blob_sizes.frombytes(data[pos:pos + 4 * count])
+    pos += 4 * count
+
+    slug_blob = bytes(data[pos:pos + slug_offsets[-1]])
+    blobs_at = pos + slug_offsets[-1]
+    entries = {}
+    for i in range(count):
+        slug = slug_blob[slug_offsets[i]:slug_offsets[i + 1]].decode("utf-8")
+        entries[slug] = (blobs_at + blob_offsets[i], blob_sizes[i])
+    return SpriteStore(data, entries, mapped=use_mmap)
+
+
+def load_store(pack_path=config.SPRITE_FILE, use_mmap=config.SPRITE_MMAP):
+    """Loads the sprite pack; an empty store (text-only embeds) if there is none"""
+    if not os.path.exists(pack_path):
+        return SpriteStore()
+    return read_sprites(pack_path, use_mmap)
+
+
+# Set at startup by kokoloko.setup_hook
+store = SpriteStore()
+
+
+if __name__ == "__main__":
+    # Build step (after fetch_sprites.py): python sprites.py [cache_dir] [out]
+    src = sys.argv[1] if len(sys.argv) > 1 else config.SPRITE_CACHE_DIR
+    dst = sys.argv[2] if len(sys.argv) > 2 else config.SPRITE_FILE
+    count, unique = pack_sprites(src, dst)
+    print(f"✅ Packed {count} sprites ({unique} unique images): {src} -> {dst}")
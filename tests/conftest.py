@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+import logic  # noqa: E402
+import pool  # noqa: E402
+
+
+class Coach:
+    """Stand-in for a discord.Member (what the draft keeps: id + display name)"""
+
+    def __init__(self, user_id):
+        self.id = user_id
+        self.display_name = f"Coach {user_id}"
+
+
+def play_draft(session, rng, undo_at=None):
+    """Drives a draft through the same mutations as kokoloko.next_turn (random keep / re-roll)"""
+    turns = 0
+    while session.active:
+        if session.current_index >= len(session.order):
+            if session.round >= config.TOTAL_POKEMON:
+                session.finish()
+            else:
+                session.next_round()
+            continue
+
+        coach = session.coach_at(session.current_index)
+        pick_num = coach.picks + 1
+        if pick_num <= config.TOTAL_POKEMON:
+            session.clear_burned()
+            name, tier = logic.take_roll(session, coach.id, pick_num)
+            while name and coach.rerolls < config.MAX_REROLLS and rng.random() < 0.4:
+                session.reroll(coach.id, name)
+                name, tier = logic.take_roll(session, coach.id, pick_num)
+            if name:
+                session.commit_pick(coach.id, name, tier)
+        session.advance()
+
+        turns += 1
+        if turns == undo_at:
+            assert session.undo_last_pick() is not None
+
+
+def make_pool(per_tier):
+    """A synthetic pool with `per_tier` names in every tier"""
+    names, tiers = [], []
+    for tier in config.TIER_PROBS:
+        for i in range(per_tier):
+            names.append(f"Mon-{tier}-{i}")
+            tiers.append(tier)
+    return pool.PoolIndex(names, tiers, checksum=f"test-pool-{per_tier}")
+
+
+@pytest.fixture
+def small_pool():
+    """A synthetic pool with every tier, swapped in for the test (no CSV needed)"""
+    saved = logic.pool_index
+    logic.pool_index = make_pool(30)
+    yield logic.pool_index
+    logic.pool_index = saved
+
+
+@pytest.fixture
+def coaches():
+    return [Coach(100 + i) for i in range(4)]
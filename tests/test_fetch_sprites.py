@@ -0,0 +1,90 @@
+import json
+import struct
+import threading
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetch_sprites
+import sprites
+
+
+def png(rgb):
+    """A 1x1 PNG (the workbook embeds the images, so they have to be real ones)"""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(b"\x00" + bytes(rgb))) + chunk(b"IEND", b""))
+
+
+class PokeAPI(BaseHTTPRequestHandler):
+    """Local stand-in for PokeAPI + its sprite host. The first call for Pikachu fails with a 503."""
+
+    calls = Counter()
+    sprites = {"pikachu": png((255, 220, 0)), "mewtwo-mega-y": png((160, 100, 200))}
+
+    def do_GET(self):
+        self.calls[self.path] += 1
+        slug = self.path.rsplit("/", 1)[-1].removesuffix(".png")
+        if self.path == "/api/v2/pokemon/pikachu" and self.calls[self.path] == 1:
+            return self.reply(503, b"busy")
+        if slug not in self.sprites:
+            return self.reply(404, b"Not Found")
+        if self.path.startswith("/api/v2/pokemon/"):
+            host = f"http://127.0.0.1:{self.server.server_port}"
+            body = json.dumps({"sprites": {"front_default": f"{host}/sprites/{slug}.png"}}).encode()
+            return self.reply(200, body)
+        self.reply(200, self.sprites[slug])
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def pokeapi():
+    PokeAPI.calls.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PokeAPI)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/api/v2"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_retries_then_serves_from_cache(tmp_path, monkeypatch, capsys, pokeapi):
+    monkeypatch.setattr(fetch_sprites, "BACKOFF", 0)
+    csv_path = tmp_path / "pool.csv"
+    csv_path.write_text("Name,Tier\nPikachu,100\nMega Mewtwo Y,300\nFakemon,20\n", encoding="utf-8")
+    cache_dir = tmp_path / "cache"
+
+    def run(*extra):
+        monkeypatch.setattr("sys.argv", ["fetch_sprites.py", "--input", str(csv_path),
+                                         "--output", str(tmp_path / "sprites.xlsx"), "--base-url", pokeapi,
+                                         "--cache-dir", str(cache_dir), "--workers", "2", *extra])
+        fetch_sprites.main()
+        return capsys.readouterr().out.splitlines()[-1]
+
+    summary = run()
+    assert "not_found: 1, ok: 2; 0 from cache" in summary
+    # The 503 was retried by the session, not reported as an error
+    assert PokeAPI.calls["/api/v2/pokemon/pikachu"] == 2
+    calls = sum(PokeAPI.calls.values())
+
+    # Second run: everything (the 404 included) comes from the cache
+    assert "not_found: 1, ok: 2; 3 from cache" in run()
+    assert sum(PokeAPI.calls.values()) == calls
+    assert "3 from cache" in run("--offline")
+
+    # And the bot's pack is built from that same cache
+    pack_path = str(tmp_path / "sprites.pack")
+    sprites.pack_sprites(str(cache_dir), pack_path)
+    assert sprites.read_sprites(pack_path).get_for("Pikachu") == PokeAPI.sprites["pikachu"]
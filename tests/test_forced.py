@@ -0,0 +1,67 @@
+import asyncio
+
+import config
+import kokoloko
+import logic
+import outbox
+from loadtest import FakeChannel, FakeMember, Stats
+
+
+class EventLog:
+    """Journal stand-in: records (kind, user) for every event"""
+
+    def __init__(self):
+        self.events = []
+
+    def new_draft(self, key):
+        return 1
+
+    def append(self, draft_id, kind, data, lease=None):
+        self.events.append((kind, data.get("user")))
+        return len(self.events)
+
+    def save_snapshot(self, draft_id, seq, snapshot, lease=None):
+        pass
+
+
+def forced_session(small_pool, channel):
+    """Five coaches with no re-rolls left, the third one with a full roster"""
+    players = [FakeMember(i) for i in range(5)]
+    session = logic.DraftSession(logic.session_key(channel), players, seed=11, journal=EventLog())
+    logic.sessions.pop(session.key, None)
+    for coach in session.coaches.values():
+        coach.rerolls = config.MAX_REROLLS
+    cheapest = small_pool.by_tier[min(config.TIER_PROBS)]
+    full = session.coaches[players[2].id]
+    for pid in cheapest[:config.TOTAL_POKEMON]:
+        session.commit_pick(full.id, small_pool.names[pid], small_pool.tiers[pid], record=False)
+    return session
+
+
+def test_forced_run_matches_one_turn_at_a_time(small_pool):
+    async def play(batched):
+        channel = FakeChannel(1 if batched else 2, Stats())
+        session = forced_session(small_pool, channel)
+        if batched:
+            run = kokoloko.forced_run(session)
+            assert run == len(session.order) - 1
+            kokoloko.play_forced_run(session, channel, run)
+        else:
+            # What next_turn does for each of these turns
+            while session.current_index < len(session.order):
+                player = session.coach_at(session.current_index)
+                if player.picks < config.TOTAL_POKEMON:
+                    await kokoloko.play_turn(session, channel, player, player.picks + 1)
+                session.advance()
+        await outbox.discard(outbox.outboxes[channel.id])
+        return session
+
+    batched = asyncio.run(play(True))
+    single = asyncio.run(play(False))
+
+    assert batched.current_index == single.current_index == len(single.order)
+    assert [h[0] for h in batched.history] == [h[0] for h in single.history]
+    assert [h[3:] for h in batched.history] == [h[3:] for h in single.history]
+    assert batched.journal.events == single.journal.events
+    for user_id, coach in single.coaches.items():
+        assert batched.coaches[user_id].picks == coach.picks
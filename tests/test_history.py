@@ -0,0 +1,23 @@
+import asyncio
+
+import history
+import loadtest
+
+
+def test_every_roll_counted_once(tmp_path, small_pool):
+    # "reroll" coaches spend every re-roll, so their last pick of each turn is auto-accepted after a roll
+    history.writer = history.HistoryWriter(str(tmp_path / "history.db"))
+    history.writer.start()
+    try:
+        asyncio.run(loadtest.run(1, 4, 1, "reroll", seed=5, fast=True))
+    finally:
+        history.writer.close()
+        path, history.writer = history.writer.path, None
+
+    db = history.connect(path)
+    kinds = dict(db.execute("SELECT kind, COUNT(*) FROM events GROUP BY kind").fetchall())
+    assert kinds.get("auto") and kinds.get("reroll")
+    rolls, rerolls, picks = db.execute("SELECT SUM(rolls), SUM(rerolls), SUM(picks) FROM pokemon_stats").fetchone()
+    # Every roll ends either thrown back or on a roster
+    assert rolls == rerolls + picks
+    db.close()
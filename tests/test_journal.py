@@ -0,0 +1,25 @@
+import random
+
+import journal
+import logic
+
+from conftest import Coach, play_draft
+
+
+def test_replay_equals_live(tmp_path, small_pool, coaches):
+    draft_journal = journal.Journal(str(tmp_path / "drafts.db"))
+    key = (1, 42)
+    live = logic.DraftSession(key, coaches, seed=7, journal=draft_journal)
+    play_draft(live, random.Random(7), undo_at=13)
+
+    snapshot, events = draft_journal.load(draft_journal.latest_draft(key))
+    assert events, "the draft should have events after its last snapshot"
+    players = [Coach(user_id) for user_id in snapshot["order"]]
+    restored = logic.restore_draft(key, players, snapshot, events)
+    logic.sessions.pop(key, None)
+
+    assert restored.to_snapshot() == live.to_snapshot()
+    assert set(restored.availability.pos) == set(live.availability.pos)
+    for user_id, coach in live.coaches.items():
+        other = restored.coaches[user_id]
+        assert (other.points, other.rerolls, other.high) == (coach.points, coach.rerolls, coach.high)
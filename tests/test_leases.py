@@ -0,0 +1,64 @@
+import asyncio
+import sqlite3
+
+import config
+import kokoloko
+import leases
+
+
+class FlakyStore:
+    """The first pass hits a locked database, the next ones work"""
+
+    def __init__(self):
+        self.passes = 0
+
+    def acquire(self, name, owner):
+        return None  # Another worker answers the commands
+
+    def holders(self):
+        return {}
+
+    def orphaned(self):
+        self.passes += 1
+        if self.passes == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return []
+
+
+def test_keep_leases_survives_a_failed_pass(monkeypatch):
+    store = FlakyStore()
+    monkeypatch.setattr(kokoloko, "draft_leases", store)
+    monkeypatch.setattr(config, "LEASE_TTL", 0.03)
+
+    async def scenario():
+        task = asyncio.create_task(kokoloko.keep_leases())
+        await asyncio.sleep(0.1)
+        alive = not task.done()
+        task.cancel()
+        return alive
+
+    assert asyncio.run(scenario())
+    assert store.passes >= 2
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.guild = None
+
+
+class FakeContext:
+    def __init__(self, channel_id):
+        self.channel = FakeChannel(channel_id)
+
+
+def test_one_worker_answers_each_command(monkeypatch):
+    draft = leases.lease_name((None, 7))
+    monkeypatch.setattr(kokoloko, "lease_holders", {draft: "other:1", kokoloko.COMMANDS_LEASE: kokoloko.WORKER})
+    check = kokoloko.draft_owner_check
+
+    # The draft's owner answers in its channel; the commands lease holder everywhere else
+    assert not asyncio.run(check(FakeContext(7)))
+    assert asyncio.run(check(FakeContext(8)))
+    kokoloko.lease_holders[kokoloko.COMMANDS_LEASE] = "other:1"
+    assert not asyncio.run(check(FakeContext(8)))
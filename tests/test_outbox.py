@@ -0,0 +1,136 @@
+import asyncio
+import io
+import logging
+
+import discord
+
+import metrics
+import outbox
+
+
+class FakeMessage:
+    def __init__(self, channel):
+        self.channel = channel
+
+    async def edit(self, **kwargs):
+        self.channel.calls.append(("edit", kwargs))
+        return self
+
+
+class FakeChannel:
+    id = 1
+
+    def __init__(self):
+        self.calls = []
+
+    async def send(self, **kwargs):
+        self.calls.append(("send", kwargs))
+        return FakeMessage(self)
+
+
+def test_edits_merge_into_queued_send():
+    async def scenario():
+        channel = FakeChannel()
+        box = outbox.Outbox(channel)
+        handle = box.send("turn", embed="roll")
+        box.edit(handle, embed="decision", view="buttons")
+        box.edit(handle, embed="result", view=None)
+        await box.flush()
+        return channel, box
+
+    channel, box = asyncio.run(scenario())
+    assert channel.calls == [("send", {"content": "turn", "embed": "result"})]
+    assert box.coalesced == 2
+    assert box.api_calls == 1
+
+
+def test_edits_to_a_sent_message_merge_until_they_go_out():
+    async def scenario():
+        channel = FakeChannel()
+        box = outbox.Outbox(channel)
+        handle = box.send("turn", embed="roll")
+        await handle.sent
+        box.edit(handle, embed="a")
+        box.edit(handle, embed="b", view=None)
+        await box.flush()
+        return channel, box
+
+    channel, box = asyncio.run(scenario())
+    assert channel.calls == [
+        ("send", {"content": "turn", "embed": "roll"}),
+        ("edit", {"embed": "b", "view": None}),
+    ]
+    assert box.coalesced == 1
+
+
+class ExpiredResponse:
+    """An interaction response that reads the upload and then fails"""
+
+    def is_done(self):
+        return False
+
+    async def edit_message(self, **kwargs):
+        for f in kwargs.get("attachments", ()):
+            f.fp.read()
+        raise discord.InteractionResponded(None)
+
+
+class ExpiredInteraction:
+    response = ExpiredResponse()
+
+
+def test_fallback_edit_resends_files_from_the_start():
+    async def scenario():
+        channel = FakeChannel()
+        box = outbox.Outbox(channel)
+        handle = box.send("turn", embed="roll")
+        await handle.sent
+        upload = discord.File(io.BytesIO(b"sprite"), filename="sprite.png")
+        await box.edit(handle, interaction=ExpiredInteraction(), attachments=[upload])
+        return channel
+
+    channel = asyncio.run(scenario())
+    kind, kwargs = channel.calls[-1]
+    assert kind == "edit"
+    assert kwargs["attachments"][0].fp.read() == b"sprite"
+
+
+def test_rate_limits_counted_from_discord_log():
+    async def scenario():
+        channel = FakeChannel()
+        box = outbox.outboxes[channel.id] = outbox.Outbox(channel)
+        before = metrics.RATE_LIMITED.labels().value
+        log = logging.getLogger("discord.http")
+        log.warning("We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.",
+                    "POST", f"https://discord.com/api/v10/channels/{channel.id}/messages", 0.5)
+        log.warning("We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.",
+                    "POST", "https://discord.com/api/v10/webhooks/9/token/callback", 0.5)
+        log.warning("Global rate limit has been hit. Retrying in %.2f seconds.", 0.5)
+        outbox.outboxes.pop(channel.id)
+        return box, metrics.RATE_LIMITED.labels().value - before
+
+    box, counted = asyncio.run(scenario())
+    assert box.rate_limited == 1
+    assert counted == 2
+
+
+def test_worker_exits_when_idle_and_draft_end_drops_the_outbox():
+    async def scenario():
+        channel = FakeChannel()
+        box = outbox.for_channel(channel)
+        box.send("turn")
+        await box.flush()
+        await asyncio.sleep(0)
+        idle_worker_done = box.worker.done()
+
+        # Queued again later: a new worker picks it up
+        box.send("🏁 Draft Complete!")
+        await outbox.discard(box)
+        await asyncio.sleep(0)
+        return channel, box, idle_worker_done
+
+    channel, box, idle_worker_done = asyncio.run(scenario())
+    assert idle_worker_done
+    assert [kwargs["content"] for _, kwargs in channel.calls] == ["turn", "🏁 Draft Complete!"]
+    assert box.worker.done()
+    assert FakeChannel.id not in outbox.outboxes
@@ -0,0 +1,118 @@
+import random
+import struct
+
+import pytest
+
+import config
+import pool
+
+
+def write_csv(path, rows, header="Name,Tier,Mega"):
+    path.write_text("\n".join([header] + rows) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_no_csv_means_nothing_to_rebuild(tmp_path):
+    csv_path = write_csv(tmp_path / "pool.csv", ["Pikachu,100,N", "Mewtwo,300,N"])
+    pool_path = str(tmp_path / "pool.pool")
+    assert pool.is_stale(csv_path, pool_path)
+
+    pool.compile_pool(csv_path, pool_path)
+    assert not pool.is_stale(csv_path, pool_path)
+
+    # Only the compiled file deployed (or the CSV mid-edit): keep what is loaded
+    (tmp_path / "pool.csv").unlink()
+    assert not pool.is_stale(csv_path, pool_path)
+    assert len(pool.load_pool(csv_path, pool_path)) == 2
+
+
+def check_availability(avail, expected):
+    """Slots, positions and the empty set all agree with the ids we expect to be left"""
+    assert set(avail.pos) == expected
+    for tier, ids in avail.slots.items():
+        assert len(ids) == len(set(ids)) == avail.count(tier)
+        for p, pid in enumerate(ids):
+            assert avail.pos[pid] == p and avail.index.tiers[pid] == tier
+    assert avail.empty == {t for t in config.TIER_PROBS if avail.count(t) == 0}
+
+
+def test_availability_take_restore_sample(small_pool):
+    rng = random.Random(1)
+    avail = pool.Availability(small_pool)
+    expected = set(range(len(small_pool)))
+    check_availability(avail, expected)
+
+    for _ in range(5000):
+        pid = rng.randrange(len(small_pool))
+        if rng.random() < 0.6:
+            assert avail.take(pid) == (pid in expected)
+            expected.discard(pid)
+        else:
+            restores = avail.restores
+            avail.restore(pid)
+            assert avail.restores == restores + (pid not in expected)
+            expected.add(pid)
+        check_availability(avail, expected)
+
+        tier = small_pool.tiers[pid]
+        drawn = avail.sample(tier, rng)
+        if avail.count(tier):
+            assert drawn in expected and small_pool.tiers[drawn] == tier
+        else:
+            assert drawn is None
+
+
+def test_availability_empty_tiers(small_pool):
+    avail = pool.Availability(small_pool)
+    tiers = tuple(sorted(config.TIER_PROBS))
+    assert avail.nonempty(tiers) is tiers
+
+    for pid in small_pool.by_tier[300]:
+        avail.take(pid)
+    assert avail.empty == {300}
+    assert 300 not in avail.nonempty(tiers)
+    assert avail.sample(300) is None
+
+    avail.restore(small_pool.by_tier[300][0])
+    assert not avail.empty
+    assert avail.sample(300) == small_pool.by_tier[300][0]
+
+
+def test_compiled_pool_round_trip(tmp_path):
+    csv_path = write_csv(tmp_path / "pool.csv", ["Pikachu,100,N", "Charizard,240,Y", "Flabébé,140,N"])
+    pool_path = str(tmp_path / "pool.pool")
+    assert pool.compile_pool(csv_path, pool_path) == 3
+
+    index = pool.read_pool(pool_path)
+    assert index.names == ("Pikachu", "Charizard", "Flabébé")
+    assert list(index.tiers) == [100, 240, 140]
+    assert list(index.flags) == [0, pool.FLAG_MEGA, 0]
+    assert index.checksum == pool.file_sha256(csv_path).hex()
+
+
+@pytest.mark.parametrize("rows, error", [
+    (["Pikachu,100,N", "Pikachu,140,N"], "duplicate name Pikachu"),
+    (["Pikachu,100,N", "Mew,999,N"], "unknown tier 999"),
+    (["Pikachu,cien,N"], "bad tier"),
+])
+def test_compile_rejects_bad_rows(tmp_path, rows, error):
+    csv_path = write_csv(tmp_path / "pool.csv", rows)
+    pool_path = tmp_path / "pool.pool"
+    with pytest.raises(ValueError, match=error):
+        pool.compile_pool(csv_path, str(pool_path))
+    assert not pool_path.exists()
+
+
+def test_read_rejects_other_formats(tmp_path):
+    csv_path = write_csv(tmp_path / "pool.csv", ["Pikachu,100,N"])
+    pool_path = tmp_path / "pool.pool"
+    pool.compile_pool(csv_path, str(pool_path))
+    data = pool_path.read_bytes()
+
+    bad_version = data[:4] + struct.pack("<H", pool.FORMAT_VERSION + 1) + data[6:]
+    for bad in (b"XXXX" + data[4:], bad_version, data[:-1] + bytes([data[-1] ^ 1]), data[:10]):
+        pool_path.write_bytes(bad)
+        with pytest.raises(ValueError):
+            pool.read_pool(str(pool_path))
+        # With the CSV around, a bad file is just rebuilt
+        assert pool.load_pool(csv_path, str(pool_path)).names == ("Pikachu",)
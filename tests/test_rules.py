@@ -0,0 +1,141 @@
+import collections
+import random
+
+import config
+import logic
+import sampler
+
+from conftest import Coach, make_pool, play_draft
+
+
+def test_empty_tier_fallback_stays_under_the_cap(small_pool, coaches):
+    session = logic.DraftSession((1, 43), coaches, seed=3)
+    logic.sessions.pop(session.key, None)
+    coach = session.coaches[coaches[0].id]
+    # Pick 9 with 100 left: the rules allow up to 80 (20 reserved for pick 10)
+    coach.points = config.MAX_POINTS - 100
+    pick = config.TOTAL_POKEMON - 1
+    assert max(logic.get_valid_tiers(session, coach.id, pick)) == 80
+
+    for pid, tier in enumerate(small_pool.tiers):
+        if tier <= 80:
+            session.availability.take(pid)
+
+    # "cheapest" gives up the reserve, never the cap
+    assert logic.get_valid_tiers(session, coach.id, pick) == (100,)
+    for pid, tier in enumerate(small_pool.tiers):
+        if tier == 100:
+            session.availability.take(pid)
+    # Nothing left under the cap: the pick is lost
+    valid = logic.get_valid_tiers(session, coach.id, pick)
+    assert logic.roll_pokemon(session, valid) == (None, "EMPTY_TIER_POOL")
+
+
+def play_out(monkeypatch, fallback, per_tier=3, n_coaches=8):
+    monkeypatch.setattr(config, "EMPTY_TIER_FALLBACK", fallback)
+    monkeypatch.setattr(logic, "pool_index", make_pool(per_tier))
+    session = logic.DraftSession((1, 44), [Coach(200 + i) for i in range(n_coaches)], seed=9)
+    play_draft(session, random.Random(9))
+    return session
+
+
+def test_pool_exhausted_with_any_never_wastes_a_turn(monkeypatch):
+    # 8 coaches x 10 picks against 3 names per tier (42): every name ends on a roster
+    session = play_out(monkeypatch, "any")
+    assert sum(c.picks for c in session.coaches.values()) == len(session.pool)
+    assert not session.availability.pos
+
+
+def test_pool_exhausted_with_cheapest_keeps_the_cap(monkeypatch):
+    session = play_out(monkeypatch, "cheapest")
+    assert all(c.points <= config.MAX_POINTS for c in session.coaches.values())
+    assert all(c.high_counts()[0] <= 1 for c in session.coaches.values())
+    # A lost turn only ever means nothing under the cap is left
+    for coach in session.coaches.values():
+        if coach.picks < config.TOTAL_POKEMON:
+            fits = logic.fallback_tiers(*coach.high_counts(), coach.points)
+            assert not session.availability.nonempty(fits)
+
+
+def test_remaining_weights_follow_the_names_left(small_pool, coaches):
+    session = logic.DraftSession((1, 45), coaches, seed=4)
+    for pid, tier in enumerate(small_pool.tiers):
+        if tier == 100 and session.availability.count(100) > 3:
+            session.availability.take(pid)
+    tiers, weights = logic.roll_odds(session, (120, 100))
+    assert tiers == (120, 100)
+    assert weights == (config.TIER_PROBS[120], config.TIER_PROBS[100] * 3 / 30)
+
+
+def test_forced_draws_thinned_to_the_odds_at_pick_time(small_pool, coaches):
+    session = logic.DraftSession((1, 46), coaches, seed=6)
+    user_id = coaches[0].id
+    before = logic.draw_forced_run(session, [(user_id, 1)])[user_id]
+    tiers, weights_then, _ = before
+    # Most of tier 140 goes to other coaches before this pick comes up
+    for pid, tier in enumerate(small_pool.tiers):
+        if tier == 140 and session.availability.count(140) > 5:
+            session.availability.take(pid)
+    _, weights_now = logic.roll_odds(session, logic.get_valid_tiers(session, user_id, 1))
+
+    k = 40_000
+    table = sampler.tier_sampler(tiers, weights_then)
+    got = [logic.take_forced(session, user_id, 1, (tiers, weights_then, tier))[1]
+           for tier in table.draw_many(k, session.rng)]
+    for tier, weight in zip(tiers, weights_now):
+        expected = weight / sum(weights_now)
+        observed = got.count(tier) / k
+        assert abs(observed - expected) <= 4.5 * (expected * (1 - expected) / k) ** 0.5 + 1e-4
+
+
+def check_odds(got, tiers, weights):
+    k = len(got)
+    for tier, weight in zip(tiers, weights):
+        expected = weight / sum(weights)
+        observed = got.count(tier) / k
+        assert abs(observed - expected) <= 4.5 * (expected * (1 - expected) / k) ** 0.5 + 1e-4
+
+
+def test_take_roll_matches_a_fresh_roll_after_burns_and_restores(small_pool, coaches):
+    session = logic.DraftSession((1, 47), coaches, seed=8)
+    user_id = coaches[0].id
+    odds = lambda: logic.roll_odds(session, logic.get_valid_tiers(session, user_id, 1))
+    names_140 = [small_pool.names[pid] for pid in small_pool.by_tier[140]]
+    k = 20_000
+
+    # Names burned after the speculative draw: weights only go down (thinned)
+    got = []
+    for _ in range(k):
+        logic.speculate_roll(session, user_id, 1)
+        for name in names_140[:25]:
+            session.burn(name)
+        tiers, weights = odds()
+        name, tier = logic.take_roll(session, user_id, 1)
+        assert name not in names_140[:25]
+        got.append(tier)
+        session.clear_burned()
+    check_odds(got, tiers, weights)
+
+    # Burned names back before the click: weights went up, rolled again
+    got = []
+    for _ in range(k):
+        for name in names_140[:25]:
+            session.burn(name)
+        logic.speculate_roll(session, user_id, 1)
+        session.clear_burned()
+        got.append(logic.take_roll(session, user_id, 1)[1])
+    check_odds(got, *odds())
+
+    # The drawn name itself burned: another name, odds of the pool without it
+    got, expected = [], collections.Counter()
+    for _ in range(k):
+        logic.speculate_roll(session, user_id, 1)
+        drawn = session.speculative[user_id].pid
+        session.burn(small_pool.names[drawn])
+        tiers, weights = odds()
+        expected.update({t: w / sum(weights) for t, w in zip(tiers, weights)})
+        name, tier = logic.take_roll(session, user_id, 1)
+        assert name != small_pool.names[drawn]
+        got.append(tier)
+        session.clear_burned()
+    check_odds(got, list(expected), list(expected.values()))
@@ -0,0 +1,25 @@
+import random
+
+import config
+import sampler
+
+
+def test_draw_many_matches_the_weights():
+    tiers = tuple(config.TIER_PROBS)
+    table = sampler.tier_sampler(tiers)
+    k = 200_000
+    draws = table.draw_many(k, random.Random(11))
+    assert len(draws) == k
+
+    total = sum(config.TIER_PROBS.values())
+    for tier, weight in config.TIER_PROBS.items():
+        expected = weight / total
+        observed = draws.count(tier) / k
+        # ~4.5 standard deviations of a binomial share
+        assert abs(observed - expected) <= 4.5 * (expected * (1 - expected) / k) ** 0.5 + 1e-4
+
+
+def test_draw_many_same_stream_as_draw():
+    table = sampler.AliasTable(("a", "b", "c"), (1, 2, 3))
+    one_by_one = random.Random(3)
+    assert table.draw_many(50, random.Random(3)) == [table.draw(one_by_one) for _ in range(50)]
@@ -0,0 +1,43 @@
+import pytest
+
+import sprites
+from fetch_sprites import SpriteCache
+
+
+def fill_cache(root):
+    """What fetch_sprites.py leaves behind: two forms sharing an image, a 404 and a Pokémon without sprite"""
+    cache = SpriteCache(str(root))
+    images = {"pikachu": b"\x89PNG pikachu", "mewtwo-mega-y": b"\x89PNG mewtwo", "pikachu-cosplay": b"\x89PNG pikachu"}
+    for slug, data in images.items():
+        cache.put_entry(slug, {"status": 200, "sprite": f"http://sprites/{slug}.png", "sha256": cache.put_blob(data)})
+    cache.put_entry("fakemon", {"status": 404})
+    cache.put_entry("missingno", {"status": 200, "sprite": None})
+    return images
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_pack_round_trip(tmp_path, use_mmap):
+    images = fill_cache(tmp_path / "cache")
+    pack_path = str(tmp_path / "sprites.pack")
+    assert sprites.pack_sprites(str(tmp_path / "cache"), pack_path) == (3, 2)
+
+    store = sprites.read_sprites(pack_path, use_mmap)
+    assert len(store) == 3 and store.mapped == use_mmap
+    for slug, data in images.items():
+        assert store.get(slug) == data
+    assert store.get_for("Mega Mewtwo Y") == images["mewtwo-mega-y"]
+    assert store.get("fakemon") is None and store.get("missingno") is None
+
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"]) == (4, 2)
+    # Identical images are stored once
+    assert store.entries["pikachu"] == store.entries["pikachu-cosplay"]
+
+
+def test_load_store_without_pack_or_with_another_format(tmp_path):
+    pack_path = tmp_path / "sprites.pack"
+    assert len(sprites.load_store(str(pack_path))) == 0
+
+    pack_path.write_bytes(b"KKPL" + bytes(16))
+    with pytest.raises(ValueError):
+        sprites.load_store(str(pack_path))
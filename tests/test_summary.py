@@ -0,0 +1,102 @@
+import asyncio
+import random
+
+import kokoloko
+import logic
+import scoreboard
+import views
+
+from conftest import Coach, play_draft
+
+
+class FakeMessage:
+    def __init__(self):
+        self.reactions = []
+
+    async def add_reaction(self, emoji):
+        self.reactions.append(emoji)
+
+
+class FakeChannel:
+    id = 77
+    guild = None
+
+
+class FakeContext:
+    def __init__(self):
+        self.channel = FakeChannel()
+        self.message = FakeMessage()
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append((content, kwargs))
+
+
+class LostOutbox:
+    """The first summary page never goes out"""
+
+    def send(self, content=None, **kwargs):
+        handle = type("Handle", (), {})()
+        handle.sent = asyncio.get_running_loop().create_future()
+        handle.sent.set_exception(RuntimeError("send failed"))
+        handle.sent.exception()
+        return handle
+
+    def edit(self, handle, **kwargs):
+        pass
+
+
+def test_summary_reposts_when_the_live_one_is_missing_and_reacts_when_coalesced(small_pool, coaches):
+    async def scenario():
+        ctx = FakeContext()
+        session = logic.initialize_draft(ctx.channel, coaches)
+        session.scoreboard = scoreboard.Scoreboard(session, LostOutbox())
+        session.scoreboard._pin = lambda handle: asyncio.sleep(0)
+        session.scoreboard.publish()
+
+        await kokoloko.summary.callback(ctx)
+        first = list(ctx.sent)
+        await kokoloko.summary.callback(ctx)
+        logic.sessions.pop(logic.session_key(ctx.channel), None)
+        return ctx, first
+
+    ctx, first = asyncio.run(scenario())
+    # No link to a message that doesn't exist: the summary itself is posted
+    assert first and all(content is None and kwargs["embeds"] for content, kwargs in first)
+    # Asked again inside the coalescing window: no new reply, but the command is acknowledged
+    assert ctx.sent == first
+    assert ctx.message.reactions == ["📊"]
+
+
+def check_limits(messages):
+    for embeds in messages:
+        assert 1 <= len(embeds) <= views.MESSAGE_MAX_EMBEDS
+        assert sum(len(e) for e in embeds) <= views.MESSAGE_MAX_CHARS
+        for embed in embeds:
+            assert len(embed.fields) <= views.EMBED_MAX_FIELDS
+
+
+def test_pagination_keeps_discord_limits():
+    rng = random.Random(3)
+    fields = [(f"👤 Coach {i}", "x" * rng.randrange(20, 1000)) for i in range(400)]
+    chunks = views.paginate_summary(fields)
+    groups = views.group_summary_pages(chunks)
+    embeds = [views.create_summary_page(c, i + 1, len(chunks)) for i, c in enumerate(chunks)]
+    messages = [[embeds[i] for i in group] for group in groups]
+
+    check_limits(messages)
+    assert len(messages) > 1
+    # Nothing lost or reordered across pages and messages
+    assert [i for group in groups for i in group] == list(range(len(chunks)))
+    assert [f for chunk in chunks for f in chunk] == fields
+
+
+def test_summary_of_a_big_draft_fits(small_pool):
+    players = [Coach(200 + i) for i in range(40)]
+    session = logic.DraftSession((1, 99), players, seed=5)
+    play_draft(session, random.Random(5))
+
+    messages = views.create_summary_embeds(session)
+    check_limits(messages)
+    names = [f.name for embeds in messages for e in embeds for f in e.fields]
+    assert names == [f"👤 {p.display_name}" for p in players]
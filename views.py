@@ -1,6 +1,10 @@
 import discord
+import functools
+import io
+import re
 import config
 import logic
+import sprites
 
 
 # --- HELPER: GENERADOR DE CUADRÍCULA ---
@@ -28,6 +32,31 @@ def format_odds_grid(odds_data):
     return "\n".join(grid_rows)
 
 
+@functools.lru_cache(maxsize=config.GRID_CACHE_SIZE)
+def render_odds_grid(valid_tiers, weights=None):
+    """Grid ya formateada para una tupla de tiers válidas y sus pesos (cacheada)"""
+    return format_odds_grid(logic.tier_percentages(valid_tiers, weights))
+
+
+def cache_stats():
+    return {"odds_grid": render_odds_grid.cache_info()}
+
+
+# --- SPRITES (desde el store local, nunca por red) ---
+def sprite_for(embed, name, attach=True):
+    """
+    Pone el sprite de `name` como thumbnail del embed y devuelve el discord.File
+    a adjuntar. None si no hay asset (el embed queda solo texto) o si attach=False
+    (el mensaje ya tiene el archivo adjunto).
+    """
+    data = sprites.store.get_for(name)
+    if data is None:
+        return None
+    filename = re.sub(r"[^a-z0-9-]", "", sprites.get_api_name(name)) + ".png"
+    embed.set_thumbnail(url=f"attachment://{filename}")
+    return discord.File(io.BytesIO(data), filename=filename) if attach else None
+
+
 # --- CREACIÓN DE EMBEDS ---
 
 def create_roll_embed(player, pick_num, expiry_time, odds_grid_str):
@@ -40,43 +69,220 @@ def create_roll_embed(player, pick_num, expiry_time, odds_grid_str):
     return embed
 
 
-def create_summary_embed(draft_state):
-    """Genera la Tabla de Resultados (Scorecard)"""
-    if not draft_state["rosters"]:
-        return discord.Embed(title="📊 No Data", description="Draft hasn't started.")
+def create_decision_embed(player, pick_num, round_num, name, tier, pts_left, rerolls_left, expiry_time, status=""):
+    """Embed KEEP / RE-ROLL (con timer). `status` = lo último que pasó en el turno"""
+    description = f"⏳ **Decide en** <t:{expiry_time}:R>\n(Ronda {round_num})"
+    if status:
+        description = f"{status}\n\n{description}"
+
+    embed = discord.Embed(
+        title=f"Pick #{pick_num} • {player.display_name}",
+        description=description,
+        color=0xF1C40F
+    )
+    embed.add_field(name="Rolled", value=f"**{name}**", inline=True)
+    embed.add_field(name="Tier", value=f"{tier}", inline=True)
+    embed.add_field(name="Budget", value=f"{pts_left} pts left", inline=False)
+    embed.set_footer(text=f"Re-rolls left: {rerolls_left}/{config.MAX_REROLLS}")
+    return embed
+
+
+def create_result_embed(player, pick_num, name, tier, headline, points_left, status=""):
+    """Estado final del turno: qué se quedó el coach y cómo"""
+    embed = discord.Embed(
+        title=f"Pick #{pick_num} • {player.display_name}",
+        description=status or None,
+        color=0x95a5a6
+    )
+    embed.add_field(name=headline, value=f"**{name}** (Tier {tier})")
+    embed.set_footer(text=f"Budget Left: {points_left}")
+    return embed
+
+
+# Discord limits: 25 fields per embed, 6000 chars per message (all embeds), 10 embeds per message
+EMBED_MAX_FIELDS = 25
+MESSAGE_MAX_CHARS = 6000
+MESSAGE_MAX_EMBEDS = 10
+EMBED_MAX_DESCRIPTION = 4096
+SUMMARY_TITLE = "📊 Draft Summary / Resultados"
+# Room left for the page title "(n/m)"
+EMBED_CHAR_BUDGET = MESSAGE_MAX_CHARS - len(SUMMARY_TITLE) - 20
+
+
+def summary_players(session):
+    """Coaches (CoachRecord) in first-seen draft order"""
+    return list(session.coaches.values())
+
 
-    embed = discord.Embed(title="📊 Draft Summary / Resultados", color=0x3498db)
+def summary_field(session, player):
+    """(name, value) de un coach en la Tabla de Resultados"""
+    roster = session.roster(player.id)
+    points_spent = player.points
+    points_left = config.MAX_POINTS - points_spent
+    rerolls_used = player.rerolls
+    rerolls_left = config.MAX_REROLLS - rerolls_used
 
-    unique_ids = []
-    unique_players = []
-    for p in draft_state['order']:
-        if p.id not in unique_ids:
-            unique_ids.append(p.id)
-            unique_players.append(p)
+    if roster:
+        pokemon_list = "\n".join([f"• **{name}** ({tier})" for name, tier in roster])
+    else:
+        pokemon_list = "*(No picks yet)*"
 
-    for player in unique_players:
-        roster = draft_state["rosters"].get(player.id, [])
-        points_spent = draft_state["points"].get(player.id, 0)
-        points_left = config.MAX_POINTS - points_spent
-        rerolls_used = draft_state["rerolls"].get(player.id, 0)
-        rerolls_left = config.MAX_REROLLS - rerolls_used
+    field_value = (
+        f"{pokemon_list}\n"
+        f"-------------------\n"
+        f"💰 **Points:** {points_spent}/{config.MAX_POINTS} (Left: {points_left})\n"
+        f"🎲 **Re-rolls:** {rerolls_left} left"
+    )
+    return f"👤 {player.display_name}", field_value
+
+
+def paginate_summary(fields):
+    """Splits [(name, value)] into embed-sized chunks (25 fields / char budget)"""
+    chunks, current, size = [], [], 0
+    for name, value in fields:
+        n = len(name) + len(value)
+        if current and (len(current) == EMBED_MAX_FIELDS or size + n > EMBED_CHAR_BUDGET):
+            chunks.append(current)
+            current, size = [], 0
+        current.append((name, value))
+        size += n
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def group_summary_pages(chunks):
+    """Packs embed chunks into messages (10 embeds / 6000 chars per message). Returns [[chunk_index, ...]]"""
+    messages, current, size = [], [], 0
+    for i, chunk in enumerate(chunks):
+        n = len(SUMMARY_TITLE) + 20 + sum(len(name) + len(value) for name, value in chunk)
+        if current and (len(current) == MESSAGE_MAX_EMBEDS or size + n > MESSAGE_MAX_CHARS):
+            messages.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += n
+    if current:
+        messages.append(current)
+    return messages
+
+
+def create_summary_page(chunk, page, pages):
+    """Una página (embed) de la Tabla de Resultados"""
+    title = SUMMARY_TITLE if pages == 1 else f"{SUMMARY_TITLE} ({page}/{pages})"
+    embed = discord.Embed(title=title, color=0x3498db)
+    for name, value in chunk:
+        embed.add_field(name=name, value=value, inline=True)
+    return embed
+
+
+def create_summary_embeds(session):
+    """Genera la Tabla de Resultados (Scorecard), paginada: [[embeds del mensaje 1], ...]"""
+    if session is None or not session.coaches:
+        return [[discord.Embed(title="📊 No Data", description="Draft hasn't started.")]]
+
+    chunks = paginate_summary([summary_field(session, p) for p in summary_players(session)])
+    embeds = [create_summary_page(c, i + 1, len(chunks)) for i, c in enumerate(chunks)]
+    return [[embeds[i] for i in group] for group in group_summary_pages(chunks)]
 
-        if roster:
-            pokemon_list = "\n".join([f"• **{p['name']}** ({p['tier']})" for p in roster])
+
+def create_auto_digest_embeds(round_num, picks, session):
+    """
+    Resumen de una racha de picks forzados (sin rerolls): una línea por pick.
+    picks = [(player, pick_num, name, tier), ...]. Returns embeds (one per message).
+    """
+    lines = []
+    for player, pick_num, name, tier in picks:
+        if name:
+            points_left = config.MAX_POINTS - player.points
+            lines.append(f"**#{pick_num} {player.display_name}** → **{name}** (Tier {tier}) • 💰 {points_left}")
         else:
-            pokemon_list = "*(No picks yet)*"
+            lines.append(f"**#{pick_num} {player.display_name}** → ⚠️ No valid pokemon")
+
+    pages, current, size = [], [], 0
+    for line in lines:
+        if current and size + len(line) + 1 > EMBED_MAX_DESCRIPTION:
+            pages.append(current)
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        pages.append(current)
+
+    title = f"🔒 Auto-Picks • Round {round_num} (0 Rerolls)"
+    return [
+        discord.Embed(title=title if len(pages) == 1 else f"{title} ({i + 1}/{len(pages)})",
+                      description="\n".join(page), color=0x95a5a6)
+        for i, page in enumerate(pages)
+    ]
+
+
+def create_odds_embed(player, state, pick):
+    """Odds estimadas (DP) para un pick futuro + distribución de puntos final"""
+    current_pick = state.key[0]
+    allowed = state.allowed_odds(pick)
+    rolled = state.tier_odds(pick)
+
+    lines = []
+    for tier in sorted(allowed, reverse=True):
+        if allowed[tier] <= 0:
+            continue
+        lines.append(f"**T{tier}:** `{allowed[tier] * 100:5.1f}%` alcanzable • `{rolled[tier] * 100:5.2f}%` sale")
+
+    embed = discord.Embed(
+        title=f"🔮 Odds • {player.display_name} • Pick #{pick}",
+        description="\n".join(lines) or "⚠️ Sin Tiers Válidas",
+        color=0x9b59b6
+    )
+    embed.add_field(
+        name="💰 Puntos Finales",
+        value=(
+            f"Media: **{state.expected_points():.0f}**\n"
+            f"P10 / P50 / P90: {state.points_percentile(0.1)} / "
+            f"{state.points_percentile(0.5)} / {state.points_percentile(0.9)}"
+        ),
+        inline=False
+    )
+    embed.set_footer(text=f"Desde el pick #{current_pick} • Aproximado, no exacto: asume Keep en cada primer roll, "
+                          f"pesos fijos por tier y pool sin agotar")
+    return embed
+
+
+# --- HISTORIAL (history.py) ---
 
-        field_value = (
-            f"{pokemon_list}\n"
-            f"-------------------\n"
-            f"💰 **Points:** {points_spent}/{config.MAX_POINTS} (Left: {points_left})\n"
-            f"🎲 **Re-rolls:** {rerolls_left} left"
-        )
-        embed.add_field(name=f"👤 {player.display_name}", value=field_value, inline=True)
+def create_history_embed(member, stats, recent):
+    """!history: totales del coach en la liga + sus últimos rosters"""
+    embed = discord.Embed(title=f"📜 Historial • {member.display_name}", color=0x1abc9c)
+    if stats is None:
+        embed.description = "*(Sin drafts registrados)*"
+        return embed
 
+    drafts = stats["drafts"]
+    avg_points = stats["points"] / drafts if drafts else 0
+    embed.description = (
+        f"🏆 **Drafts:** {drafts} • **Picks:** {stats['picks']}\n"
+        f"💰 **Puntos medios:** {avg_points:.0f}/{config.MAX_POINTS}\n"
+        f"🎲 **Re-rolls:** {stats['rerolls']} ({stats['rerolls'] / max(drafts, 1):.1f} por draft)"
+    )
+    for _, finished_at, roster in recent:
+        when = f"<t:{int(finished_at)}:d>" if finished_at else "?"
+        value = ", ".join(f"{name} ({tier})" for name, tier in roster) or "-"
+        embed.add_field(name=f"Draft {when} • {sum(t for _, t in roster)} pts", value=value[:1024], inline=False)
     return embed
 
 
+def create_most_rerolled_embed(rows):
+    lines = [f"**{i}.** {name} (T{tier}) • 🔄 {rerolls} de {rolls} rolls • ✅ {picks} picks"
+             for i, (name, tier, rerolls, rolls, picks) in enumerate(rows, start=1)]
+    return discord.Embed(title="🔄 Most Re-rolled Pokémon", description="\n".join(lines) or "*(Sin datos)*",
+                         color=0xe67e22)
+
+
+def create_avg_points_embed(rows):
+    lines = [f"**Pick #{pick}:** `{avg:6.1f}` pts ({n} picks)" for pick, n, avg in rows]
+    return discord.Embed(title="📈 Puntos medios por pick", description="\n".join(lines) or "*(Sin datos)*",
+                         color=0x3498db)
+
+
 # --- VISTAS / BOTONES ---
 
 class RollView(discord.ui.View):
@@ -84,11 +290,7 @@ class RollView(discord.ui.View):
         super().__init__(timeout=config.ROLL_TIMEOUT)
         self.coach = coach_user
         self.clicked = False
-
-    async def disable_all(self, interaction):
-        for child in self.children:
-            child.disabled = True
-        await interaction.response.edit_message(view=self)
+        self.interaction = None  # El scheduler responde al click editando el mensaje del turno
 
     @discord.ui.button(label="🎲 ROLL DICE", style=discord.ButtonStyle.primary, emoji="🎲")
     async def roll_button(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -100,7 +302,7 @@ class RollView(discord.ui.View):
             return
 
         self.clicked = True
-        await self.disable_all(interaction)
+        self.interaction = interaction
         self.stop()
 
 
@@ -110,6 +312,7 @@ class DraftView(discord.ui.View):
         self.coach = coach_user
         self.value = None
         self.clicked_by = None
+        self.interaction = None  # El scheduler responde al click editando el mensaje del turno
 
         # --- FIX CRÍTICO: MANEJO DEL TIMEOUT ---
 
@@ -127,17 +330,12 @@ class DraftView(discord.ui.View):
             return False
         return True
 
-    async def disable_all(self, interaction):
-        for child in self.children:
-            child.disabled = True
-        await interaction.response.edit_message(view=self)
-
     @discord.ui.button(label="✅ Aceptar (Keep)", style=discord.ButtonStyle.success)
     async def keep(self, interaction: discord.Interaction, button: discord.ui.Button):
         if not await self.check_permissions(interaction): return
         self.value = "KEEP"
         self.clicked_by = interaction.user
-        await self.disable_all(interaction)
+        self.interaction = interaction
         self.stop()
 
     @discord.ui.button(label="🎲 Re-Roll", style=discord.ButtonStyle.danger)
@@ -145,5 +343,5 @@ class DraftView(discord.ui.View):
         if not await self.check_permissions(interaction): return
         self.value = "REROLL"
         self.clicked_by = interaction.user
-        await self.disable_all(interaction)
+        self.interaction = interaction
         self.stop()
\ No newline at end of file